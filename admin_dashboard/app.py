@@ -1,20 +1,28 @@
 """
 Admin Dashboard - FastAPI Application
 """
-from fastapi import FastAPI, Request, Depends, HTTPException, status
+from fastapi import FastAPI, Request, Depends, HTTPException, BackgroundTasks, status
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
+import re
 import secrets
+from datetime import datetime
+from typing import Optional
 from loguru import logger
-from pathlib import Path
-import json
 
 from config.settings import settings
 from database.connection import init_db
-from database.models.user import User
+from database.models.user import User, UserSummary
+from database.pagination import paginate
+from database.loaders import UserLoader
+from database.export_catalog import EXPORTS, FORMATS, stream_export
 from database.models.notification import Notification
+from database.models.stats_rollup import StatsRollup
+from utils.content_catalog import ContentCatalog
+from utils.cache import AsyncCache
+from utils.stats_rollups import ensure_rollups
 
 
 app = FastAPI(title="Educational Platform - Admin Dashboard")
@@ -29,6 +37,21 @@ except:
     pass
 
 
+async def _page(document, *filters, **kwargs):
+    """paginate() with a 400 for bad cursors"""
+    try:
+        return await paginate(document, *filters, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _total(document, *filters) -> int:
+    """Row count for the page header (metadata count when unfiltered)"""
+    if not filters:
+        return await document.get_motor_collection().estimated_document_count()
+    return await document.find(*filters).count()
+
+
 def verify_admin(credentials: HTTPBasicCredentials = Depends(security)):
     """Verify admin credentials"""
     correct_username = secrets.compare_digest(credentials.username, settings.ADMIN_USERNAME)
@@ -57,30 +80,27 @@ async def startup_event():
         logger.error(error_msg, exc_info=True)
         print(f"ERROR: {error_msg}", flush=True)
         raise
+    try:
+        # The dashboard reads only the rollups: build them on first deploy
+        await ensure_rollups()
+    except Exception as e:
+        logger.error(f"Failed to build stats rollups: {repr(e)}")
 
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request, username: str = Depends(verify_admin)):
     """Main dashboard"""
     try:
-        # Get statistics
+        # Get statistics (maintained counters, see StatsRollup)
         try:
-            total_users = await User.find().count()
+            totals = await StatsRollup.get_scope(StatsRollup.GLOBAL)
+            total_users = totals.users
+            pending_approvals = totals.enrollments_pending
         except Exception as e:
-            error_msg = f"Error fetching total users: {repr(e)}"
+            error_msg = f"Error fetching statistics: {repr(e)}"
             logger.error(error_msg, exc_info=True)
             print(f"ERROR: {error_msg}", flush=True)
             total_users = 0
-        
-        # Get pending approvals - handle potential errors
-        try:
-            pending_approvals = await User.find(
-                User.courses.approval_status == "pending"
-            ).count()
-        except Exception as e:
-            error_msg = f"Error fetching pending approvals: {repr(e)}"
-            logger.error(error_msg, exc_info=True)
-            print(f"ERROR: {error_msg}", flush=True)
             pending_approvals = 0
         
         # Get recent users
@@ -107,16 +127,41 @@ async def dashboard(request: Request, username: str = Depends(verify_admin)):
 
 
 @app.get("/students", response_class=HTMLResponse)
-async def students_list(request: Request, username: str = Depends(verify_admin)):
-    """Students list"""
+async def students_list(
+    request: Request,
+    q: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    username: str = Depends(verify_admin)
+):
+    """Students list (newest first, one page at a time)"""
     try:
-        students = await User.find().sort(-User.registered_at).to_list()
+        filters = []
+        q = (q or "").strip()
+        if q.isdigit():
+            filters.append(User.telegram_id == int(q))
+        elif q:
+            pattern = {"$regex": re.escape(q), "$options": "i"}
+            filters.append({"$or": [{"full_name": pattern}, {"email": pattern}, {"phone": pattern}]})
+        
+        page = await _page(
+            User, *filters,
+            sort_field="registered_at",
+            after=after, before=before, limit=limit,
+            projection_model=UserSummary
+        )
         
         return templates.TemplateResponse("students.html", {
             "request": request,
-            "students": students,
+            "students": page.items,
+            "page": page,
+            "total": await _total(User, *filters),
+            "q": q,
             "username": username
         })
+    except HTTPException:
+        raise
     except Exception as e:
         error_msg = f"Students list error: {repr(e)}"
         logger.error(error_msg, exc_info=True)
@@ -198,230 +243,233 @@ async def student_detail(request: Request, telegram_id: int, username: str = Dep
     })
 
 
-@app.post("/api/approve-course/{telegram_id}/{course_id}")
-async def approve_course(telegram_id: int, course_id: str, username: str = Depends(verify_admin)):
-    """Approve course enrollment"""
-    from datetime import datetime
-    
-    user = await User.find_one(User.telegram_id == telegram_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Find and approve course enrollment
-    for enrollment in user.courses:
-        if enrollment.course_id == course_id and enrollment.approval_status == "pending":
-            enrollment.approval_status = "approved"
-            enrollment.approved_by = username
-            enrollment.approved_at = datetime.utcnow()
-            await user.save()
-            
-            # Send notification to user
-            notification = Notification(
-                user_id=telegram_id,
-                title="تم الموافقة على تسجيلك!",
-                message=f"تم الموافقة على تسجيلك في الدورة.",
-                notification_type="approval",
-                related_id=course_id
-            )
-            await notification.insert()
-            
-            # Send telegram message directly
-            from config.settings import settings
-            import httpx
-            try:
-                from config.courses_config import get_course
-                course = get_course(course_id)
-                course_name = course['name'] if course else course_id
-                link = None
-                try:
-                    if course and course.get('group_link'):
-                        link = course['group_link']
-                    else:
-                        gl_path = Path('data/group_links.json')
-                        if gl_path.exists():
-                            with open(gl_path, 'r', encoding='utf-8') as f:
-                                gl = json.load(f)
-                                link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
-                except Exception as e:
-                    logger.error(f"Error loading group link: {e}")
-                
-                text = f"""
+# Bulk approval messages: the Bot API allows about 30 messages per second
+# to different chats, so start sends 1/25 s apart with at most 10 in flight
+BULK_SENDS_PER_SECOND = 25
+BULK_SENDS_IN_FLIGHT = 10
+
+
+async def _send_approval_message(client, telegram_id: int, kind: str, item_id: str, enrollment):
+    """Send the approval message with the group link via the Bot API"""
+    try:
+        if kind == "material":
+            from config.materials_config import get_material
+            item = get_material(item_id)
+            item_name = item['name'] if item else item_id
+            title = f"{item_name} - السنة {enrollment.year} - الفصل {enrollment.semester}"
+            group_label = "المادة"
+        else:
+            from config.courses_config import get_course
+            item = get_course(item_id)
+            title = item['name'] if item else item_id
+            group_label = "الدورة"
+        link = None
+        try:
+            if item and item.get('group_link'):
+                link = item['group_link']
+            else:
+                link = await ContentCatalog.get_group_link(item_id, 'materials' if kind == "material" else 'courses')
+        except Exception as e:
+            logger.error(f"Error loading group link: {e}")
+        
+        text = f"""
 🎉 **تم الموافقة على تسجيلك!**
 
 ✅ تم قبول طلب تسجيلك في:
-📚 {course_name}
+📚 {title}
 
-🔗 رابط الانضمام إلى مجموعة الدورة:
+🔗 رابط الانضمام إلى مجموعة {group_label}:
 {link if link else 'سيتم إرسال رابط المجموعة قريباً'}
 
 شكراً لثقتك! 🙏
-                """
-                
-                async with httpx.AsyncClient() as client:
-                    await client.post(
-                        f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
-                        json={
-                            "chat_id": telegram_id,
-                            "text": text,
-                            "parse_mode": "Markdown"
-                        }
-                    )
-                logger.info(f"Notification sent to {telegram_id}")
-            except Exception as e:
-                logger.error(f"Failed to send telegram notification: {e}")
-            
-            logger.info(f"Course approved: {user.full_name} -> {course_id}")
-            return {"status": "success", "message": "تم الموافقة بنجاح"}
+        """
+        
+        await client.post(
+            f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
+            json={
+                "chat_id": telegram_id,
+                "text": text,
+                "parse_mode": "Markdown"
+            }
+        )
+        logger.info(f"Notification sent to {telegram_id}")
+    except Exception as e:
+        logger.error(f"Failed to send telegram notification: {e}")
+
+
+async def _send_bulk_approval_messages(approved):
+    """Send the approval messages of a bulk approval, paced for the Bot API"""
+    import asyncio
+    import httpx
+    
+    semaphore = asyncio.Semaphore(BULK_SENDS_IN_FLIGHT)
     
-    raise HTTPException(status_code=404, detail="Enrollment not found")
+    async def send(client, number, telegram_id, kind, item_id, enrollment):
+        # Pace the starts to stay under the Bot API rate limit
+        await asyncio.sleep(number / BULK_SENDS_PER_SECOND)
+        async with semaphore:
+            await _send_approval_message(client, telegram_id, kind, item_id, enrollment)
+    
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(
+            send(client, number, telegram_id, kind, item_id, enrollment)
+            for number, (telegram_id, kind, item_id, _, enrollment) in enumerate(approved)
+        ))
+    logger.info(f"Bulk approval messages sent: {len(approved)}")
+
+
+def _approval_notification(telegram_id: int, kind: str, item_id: str) -> Notification:
+    return Notification(
+        user_id=telegram_id,
+        title="تم الموافقة على تسجيلك!",
+        message="تم الموافقة على تسجيلك في المادة." if kind == "material" else "تم الموافقة على تسجيلك في الدورة.",
+        notification_type="approval",
+        related_id=item_id
+    )
+
+
+async def _approve_enrollment(telegram_id: int, kind: str, item_id: str, username: str):
+    import httpx
+    
+    reviewed = await User.review_enrollment(telegram_id, kind, item_id, "approved", username)
+    if not reviewed:
+        if not await User.find_one(User.telegram_id == telegram_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=404, detail="Enrollment not found")
+    full_name, enrollment = reviewed
+    AsyncCache.fire("review", user_id=telegram_id)
+    
+    await _approval_notification(telegram_id, kind, item_id).insert()
+    async with httpx.AsyncClient() as client:
+        await _send_approval_message(client, telegram_id, kind, item_id, enrollment)
+    
+    logger.info(f"{kind.capitalize()} approved: {full_name} -> {item_id}")
+    return {"status": "success", "message": "تم الموافقة بنجاح"}
+
+
+async def _reject_enrollment(telegram_id: int, kind: str, item_id: str, username: str, message: str):
+    reviewed = await User.review_enrollment(telegram_id, kind, item_id, "rejected", username)
+    if not reviewed:
+        if not await User.find_one(User.telegram_id == telegram_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        raise HTTPException(status_code=404, detail="Enrollment not found")
+    full_name, _ = reviewed
+    AsyncCache.fire("review", user_id=telegram_id)
+    
+    notification = Notification(
+        user_id=telegram_id,
+        title="تم رفض طلبك",
+        message=message,
+        notification_type="approval",
+        related_id=item_id
+    )
+    await notification.insert()
+    
+    logger.info(f"{kind.capitalize()} rejected: {full_name} -> {item_id}")
+    return {"status": "success", "message": "تم الرفض"}
+
+
+@app.post("/api/approve-course/{telegram_id}/{course_id}")
+async def approve_course(telegram_id: int, course_id: str, username: str = Depends(verify_admin)):
+    """Approve course enrollment"""
+    return await _approve_enrollment(telegram_id, "course", course_id, username)
 
 
 @app.post("/api/reject-course/{telegram_id}/{course_id}")
 async def reject_course(telegram_id: int, course_id: str, username: str = Depends(verify_admin)):
     """Reject course enrollment"""
-    user = await User.find_one(User.telegram_id == telegram_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    for enrollment in user.courses:
-        if enrollment.course_id == course_id and enrollment.approval_status == "pending":
-            enrollment.approval_status = "rejected"
-            enrollment.approved_by = username
-            await user.save()
-            
-            # Send notification
-            notification = Notification(
-                user_id=telegram_id,
-                title="تم رفض طلبك",
-                message=f"تم رفض طلب التسجيل. يرجى التواصل مع الإدارة.",
-                notification_type="approval",
-                related_id=course_id
-            )
-            await notification.insert()
-            
-            logger.info(f"Course rejected: {user.full_name} -> {course_id}")
-            return {"status": "success", "message": "تم الرفض"}
-    
-    raise HTTPException(status_code=404, detail="Enrollment not found")
+    return await _reject_enrollment(
+        telegram_id, "course", course_id, username,
+        "تم رفض طلب التسجيل. يرجى التواصل مع الإدارة."
+    )
 
 
 @app.post("/api/approve-material/{telegram_id}/{material_id}")
 async def approve_material(telegram_id: int, material_id: str, username: str = Depends(verify_admin)):
     """Approve material enrollment"""
-    from datetime import datetime
-    
-    user = await User.find_one(User.telegram_id == telegram_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Find and approve material enrollment
-    for enrollment in user.materials:
-        if enrollment.material_id == material_id and enrollment.approval_status == "pending":
-            enrollment.approval_status = "approved"
-            enrollment.approved_by = username
-            enrollment.approved_at = datetime.utcnow()
-            await user.save()
-            
-            # Send notification to user
-            notification = Notification(
-                user_id=telegram_id,
-                title="تم الموافقة على تسجيلك!",
-                message=f"تم الموافقة على تسجيلك في المادة.",
-                notification_type="approval",
-                related_id=material_id
-            )
-            await notification.insert()
-            
-            # Send telegram message directly
-            from config.settings import settings
-            import httpx
-            try:
-                from config.materials_config import get_material
-                material = get_material(material_id)
-                material_name = material['name'] if material else material_id
-                link = None
-                try:
-                    if material and material.get('group_link'):
-                        link = material['group_link']
-                    else:
-                        gl_path = Path('data/group_links.json')
-                        if gl_path.exists():
-                            with open(gl_path, 'r', encoding='utf-8') as f:
-                                gl = json.load(f)
-                                link = gl.get('materials', {}).get(material_id) or gl.get(material_id)
-                except Exception as e:
-                    logger.error(f"Error loading material group link: {e}")
-                
-                text = f"""
-🎉 **تم الموافقة على تسجيلك!**
-
-✅ تم قبول طلب تسجيلك في:
-📚 {material_name} - السنة {enrollment.year} - الفصل {enrollment.semester}
-
-🔗 رابط الانضمام إلى مجموعة المادة:
-{link if link else 'سيتم إرسال رابط المجموعة قريباً'}
-
-شكراً لثقتك! 🙏
-                """
-                
-                async with httpx.AsyncClient() as client:
-                    await client.post(
-                        f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
-                        json={
-                            "chat_id": telegram_id,
-                            "text": text,
-                            "parse_mode": "Markdown"
-                        }
-                    )
-                logger.info(f"Notification sent to {telegram_id}")
-            except Exception as e:
-                logger.error(f"Failed to send telegram notification: {e}")
-            
-            logger.info(f"Material approved: {user.full_name} -> {material_id}")
-            return {"status": "success", "message": "تم الموافقة بنجاح"}
-    
-    raise HTTPException(status_code=404, detail="Enrollment not found")
+    return await _approve_enrollment(telegram_id, "material", material_id, username)
 
 
 @app.post("/api/reject-material/{telegram_id}/{material_id}")
 async def reject_material(telegram_id: int, material_id: str, username: str = Depends(verify_admin)):
     """Reject material enrollment"""
-    user = await User.find_one(User.telegram_id == telegram_id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    for enrollment in user.materials:
-        if enrollment.material_id == material_id and enrollment.approval_status == "pending":
-            enrollment.approval_status = "rejected"
-            enrollment.approved_by = username
-            await user.save()
-            
-            # Send notification
-            notification = Notification(
-                user_id=telegram_id,
-                title="تم رفض طلبك",
-                message=f"تم رفض طلب التسجيل في المادة. يرجى التواصل مع الإدارة.",
-                notification_type="approval",
-                related_id=material_id
-            )
-            await notification.insert()
-            
-            logger.info(f"Material rejected: {user.full_name} -> {material_id}")
-            return {"status": "success", "message": "تم الرفض"}
+    return await _reject_enrollment(
+        telegram_id, "material", material_id, username,
+        "تم رفض طلب التسجيل في المادة. يرجى التواصل مع الإدارة."
+    )
+
+
+@app.post("/api/approve-bulk")
+async def approve_bulk(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    username: str = Depends(verify_admin)
+):
+    """Approve many pending enrollments at once.
     
-    raise HTTPException(status_code=404, detail="Enrollment not found")
+    Body: {"enrollments": [{"telegram_id": 1, "type": "course", "id": "python"}, ...]}
+    The Telegram messages are sent after the response.
+    """
+    data = await request.json()
+    try:
+        requested = [
+            (int(e["telegram_id"]), e.get("type", "course"), str(e["id"]))
+            for e in data.get("enrollments", [])
+        ]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid enrollments")
+    if any(kind not in ("course", "material") for _, kind, _ in requested):
+        raise HTTPException(status_code=400, detail="Invalid enrollment type")
+    
+    approved = await User.approve_enrollments(requested, username)
+    
+    for telegram_id, _, _, _, _ in approved:
+        AsyncCache.fire("review", user_id=telegram_id)
+    
+    if approved:
+        await Notification.insert_many([
+            _approval_notification(telegram_id, kind, item_id)
+            for telegram_id, kind, item_id, _, _ in approved
+        ])
+        background_tasks.add_task(_send_bulk_approval_messages, approved)
+    
+    logger.info(f"Bulk approval by {username}: {len(approved)}/{len(requested)} enrollments")
+    return {
+        "status": "success",
+        "approved": len(approved),
+        "requested": len(requested),
+        "message": f"تمت الموافقة على {len(approved)} طلب"
+    }
 
 
 @app.get("/pending-approvals", response_class=HTMLResponse)
-async def pending_approvals(request: Request, username: str = Depends(verify_admin)):
-    """Show pending approvals"""
+async def pending_approvals(
+    request: Request,
+    type: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    username: str = Depends(verify_admin)
+):
+    """Show pending approvals (oldest requests first, one page of users at a time)"""
     from config.settings import settings
-    users = await User.find().to_list()
+    # Only users with something pending (indexed on both arrays)
+    if type == "course":
+        pending = {"courses.approval_status": "pending"}
+    elif type == "material":
+        pending = {"materials.approval_status": "pending"}
+    else:
+        type = None
+        pending = {"$or": [
+            {"courses.approval_status": "pending"},
+            {"materials.approval_status": "pending"},
+        ]}
+    page = await _page(User, pending, descending=False, after=after, before=before, limit=limit)
     
     pending_enrollments = []
-    for user in users:
+    for user in page.items:
         # Check course enrollments
-        for enrollment in user.courses:
+        for enrollment in user.courses if type != "material" else []:
             if enrollment.approval_status == "pending":
                 from config.courses_config import get_course
                 course = get_course(enrollment.course_id)
@@ -441,7 +489,7 @@ async def pending_approvals(request: Request, username: str = Depends(verify_adm
                 pending_enrollments.append(enrollment_data)
         
         # Check material enrollments (جديد)
-        for enrollment in user.materials:
+        for enrollment in user.materials if type != "course" else []:
             if enrollment.approval_status == "pending":
                 from config.materials_config import get_material
                 material = get_material(enrollment.material_id)
@@ -463,6 +511,8 @@ async def pending_approvals(request: Request, username: str = Depends(verify_adm
     return templates.TemplateResponse("pending_approvals.html", {
         "request": request,
         "pending_enrollments": pending_enrollments,
+        "page": page,
+        "type": type,
         "username": username
     })
 
@@ -501,21 +551,35 @@ async def materials_list(request: Request, username: str = Depends(verify_admin)
 
 
 @app.get("/assignments", response_class=HTMLResponse)
-async def assignments_list(request: Request, username: str = Depends(verify_admin)):
-    """Assignments management"""
-    from database.models.assignment import Assignment
+async def assignments_list(
+    request: Request,
+    course: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    username: str = Depends(verify_admin)
+):
+    """Assignments management (newest first, one page at a time)"""
+    from database.models.assignment import Assignment, AssignmentSubmission
     
-    assignments = await Assignment.find().sort(-Assignment.created_at).to_list()
+    filters = [Assignment.related_id == course] if course else []
+    page = await _page(Assignment, *filters, sort_field="created_at", after=after, before=before, limit=limit)
+    assignments = page.items
     
-    # Calculate statistics for each assignment
+    # Calculate statistics for each assignment (one aggregation for all)
+    counts = await AssignmentSubmission.counts_by_assignment([a.id for a in assignments])
     for assignment in assignments:
-        assignment.total_submissions = len(assignment.submissions)
-        assignment.graded_submissions = len([s for s in assignment.submissions if s.status == "graded"])
+        assignment_counts = counts.get(assignment.id, {})
+        assignment.total_submissions = assignment_counts.get("total", 0)
+        assignment.graded_submissions = assignment_counts.get("graded", 0)
         assignment.pending_submissions = assignment.total_submissions - assignment.graded_submissions
     
     return templates.TemplateResponse("assignments.html", {
         "request": request,
         "assignments": assignments,
+        "page": page,
+        "total": await _total(Assignment, *filters),
+        "course": course,
         "username": username
     })
 
@@ -627,15 +691,26 @@ async def send_notification(
 
 
 @app.get("/videos", response_class=HTMLResponse)
-async def videos_list(request: Request, username: str = Depends(verify_admin)):
-    """Videos management"""
+async def videos_list(
+    request: Request,
+    course: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    username: str = Depends(verify_admin)
+):
+    """Videos management (newest first, one page at a time)"""
     from database.models.video import Video
     
-    videos = await Video.find().sort(-Video.uploaded_at).to_list()
+    filters = [Video.related_id == course] if course else []
+    page = await _page(Video, *filters, sort_field="uploaded_at", after=after, before=before, limit=limit)
     
     return templates.TemplateResponse("videos.html", {
         "request": request,
-        "videos": videos,
+        "videos": page.items,
+        "page": page,
+        "total": await _total(Video, *filters),
+        "course": course,
         "username": username
     })
 
@@ -646,7 +721,9 @@ async def admin_settings(request: Request, username: str = Depends(verify_admin)
     return templates.TemplateResponse("settings.html", {
         "request": request,
         "username": username,
-        "current_email": settings.ADMIN_USERNAME
+        "current_email": settings.ADMIN_USERNAME,
+        "exports": list(EXPORTS),
+        "export_formats": list(FORMATS)
     })
 
 
@@ -671,10 +748,13 @@ async def assignment_submissions(
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
     
-    # Get user details for each submission
+    # Resolve every submitter with one query
+    submissions = await assignment.list_submissions()
+    users = UserLoader()
+    await users.load_many(s.user_id for s in submissions)
     submissions_with_users = []
-    for submission in assignment.submissions:
-        user = await User.find_one(User.telegram_id == int(submission.user_id))
+    for submission in submissions:
+        user = users.get(submission.user_id)
         if user:
             submissions_with_users.append({
                 "submission": submission,
@@ -706,12 +786,15 @@ async def grade_submission(request: Request, username: str = Depends(verify_admi
         raise HTTPException(status_code=404, detail="Assignment not found")
     
     # Grade the submission
-    await assignment.grade_submission(
+    graded = await assignment.grade_submission(
         user_id=user_id,
         grade=grade,
         feedback=feedback,
         graded_by=username
     )
+    if not graded:
+        raise HTTPException(status_code=404, detail="Submission not found")
+    AsyncCache.fire("grade", user_id=int(user_id), assignment_id=str(assignment.id))
     
     # Send notification to student
     try:
@@ -766,19 +849,26 @@ async def student_grades(
     username: str = Depends(verify_admin)
 ):
     """View student's grades"""
-    from database.models.assignment import Assignment
+    from beanie.operators import In
+    from database.models.assignment import Assignment, AssignmentSubmission
     
     student = await User.find_one(User.telegram_id == telegram_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    # Get all assignments with this student's submissions
-    all_assignments = await Assignment.find().to_list()
+    # Get this student's submissions and only the assignments they belong to
+    submissions = await AssignmentSubmission.find(
+        AssignmentSubmission.user_id == str(telegram_id)
+    ).to_list()
+    assignments = await Assignment.find(
+        In(Assignment.id, [s.assignment_id for s in submissions])
+    ).to_list()
+    assignments_by_id = {a.id: a for a in assignments}
     student_grades = []
     
-    for assignment in all_assignments:
-        submission = assignment.get_submission(str(telegram_id))
-        if submission:
+    for submission in submissions:
+        assignment = assignments_by_id.get(submission.assignment_id)
+        if assignment:
             student_grades.append({
                 "assignment": assignment,
                 "submission": submission
@@ -803,3 +893,31 @@ async def student_grades(
         "average_grade": average_grade,
         "username": username
     })
+
+
+@app.get("/export/{dataset}.{fmt}")
+async def export_dataset(
+    dataset: str,
+    fmt: str,
+    gzip: bool = False,
+    username: str = Depends(verify_admin)
+):
+    """Stream a whole collection as CSV or NDJSON (?gzip=true to compress).
+
+    server.py mounts the dashboard at /admin, so this is served as
+    /admin/export/<dataset>.<fmt>; the settings page links every export.
+    """
+    if dataset not in EXPORTS or fmt not in FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+
+    filename = f"{dataset}_{datetime.utcnow().strftime('%Y%m%d')}.{fmt}"
+    media_type = FORMATS[fmt]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    logger.info(f"Admin {username} exporting {filename}")
+    return StreamingResponse(
+        stream_export(dataset, fmt, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,216 @@
+"""
+Benchmark StatisticsManager.get_dashboard_stats against the old Python path
+قياس أداء إحصائيات لوحة التحكم: العدادات المجمعة مقابل بايثون
+
+Fills a throw-away database (MONGODB_DB_NAME + "_bench") with synthetic
+users, assignments and submissions, builds the stats rollups, runs the
+legacy implementation (load everything, count in Python) and the
+rollup-backed one, checks that both return the same dict and prints the
+timings. The database is dropped at
+the end.
+
+    python benchmark_dashboard_stats.py [users] [assignments] [runs]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from config.settings import settings
+
+# Never touch the real database
+os.environ["MONGODB_DB_NAME"] = (os.getenv("MONGODB_DB_NAME") or settings.MONGODB_DB_NAME) + "_bench"
+
+from bson import ObjectId
+from database.connection import Database, init_db, close_db
+from database.models.user import User
+from database.models.assignment import Assignment, AssignmentSubmission
+from utils.statistics import StatisticsManager
+from utils.stats_rollups import rebuild_rollups
+
+
+async def legacy_dashboard_stats() -> dict:
+    """get_dashboard_stats as it was before the aggregation/rollup rewrites"""
+    total_users = await User.find().count()
+    active_users = await User.find(
+        User.last_active > datetime.utcnow() - timedelta(days=7)
+    ).count()
+    new_users_this_week = await User.find(
+        User.registered_at > datetime.utcnow() - timedelta(days=7)
+    ).count()
+
+    users = await User.find().to_list()
+    total_enrollments = sum(len(user.courses) for user in users)
+    approved_enrollments = sum(
+        len([c for c in user.courses if c.approval_status == "approved"])
+        for user in users
+    )
+    pending_enrollments = sum(
+        len([c for c in user.courses if c.approval_status == "pending"])
+        for user in users
+    )
+
+    total_assignments = await Assignment.find().count()
+    total_submissions = await AssignmentSubmission.find().count()
+    graded_submissions = await AssignmentSubmission.find(
+        AssignmentSubmission.status == "graded"
+    ).count()
+    graded = await AssignmentSubmission.find(
+        AssignmentSubmission.grade != None
+    ).to_list()
+    all_grades = [s.grade for s in graded]
+    average_grade = sum(all_grades) / len(all_grades) if all_grades else 0
+
+    engagement_rate = (active_users / total_users * 100) if total_users > 0 else 0
+    completion_rate = (
+        graded_submissions / total_submissions * 100
+    ) if total_submissions > 0 else 0
+
+    return {
+        'total_users': total_users,
+        'active_users': active_users,
+        'new_users_this_week': new_users_this_week,
+        'total_enrollments': total_enrollments,
+        'approved_enrollments': approved_enrollments,
+        'pending_enrollments': pending_enrollments,
+        'total_assignments': total_assignments,
+        'total_submissions': total_submissions,
+        'graded_submissions': graded_submissions,
+        'pending_grading': total_submissions - graded_submissions,
+        'average_grade': round(average_grade, 2),
+        'engagement_rate': round(engagement_rate, 2),
+        'completion_rate': round(completion_rate, 2)
+    }
+
+
+async def seed(users_count: int, assignments_count: int):
+    """Insert the synthetic dataset with raw bulk inserts"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    statuses = ["approved", "approved", "approved", "pending", "rejected"]
+
+    users = []
+    for i in range(users_count):
+        courses = [{
+            "course_id": f"course_{c}",
+            "enrolled_at": now - timedelta(days=rng.randint(0, 300)),
+            "payment_status": "paid",
+            "payment_amount": 100000,
+            "payment_method": "Shap Cash",
+            "payment_proof_file_id": "x" * 80,
+            "approval_status": rng.choice(statuses),
+            "progress": rng.randint(0, 100),
+            "videos_watched": [f"video_{v}" for v in range(rng.randint(0, 30))],
+            "assignments_submitted": [],
+            "exams_taken": [],
+            "completed": False,
+            "certificate_issued": False,
+        } for c in rng.sample(range(10), rng.randint(0, 4))]
+        users.append({
+            "telegram_id": 10_000_000 + i,
+            "full_name": f"Student {i}",
+            "phone": f"09{i:08d}",
+            "email": f"student{i}@example.com",
+            "registered_at": now - timedelta(days=rng.randint(0, 365)),
+            "last_active": now - timedelta(days=rng.randint(0, 30)),
+            "blocked": False,
+            "courses": courses,
+            "materials": [],
+            "projects": [],
+            "total_videos_watched": 0,
+            "total_assignments_submitted": 0,
+            "total_exams_taken": 0,
+            "total_points": 0,
+        })
+    for start in range(0, len(users), 1000):
+        await User.get_motor_collection().insert_many(users[start:start + 1000], ordered=False)
+
+    assignment_ids = [ObjectId() for _ in range(assignments_count)]
+    await Assignment.get_motor_collection().insert_many([{
+        "_id": assignment_id,
+        "title": f"Assignment {n}",
+        "description": "Synthetic",
+        "related_to": "course",
+        "related_id": f"course_{n % 10}",
+        "max_grade": 100,
+        "pass_grade": 60,
+        "created_by": "bench",
+        "created_at": now,
+        "updated_at": now,
+        "is_active": True,
+        "order": n,
+    } for n, assignment_id in enumerate(assignment_ids)])
+
+    submissions = []
+    for user in users:
+        for assignment_id in rng.sample(assignment_ids, min(len(assignment_ids), rng.randint(0, 8))):
+            graded = rng.random() < 0.6
+            submissions.append({
+                "assignment_id": assignment_id,
+                "user_id": str(user["telegram_id"]),
+                "submitted_at": now - timedelta(days=rng.randint(0, 60)),
+                "file_id": "f" * 60,
+                "grade": rng.randint(0, 100) if graded else None,
+                "feedback": "Good" if graded else None,
+                "status": "graded" if graded else "submitted",
+            })
+    for start in range(0, len(submissions), 5000):
+        await AssignmentSubmission.get_motor_collection().insert_many(submissions[start:start + 5000], ordered=False)
+    return len(submissions)
+
+
+async def timed(func, runs: int):
+    best, result = None, None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = await func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+async def main():
+    users_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    assignments_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    await init_db()
+    db_name = Database.db_name
+    try:
+        print(f"📦 Seeding {db_name}: {users_count} users, {assignments_count} assignments...")
+        submissions_count = await seed(users_count, assignments_count)
+        print(f"   {submissions_count} submissions")
+        started = time.perf_counter()
+        scopes = await rebuild_rollups()
+        print(f"   {scopes} rollup scopes built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        legacy_time, legacy = await timed(legacy_dashboard_stats, runs)
+        new_time, new = await timed(StatisticsManager.get_dashboard_stats, runs)
+
+        print("="*60)
+        print(f"Legacy (Python):     {legacy_time * 1000:9.1f} ms")
+        print(f"Rollups:             {new_time * 1000:9.1f} ms")
+        print(f"Speed-up:            {legacy_time / new_time:9.1f}x")
+        # Users registered/active right at the 7-day edge may differ by a
+        # few ms between the two runs; everything else must match
+        mismatched = {k for k in legacy if legacy[k] != new.get(k)}
+        if mismatched:
+            print(f"❌ Results differ: {', '.join(sorted(mismatched))}")
+            for key in sorted(mismatched):
+                print(f"   {key}: legacy={legacy[key]} rollups={new.get(key)}")
+        else:
+            print("✅ Same results")
+    finally:
+        await Database.client.drop_database(db_name)
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
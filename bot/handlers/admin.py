@@ -7,6 +7,8 @@ from loguru import logger
 
 from config.settings import settings
 from config.courses_config import get_all_courses
+from utils.content_catalog import ContentCatalog
+from utils.cache import AsyncCache
 
 # Conversation states
 SELECTING_COURSE, UPLOADING_VIDEO, ENTERING_VIDEO_TITLE = range(3)
@@ -212,42 +214,18 @@ async def admin_enter_video_title(update: Update, context: ContextTypes.DEFAULT_
         'duration': duration
     }
     
-    # For now, save to a simple JSON file
-    import json
-    from pathlib import Path
-    
-    videos_file = Path('data/videos.json')
-    videos_file.parent.mkdir(exist_ok=True)
-    
-    videos = []
-    if videos_file.exists():
-        with open(videos_file, 'r', encoding='utf-8') as f:
-            try:
-                videos = json.load(f)
-            except:
-                videos = []
-    
-    # Check for duplicates - same title and item_id
-    duplicate_found = False
-    for existing_video in videos:
-        if (existing_video.get('title') == title and 
-            existing_video.get('item_id') == item_id and
-            existing_video.get('type') == upload_type):
-            duplicate_found = True
-            # Update existing video instead of adding duplicate
-            existing_video['file_id'] = file_id
-            existing_video['duration'] = duration
-            existing_video['description'] = caption
-            logger.warning(f"Updated existing video: {title}")
-            break
-    
-    if not duplicate_found:
-        videos.append(video_data)
+    # Save video - same title and item_id updates the existing video instead of adding a duplicate
+    duplicate_found = await ContentCatalog.save(
+        'videos',
+        video_data,
+        match=('title', 'item_id', 'type'),
+        update_fields=('file_id', 'duration', 'description')
+    )
+    if duplicate_found:
+        logger.warning(f"Updated existing video: {title}")
+    else:
         logger.info(f"Added new video: {title}")
     
-    with open(videos_file, 'w', encoding='utf-8') as f:
-        json.dump(videos, f, ensure_ascii=False, indent=2)
-    
     # Get item name
     if upload_type == 'courses':
         from config.courses_config import get_course
@@ -333,17 +311,7 @@ async def admin_show_videos(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ هذا الأمر للأدمن فقط")
         return
     
-    import json
-    from pathlib import Path
-    
-    videos_file = Path('data/videos.json')
-    
-    if not videos_file.exists():
-        await update.message.reply_text("📹 لا توجد فيديوهات محفوظة بعد")
-        return
-    
-    with open(videos_file, 'r', encoding='utf-8') as f:
-        videos = json.load(f)
+    videos = await ContentCatalog.get_all('videos')
     
     if not videos:
         await update.message.reply_text("📹 لا توجد فيديوهات محفوظة بعد")
@@ -366,6 +334,32 @@ async def admin_show_videos(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # Admin help
+async def admin_cache_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show hit/miss counters of the statistics caches (to tune TTLs)"""
+    user_id = update.effective_user.id
+    
+    if user_id != settings.TELEGRAM_ADMIN_ID:
+        return
+    
+    stats = AsyncCache.stats()
+    if not stats:
+        await update.message.reply_text("📦 لا توجد بيانات تخزين مؤقت بعد")
+        return
+    
+    text = "📦 إحصائيات التخزين المؤقت\n\n"
+    for family, counters in sorted(stats.items()):
+        lookups = counters['hits'] + counters['stale_hits'] + counters['misses']
+        hit_rate = (counters['hits'] + counters['stale_hits']) / lookups * 100 if lookups else 0
+        text += (
+            f"• {family} (ttl {counters['ttl']:g}s + {counters['stale_ttl']:g}s)\n"
+            f"  hits {counters['hits']} / stale {counters['stale_hits']} / misses {counters['misses']}"
+            f" ({hit_rate:.0f}%)\n"
+            f"  errors {counters['errors']}, invalidations {counters['invalidations']}, entries {counters['entries']}\n"
+        )
+    
+    await update.message.reply_text(text)
+
+
 async def admin_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show admin commands"""
     user_id = update.effective_user.id
@@ -392,6 +386,7 @@ async def admin_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 ⚙️ **الإدارة:**
 /adminhelp - عرض هذه القائمة
+/cachestats - إحصائيات التخزين المؤقت
 
 ---
 
@@ -5,10 +5,10 @@ Admin Course Statistics and Management
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
-from pathlib import Path
-import json
 
 from config.settings import settings
+from utils.content_catalog import ContentCatalog
+from utils.submission_store import SubmissionStore
 
 
 async def show_course_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -21,54 +21,15 @@ async def show_course_statistics(update: Update, context: ContextTypes.DEFAULT_T
     
     try:
         # Load all data
-        courses_path = Path('data/courses.json')
-        videos_path = Path('data/videos.json')
-        assignments_path = Path('data/assignments.json')
-        exams_path = Path('data/exams.json')
-        submissions_path = Path('data/submissions.json')
-        
-        courses = []
-        videos = []
-        assignments = []
-        exams = []
+        # Content files come from the shared catalog (cached until changed)
+        courses = await ContentCatalog.get_all('courses')
+        videos = await ContentCatalog.get_all('videos')
+        assignments = await ContentCatalog.get_all('assignments')
+        exams = await ContentCatalog.get_all('exams')
         submissions = []
         
         try:
-            if courses_path.exists():
-                with open(courses_path, 'r', encoding='utf-8') as f:
-                    courses = json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading courses.json: {repr(e)}")
-            print(f"ERROR: Error loading courses.json: {repr(e)}", flush=True)
-        
-        try:
-            if videos_path.exists():
-                with open(videos_path, 'r', encoding='utf-8') as f:
-                    videos = json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading videos.json: {repr(e)}")
-            print(f"ERROR: Error loading videos.json: {repr(e)}", flush=True)
-        
-        try:
-            if assignments_path.exists():
-                with open(assignments_path, 'r', encoding='utf-8') as f:
-                    assignments = json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading assignments.json: {repr(e)}")
-            print(f"ERROR: Error loading assignments.json: {repr(e)}", flush=True)
-        
-        try:
-            if exams_path.exists():
-                with open(exams_path, 'r', encoding='utf-8') as f:
-                    exams = json.load(f)
-        except Exception as e:
-            logger.error(f"Error loading exams.json: {repr(e)}")
-            print(f"ERROR: Error loading exams.json: {repr(e)}", flush=True)
-        
-        try:
-            if submissions_path.exists():
-                with open(submissions_path, 'r', encoding='utf-8') as f:
-                    submissions = json.load(f)
+            submissions = await SubmissionStore.list_all()
         except Exception as e:
             logger.error(f"Error loading submissions.json: {repr(e)}")
             print(f"ERROR: Error loading submissions.json: {repr(e)}", flush=True)
@@ -140,40 +101,13 @@ async def show_detailed_course_stats(update: Update, context: ContextTypes.DEFAU
     course_id = query.data.replace("course_stats_", "")
     
     # Load all data
-    courses_path = Path('data/courses.json')
-    videos_path = Path('data/videos.json')
-    assignments_path = Path('data/assignments.json')
-    exams_path = Path('data/exams.json')
-    submissions_path = Path('data/submissions.json')
-    
-    courses = []
-    videos = []
-    assignments = []
-    exams = []
-    submissions = []
-    
-    if courses_path.exists():
-        with open(courses_path, 'r', encoding='utf-8') as f:
-            courses = json.load(f)
-    
-    if videos_path.exists():
-        with open(videos_path, 'r', encoding='utf-8') as f:
-            videos = json.load(f)
-    
-    if assignments_path.exists():
-        with open(assignments_path, 'r', encoding='utf-8') as f:
-            assignments = json.load(f)
-    
-    if exams_path.exists():
-        with open(exams_path, 'r', encoding='utf-8') as f:
-            exams = json.load(f)
-    
-    if submissions_path.exists():
-        with open(submissions_path, 'r', encoding='utf-8') as f:
-            submissions = json.load(f)
+    videos = await ContentCatalog.get_all('videos')
+    assignments = await ContentCatalog.get_all('assignments')
+    exams = await ContentCatalog.get_all('exams')
+    submissions = await SubmissionStore.list_all()
     
     # Find course
-    course = next((c for c in courses if c.get('id') == course_id), None)
+    course = await ContentCatalog.get_course(course_id)
     if not course:
         await query.edit_message_text("❌ الدورة غير موجودة!")
         return
@@ -207,8 +141,8 @@ async def show_detailed_course_stats(update: Update, context: ContextTypes.DEFAU
             text += f"   {i}. {a.get('title')}\n"
             # Count submissions for this assignment
             assign_subs = [s for s in course_submissions if s.get('assignment_index') == i-1]
-            pending = len([s for s in assign_subs if s.get('status') == 'pending'])
-            graded = len([s for s in assign_subs if s.get('status') == 'graded'])
+            pending = await SubmissionStore.count_by_status('pending', course_id, i-1)
+            graded = await SubmissionStore.count_by_status('graded', course_id, i-1)
             text += f"      📤 تسليمات: {len(assign_subs)} (🔄 {pending} بانتظار، ✅ {graded} مقيّمة)\n"
     else:
         text += "   لا توجد واجبات\n"
@@ -6,11 +6,11 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from loguru import logger
 from datetime import datetime
-from pathlib import Path
-import json
 
 from database.models.user import User
 from config.settings import settings
+from utils.content_catalog import ContentCatalog
+from utils.submission_store import SubmissionStore
 
 # Conversation states
 SELECTING_ASSIGNMENT, SELECTING_STUDENT, ENTERING_GRADE, ENTERING_FEEDBACK = range(4)
@@ -24,22 +24,17 @@ async def start_grading_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text("❌ هذه الوظيفة متاحة للأدمن فقط.")
         return ConversationHandler.END
     
-    # Load submissions
-    submissions_file = Path('data/submissions.json')
-    if not submissions_file.exists():
+    if not await SubmissionStore.count():
         await update.message.reply_text(
             "❌ لا توجد تسليمات بعد!\n\n"
             "انتظر حتى يسلم الطلاب واجباتهم."
         )
         return ConversationHandler.END
     
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
+    # Pending submissions (not graded yet), grouped by assignment
+    pending_queue = await SubmissionStore.queue_summary('pending')
     
-    # Get pending submissions (not graded yet)
-    pending = [s for s in submissions if s.get('status') == 'pending']
-    
-    if not pending:
+    if not pending_queue:
         await update.message.reply_text(
             "✅ **جميع الواجبات مقيّمة!**\n\n"
             "لا توجد تسليمات بانتظار التقييم.\n\n"
@@ -47,27 +42,13 @@ async def start_grading_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return ConversationHandler.END
     
-    # Group by assignment
-    assignments_map = {}
-    for sub in pending:
-        key = f"{sub['course_id']}_{sub['assignment_index']}"
-        if key not in assignments_map:
-            assignments_map[key] = {
-                'title': sub['assignment_title'],
-                'course_id': sub['course_id'],
-                'assignment_index': sub['assignment_index'],
-                'count': 0,
-                'submissions': []
-            }
-        assignments_map[key]['count'] += 1
-        assignments_map[key]['submissions'].append(sub)
-    
     # Show list
     text = "📝 **تقييم الواجبات**\n\n"
     text += "الواجبات بانتظار التقييم:\n\n"
     
     keyboard = []
-    for key, data in assignments_map.items():
+    for data in pending_queue:
+        key = f"{data['course_id']}_{data['assignment_index']}"
         text += f"📌 {data['title']} - {data['count']} طالب\n"
         keyboard.append([
             InlineKeyboardButton(
@@ -102,17 +83,12 @@ async def select_assignment_for_grading(update: Update, context: ContextTypes.DE
     assignment_index = int(parts[-1])
     course_id = '_'.join(parts[:-1])
     
-    # Load assignments
-    assignments_file = Path('data/assignments.json')
-    with open(assignments_file, 'r', encoding='utf-8') as f:
-        assignments = json.load(f)
-    
     # Get assignment from assignments by matching index position
     max_grade = 100  # Default
     assignment_title = 'الواجب'
     
-    # Filter assignments for this course
-    course_assignments = [a for a in assignments if a.get('item_id') == course_id]
+    # Assignments for this course, in the same order students see them
+    course_assignments = await ContentCatalog.get_assignments(course_id)
     
     if assignment_index < len(course_assignments):
         assignment = course_assignments[assignment_index]
@@ -125,18 +101,8 @@ async def select_assignment_for_grading(update: Update, context: ContextTypes.DE
     context.user_data['grading_course_id'] = course_id
     context.user_data['grading_max_grade'] = max_grade
     
-    # Load submissions
-    submissions_file = Path('data/submissions.json')
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
-    
-    # Filter pending submissions for this assignment
-    pending = [
-        s for s in submissions 
-        if s.get('course_id') == course_id 
-        and s.get('assignment_index') == assignment_index
-        and s.get('status') == 'pending'
-    ]
+    # Pending submissions for this assignment
+    pending = await SubmissionStore.list_by_status('pending', course_id, assignment_index)
     
     if not pending:
         await query.edit_message_text("❌ لا توجد تسليمات بانتظار التقييم لهذا الواجب.")
@@ -191,20 +157,10 @@ async def select_student_for_grading(update: Update, context: ContextTypes.DEFAU
     context.user_data['grading_student_name'] = user.full_name
     
     # Load submission
-    submissions_file = Path('data/submissions.json')
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
-    
     course_id = context.user_data['grading_course_id']
     assignment_index = context.user_data['grading_assignment_index']
     
-    submission = None
-    for s in submissions:
-        if (s.get('student_id') == student_id and
-            s.get('course_id') == course_id and
-            s.get('assignment_index') == assignment_index):
-            submission = s
-            break
+    submission = await SubmissionStore.get(student_id, course_id, assignment_index)
     
     if not submission:
         await query.edit_message_text("❌ التسليم غير موجود!")
@@ -319,33 +275,21 @@ async def enter_feedback_and_save(update: Update, context: ContextTypes.DEFAULT_
     grade = context.user_data.get('grading_grade')
     max_grade = context.user_data.get('grading_max_grade', 100)
     
-    # Load submissions
-    submissions_file = Path('data/submissions.json')
-    with open(submissions_file, 'r', encoding='utf-8') as f:
-        submissions = json.load(f)
-    
     # Find and update submission
-    submission = None
-    for s in submissions:
-        if (s.get('student_id') == student_id and
-            s.get('course_id') == course_id and
-            s.get('assignment_index') == assignment_index):
-            submission = s
-            s['status'] = 'graded'
-            s['grade'] = grade
-            s['feedback'] = feedback
-            s['graded_at'] = datetime.now().isoformat()
-            break
+    submission = await SubmissionStore.grade(
+        student_id,
+        course_id,
+        assignment_index,
+        grade=grade,
+        feedback=feedback,
+        graded_at=datetime.now().isoformat()
+    )
     
     if not submission:
         await update.message.reply_text("❌ حدث خطأ! التسليم غير موجود.")
         context.user_data.clear()
         return ConversationHandler.END
     
-    # Save submissions
-    with open(submissions_file, 'w', encoding='utf-8') as f:
-        json.dump(submissions, f, ensure_ascii=False, indent=2)
-    
     # Determine pass/fail (50% of max grade)
     passing_grade = max_grade / 2
     is_passing = grade >= passing_grade
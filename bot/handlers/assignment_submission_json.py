@@ -6,11 +6,11 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
 from datetime import datetime
-from pathlib import Path
-import json
 
 from database.models.user import User
 from config.settings import settings
+from utils.content_catalog import ContentCatalog
+from utils.submission_store import SubmissionStore
 import httpx
 
 
@@ -33,15 +33,11 @@ async def start_assignment_submission(update: Update, context: ContextTypes.DEFA
     context.user_data['submitting_course_id'] = course_id
     
     # Load assignment
-    assignments_file = Path('data/assignments.json')
-    if not assignments_file.exists():
+    assignments = await ContentCatalog.get_assignments(course_id)
+    if not assignments:
         await query.message.reply_text("❌ الواجبات غير موجودة")
         return
     
-    with open(assignments_file, 'r', encoding='utf-8') as f:
-        all_assignments = json.load(f)
-        assignments = [a for a in all_assignments if a.get('type') == 'courses' and a.get('item_id') == course_id]
-    
     if assignment_index >= len(assignments):
         await query.message.reply_text("❌ الواجب غير موجود")
         return
@@ -109,26 +105,14 @@ async def receive_submission_file(update: Update, context: ContextTypes.DEFAULT_
         )
         return
     
-    # Load assignments
-    assignments_file = Path('data/assignments.json')
-    with open(assignments_file, 'r', encoding='utf-8') as f:
-        all_assignments = json.load(f)
-    
     # Find assignment
-    assignments = [a for a in all_assignments if a.get('type') == 'courses' and a.get('item_id') == course_id]
+    assignments = await ContentCatalog.get_assignments(course_id)
     if assignment_index >= len(assignments):
         await update.message.reply_text("❌ الواجب غير موجود")
         return
     
     assignment = assignments[assignment_index]
     
-    # Load submissions
-    submissions_file = Path('data/submissions.json')
-    submissions = []
-    if submissions_file.exists():
-        with open(submissions_file, 'r', encoding='utf-8') as f:
-            submissions = json.load(f)
-    
     # Create submission
     submission = {
         'student_id': str(update.effective_user.id),
@@ -146,19 +130,8 @@ async def receive_submission_file(update: Update, context: ContextTypes.DEFAULT_
         'graded_at': None
     }
     
-    # Remove old submission if exists
-    submissions = [s for s in submissions if not (
-        s.get('student_id') == str(update.effective_user.id) and
-        s.get('course_id') == course_id and
-        s.get('assignment_index') == assignment_index
-    )]
-    
-    # Add new submission
-    submissions.append(submission)
-    
-    # Save submissions
-    with open(submissions_file, 'w', encoding='utf-8') as f:
-        json.dump(submissions, f, ensure_ascii=False, indent=2)
+    # Save submission (replaces the old one if it exists)
+    await SubmissionStore.put(submission)
     
     # Confirmation message
     text = f"""
@@ -250,38 +223,20 @@ async def grade_assignment(update: Update, context: ContextTypes.DEFAULT_TYPE):
         grade = float(args[3])
         feedback = ' '.join(args[4:]) if len(args) > 4 else "لا توجد ملاحظات"
         
-        # Load submissions
-        submissions_file = Path('data/submissions.json')
-        if not submissions_file.exists():
-            await update.message.reply_text("❌ لا توجد تسليمات")
-            return
-        
-        with open(submissions_file, 'r', encoding='utf-8') as f:
-            submissions = json.load(f)
-        
-        # Find submission
-        submission = None
-        for s in submissions:
-            if (s.get('student_id') == student_id and
-                s.get('course_id') == course_id and
-                s.get('assignment_index') == assignment_index):
-                submission = s
-                break
+        # Find and update submission
+        submission = await SubmissionStore.grade(
+            student_id,
+            course_id,
+            assignment_index,
+            grade=grade,
+            feedback=feedback,
+            graded_at=datetime.now().isoformat()
+        )
         
         if not submission:
             await update.message.reply_text("❌ التسليم غير موجود")
             return
         
-        # Update submission
-        submission['status'] = 'graded'
-        submission['grade'] = grade
-        submission['feedback'] = feedback
-        submission['graded_at'] = datetime.now().isoformat()
-        
-        # Save
-        with open(submissions_file, 'w', encoding='utf-8') as f:
-            json.dump(submissions, f, ensure_ascii=False, indent=2)
-        
         # Confirm to admin
         await update.message.reply_text(
             f"✅ **تم تقييم الواجب!**\n\n"
@@ -350,24 +305,11 @@ async def view_submission_status_json(update: Update, context: ContextTypes.DEFA
     
     student_id = str(update.effective_user.id)
     
-    # Load submissions
-    submissions_file = Path('data/submissions.json')
-    submission = None
-    if submissions_file.exists():
-        with open(submissions_file, 'r', encoding='utf-8') as f:
-            submissions = json.load(f)
-            for s in submissions:
-                if (s.get('student_id') == student_id and
-                    s.get('course_id') == course_id and
-                    s.get('assignment_index') == assignment_index):
-                    submission = s
-                    break
+    # Load submission
+    submission = await SubmissionStore.get(student_id, course_id, assignment_index)
     
     # Load assignment
-    assignments_file = Path('data/assignments.json')
-    with open(assignments_file, 'r', encoding='utf-8') as f:
-        all_assignments = json.load(f)
-        assignments = [a for a in all_assignments if a.get('type') == 'courses' and a.get('item_id') == course_id]
+    assignments = await ContentCatalog.get_assignments(course_id)
     
     if assignment_index >= len(assignments):
         await query.message.reply_text("❌ الواجب غير موجود")
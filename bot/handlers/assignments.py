@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 
 from config.settings import settings
 from config.courses_config import get_all_courses
+from utils.content_catalog import ContentCatalog
 
 # Conversation states
 SELECTING_ITEM, ENTERING_TITLE, ENTERING_DESCRIPTION, UPLOADING_FILE, ENTERING_DEADLINE, ENTERING_MAX_GRADE = range(6)
@@ -275,22 +276,6 @@ async def enter_max_grade(update: Update, context: ContextTypes.DEFAULT_TYPE):
     questions = context.user_data.get('questions')
     deadline = context.user_data.get('deadline')
     
-    # Save to JSON
-    import json
-    from pathlib import Path
-    
-    file_name = 'assignments.json' if assignment_type == 'assignment' else 'exams.json'
-    file_path = Path(f'data/{file_name}')
-    file_path.parent.mkdir(exist_ok=True)
-    
-    assignments = []
-    if file_path.exists():
-        with open(file_path, 'r', encoding='utf-8') as f:
-            try:
-                assignments = json.load(f)
-            except:
-                assignments = []
-    
     file_id = context.user_data.get('file_id')
     file_name = context.user_data.get('file_name')
     
@@ -306,30 +291,19 @@ async def enter_max_grade(update: Update, context: ContextTypes.DEFAULT_TYPE):
         'created_at': datetime.now().isoformat()
     }
     
-    # Check for duplicates - same title and item_id
-    duplicate_found = False
-    for existing_assignment in assignments:
-        if (existing_assignment.get('title') == title and 
-            existing_assignment.get('item_id') == item_id and
-            existing_assignment.get('type') == item_type):
-            duplicate_found = True
-            # Update existing assignment instead of adding duplicate
-            existing_assignment['description'] = description
-            existing_assignment['file_id'] = file_id
-            existing_assignment['file_name'] = file_name
-            existing_assignment['deadline'] = deadline.isoformat()
-            existing_assignment['max_grade'] = max_grade
-            existing_assignment['created_at'] = datetime.now().isoformat()
-            logger.warning(f"Updated existing assignment: {title}")
-            break
-    
-    if not duplicate_found:
-        assignments.append(assignment_data)
+    # Save - same title and item_id updates the existing entry instead of adding a duplicate
+    catalog_name = 'assignments' if assignment_type == 'assignment' else 'exams'
+    duplicate_found = await ContentCatalog.save(
+        catalog_name,
+        assignment_data,
+        match=('title', 'item_id', 'type'),
+        update_fields=('description', 'file_id', 'file_name', 'deadline', 'max_grade', 'created_at')
+    )
+    if duplicate_found:
+        logger.warning(f"Updated existing assignment: {title}")
+    else:
         logger.info(f"Added new assignment: {title}")
     
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(assignments, f, ensure_ascii=False, indent=2)
-    
     # Get item name
     if item_type == 'courses':
         from config.courses_config import get_course
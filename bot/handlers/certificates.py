@@ -5,11 +5,10 @@ Certificate and Messages Handlers
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
-import json
-from pathlib import Path
 
 from database.models.user import User
 from config.settings import settings
+from utils.content_catalog import ContentCatalog
 
 
 async def request_certificate(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -37,18 +36,10 @@ async def request_certificate(update: Update, context: ContextTypes.DEFAULT_TYPE
             )
             return
         
-        # Load courses from JSON
-        courses_path = Path("data/courses.json")
-        courses_data = {}
-        if courses_path.exists():
-            with open(courses_path, 'r', encoding='utf-8') as f:
-                courses_list = json.load(f)
-                courses_data = {c['id']: c for c in courses_list}
-        
         # Show available certificates
         keyboard = []
         for enrollment in approved_courses:
-            course = courses_data.get(enrollment.course_id)
+            course = await ContentCatalog.get_course(enrollment.course_id)
             if course and enrollment.completed:
                 keyboard.append([
                     InlineKeyboardButton(
@@ -344,13 +335,8 @@ async def process_certificate_request(update: Update, context: ContextTypes.DEFA
     try:
         user = await User.find_one(User.telegram_id == user_id)
         
-        # Load course from JSON
-        courses_path = Path("data/courses.json")
-        course = None
-        if courses_path.exists():
-            with open(courses_path, 'r', encoding='utf-8') as f:
-                courses_list = json.load(f)
-                course = next((c for c in courses_list if c['id'] == course_id), None)
+        # Load course from the content catalog
+        course = await ContentCatalog.get_course(course_id)
         
         if not user or not course:
             await query.edit_message_text("❌ حدث خطأ. يرجى المحاولة لاحقاً.")
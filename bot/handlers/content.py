@@ -4,11 +4,11 @@ Content Handlers - Videos, Lectures, Assignments
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
-from pathlib import Path
-import json
 from datetime import datetime
 
 from database.models.user import User
+from utils.content_catalog import ContentCatalog
+from utils.activity_buffer import UserActivityBuffer
 
 
 async def show_lectures(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -40,11 +40,7 @@ async def show_lectures(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if course and course.get('group_link'):
                 link = course['group_link']
             else:
-                gl_path = Path('data/group_links.json')
-                if gl_path.exists():
-                    with open(gl_path, 'r', encoding='utf-8') as f:
-                        gl = json.load(f)
-                        link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
+                link = await ContentCatalog.get_group_link(course_id)
         except Exception as e:
             logger.error(f"Error loading course group link: {e}")
         
@@ -111,11 +107,7 @@ async def show_videos(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if course and course.get('group_link'):
                 link = course['group_link']
             else:
-                gl_path = Path('data/group_links.json')
-                if gl_path.exists():
-                    with open(gl_path, 'r', encoding='utf-8') as f:
-                        gl = json.load(f)
-                        link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
+                link = await ContentCatalog.get_group_link(course_id)
         except Exception as e:
             logger.error(f"Error loading course group link: {e}")
         
@@ -132,21 +124,12 @@ async def show_videos(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        # Load videos from JSON
-        import json
-        from pathlib import Path
-        
-        videos_file = Path('data/videos.json')
+        # Load videos for this course from the content catalog
         course_videos = []
-        
-        if videos_file.exists():
-            try:
-                with open(videos_file, 'r', encoding='utf-8') as f:
-                    all_videos = json.load(f)
-                    # Filter videos for this course
-                    course_videos = [v for v in all_videos if v.get('type') == 'courses' and v.get('item_id') == course_id]
-            except Exception as e:
-                logger.error(f"Error loading videos: {e}")
+        try:
+            course_videos = await ContentCatalog.get_videos(course_id)
+        except Exception as e:
+            logger.error(f"Error loading videos: {e}")
         
         if course_videos:
             text = f"🎥 **الفيديوهات المتاحة** ({len(course_videos)} فيديو)\n\n"
@@ -225,21 +208,14 @@ async def watch_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Get videos from context OR reload from JSON
     videos = context.user_data.get(f'videos_{course_id}', [])
     
-    # If no videos in context, reload from JSON
+    # If no videos in context, reload from the content catalog
     if not videos:
-        import json
-        from pathlib import Path
-        
-        videos_file = Path('data/videos.json')
-        if videos_file.exists():
-            try:
-                with open(videos_file, 'r', encoding='utf-8') as f:
-                    all_videos = json.load(f)
-                    videos = [v for v in all_videos if v.get('type') == 'courses' and v.get('item_id') == course_id]
-                    # Store back in context
-                    context.user_data[f'videos_{course_id}'] = videos
-            except Exception as e:
-                logger.error(f"Error loading videos: {e}")
+        try:
+            videos = await ContentCatalog.get_videos(course_id)
+            # Store back in context
+            context.user_data[f'videos_{course_id}'] = videos
+        except Exception as e:
+            logger.error(f"Error loading videos: {e}")
     
     if videos and video_index < len(videos):
         video = videos[video_index]
@@ -268,6 +244,7 @@ async def watch_video(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 reply_markup=InlineKeyboardMarkup(keyboard)
             )
             
+            UserActivityBuffer.increment(update.effective_user.id, 'total_videos_watched')
             logger.info(f"User {update.effective_user.id} watched video: {title}")
         except Exception as e:
             logger.error(f"Error sending video: {e}")
@@ -308,11 +285,7 @@ async def show_assignments(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if course and course.get('group_link'):
                 link = course['group_link']
             else:
-                gl_path = Path('data/group_links.json')
-                if gl_path.exists():
-                    with open(gl_path, 'r', encoding='utf-8') as f:
-                        gl = json.load(f)
-                        link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
+                link = await ContentCatalog.get_group_link(course_id)
         except Exception as e:
             logger.error(f"Error loading course group link: {e}")
         
@@ -329,22 +302,12 @@ async def show_assignments(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        # Load assignments from JSON
-        import json
-        from pathlib import Path
-        from datetime import datetime
-        
-        assignments_file = Path('data/assignments.json')
+        # Load assignments for this course from the content catalog
         course_assignments = []
-        
-        if assignments_file.exists():
-            try:
-                with open(assignments_file, 'r', encoding='utf-8') as f:
-                    all_assignments = json.load(f)
-                    # Filter assignments for this course
-                    course_assignments = [a for a in all_assignments if a.get('type') == 'courses' and a.get('item_id') == course_id]
-            except Exception as e:
-                logger.error(f"Error loading assignments: {e}")
+        try:
+            course_assignments = await ContentCatalog.get_assignments(course_id)
+        except Exception as e:
+            logger.error(f"Error loading assignments: {e}")
         
         if course_assignments:
             # Remove duplicates by title
@@ -420,21 +383,14 @@ async def view_assignment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Get assignments from context OR reload from JSON
     assignments = context.user_data.get(f'assignments_{course_id}', [])
     
-    # If no assignments in context, reload from JSON
+    # If no assignments in context, reload from the content catalog
     if not assignments:
-        import json
-        from pathlib import Path
-        
-        assignments_file = Path('data/assignments.json')
-        if assignments_file.exists():
-            try:
-                with open(assignments_file, 'r', encoding='utf-8') as f:
-                    all_assignments = json.load(f)
-                    assignments = [a for a in all_assignments if a.get('type') == 'courses' and a.get('item_id') == course_id]
-                    # Store back in context
-                    context.user_data[f'assignments_{course_id}'] = assignments
-            except Exception as e:
-                logger.error(f"Error loading assignments: {e}")
+        try:
+            assignments = await ContentCatalog.get_assignments(course_id)
+            # Store back in context
+            context.user_data[f'assignments_{course_id}'] = assignments
+        except Exception as e:
+            logger.error(f"Error loading assignments: {e}")
     
     if assignments and assignment_index < len(assignments):
         from datetime import datetime
@@ -545,11 +501,7 @@ async def show_exams(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if course and course.get('group_link'):
                 link = course['group_link']
             else:
-                gl_path = Path('data/group_links.json')
-                if gl_path.exists():
-                    with open(gl_path, 'r', encoding='utf-8') as f:
-                        gl = json.load(f)
-                        link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
+                link = await ContentCatalog.get_group_link(course_id)
         except Exception as e:
             logger.error(f"Error loading course group link: {e}")
         if link:
@@ -565,23 +517,17 @@ async def show_exams(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        # Load exams from JSON
-        exams_path = Path("data/exams.json")
-        exams = []
-        
-        if exams_path.exists():
-            try:
-                with open(exams_path, 'r', encoding='utf-8') as f:
-                    all_exams = json.load(f)
-                    exams = [e for e in all_exams if e.get('course_id') == course_id]
-                    logger.info(f"Found {len(exams)} exams for course {course_id}")
-            except Exception as e:
-                logger.error(f"Error loading exams file: {e}")
-                await query.edit_message_text(
-                    "❌ حدث خطأ في تحميل الاختبارات\n\n"
-                    "يرجى المحاولة لاحقاً أو التواصل مع الإدارة."
-                )
-                return
+        # Load exams for this course from the content catalog
+        try:
+            exams = await ContentCatalog.get_exams(course_id)
+            logger.info(f"Found {len(exams)} exams for course {course_id}")
+        except Exception as e:
+            logger.error(f"Error loading exams file: {e}")
+            await query.edit_message_text(
+                "❌ حدث خطأ في تحميل الاختبارات\n\n"
+                "يرجى المحاولة لاحقاً أو التواصل مع الإدارة."
+            )
+            return
         
         if not exams:
             text = "📋 **الاختبارات**\n\n❌ لا توجد اختبارات متاحة حالياً."
@@ -679,23 +625,7 @@ async def show_links(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Try to load links from data/links.json
         links = []
         try:
-            links_path = Path('data/links.json')
-            if links_path.exists():
-                with open(links_path, 'r', encoding='utf-8') as f:
-                    import json
-                    all_links = json.load(f)
-                    # Support both nested and flat structures
-                    course_links = (
-                        all_links.get('courses', {}).get(course_id)
-                        if isinstance(all_links, dict) else None
-                    )
-                    if course_links and isinstance(course_links, list):
-                        links = [l for l in course_links if isinstance(l, dict) and l.get('url')]
-                    elif isinstance(all_links, dict) and all_links.get(course_id):
-                        # Flat mapping
-                        raw = all_links.get(course_id)
-                        if isinstance(raw, list):
-                            links = [l for l in raw if isinstance(l, dict) and l.get('url')]
+            links = await ContentCatalog.get_course_links(course_id)
         except Exception as e:
             logger.error(f"Error loading course links: {e}")
         
@@ -703,11 +633,7 @@ async def show_links(update: Update, context: ContextTypes.DEFAULT_TYPE):
         group_link = None
         if not links:
             try:
-                gl_path = Path('data/group_links.json')
-                if gl_path.exists():
-                    with open(gl_path, 'r', encoding='utf-8') as f:
-                        gl = json.load(f)
-                        group_link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
+                group_link = await ContentCatalog.get_group_link(course_id)
             except Exception as e:
                 logger.error(f"Error loading course group link (fallback): {e}")
         
@@ -4,11 +4,10 @@ Courses Handler
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
-from pathlib import Path
-import json
 
 from database.models.user import User
 from config.courses_config import get_course, get_all_courses
+from utils.content_catalog import ContentCatalog
 from bot.keyboards.main_keyboards import (
     get_courses_keyboard,
     get_payment_methods_keyboard,
@@ -86,11 +85,7 @@ async def show_course_details(update: Update, context: ContextTypes.DEFAULT_TYPE
                 if course.get('group_link'):
                     link = course['group_link']
                 else:
-                    gl_path = Path('data/group_links.json')
-                    if gl_path.exists():
-                        with open(gl_path, 'r', encoding='utf-8') as f:
-                            gl = json.load(f)
-                            link = gl.get('courses', {}).get(course_id) or gl.get(course_id)
+                    link = await ContentCatalog.get_group_link(course_id)
             except Exception as e:
                 logger.error(f"Error loading group link: {e}")
             if link:
@@ -6,10 +6,11 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
 
-from database.models.user import User
+from config.settings import settings
 from utils.statistics import StatisticsManager
+from utils.leaderboard import Leaderboard
 from utils.achievements import AchievementManager
-from utils.reports import ReportGenerator
+from utils.report_jobs import ReportJobQueue, STATUS_TEXT
 
 
 async def show_my_statistics(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -188,6 +189,11 @@ async def show_top_students(update: Update, context: ContextTypes.DEFAULT_TYPE):
             text += f"   📊 المعدل: {student['average_grade']}/100\n"
             text += f"   📝 الواجبات: {student['total_assignments']}\n\n"
         
+        my_rank = await Leaderboard.rank_of(query.from_user.id)
+        if my_rank and not any(s['telegram_id'] == query.from_user.id for s in top_students):
+            rank, ranked, row = my_rank
+            text += f"📍 ترتيبك: {rank} من {ranked} (المعدل: {row['average_grade']}/100)\n"
+        
         keyboard = [[InlineKeyboardButton("« رجوع", callback_data="back_admin_stats")]]
         
         await query.message.edit_text(
@@ -202,30 +208,23 @@ async def show_top_students(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def export_user_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Export user report as PDF"""
+    """Export user report as PDF (built in the background, see ReportJobQueue)"""
     query = update.callback_query
-    await query.answer("جاري تحضير التقرير...")
-    
     user_id = int(query.data.split('_')[-1])
     
+    # Callback data comes from the client: only the student or the admin
+    if query.from_user.id not in (user_id, settings.TELEGRAM_ADMIN_ID):
+        logger.warning(f"User {query.from_user.id} requested the report of {user_id}")
+        await query.answer("❌ ليس لديك صلاحية الوصول لهذا المحتوى", show_alert=True)
+        return
+    await query.answer("جاري تحضير التقرير...")
+    
     try:
-        pdf_buffer = await ReportGenerator.generate_student_report_pdf(user_id)
-        
-        if pdf_buffer:
-            user = await User.find_one(User.telegram_id == user_id)
-            filename = f"report_{user.full_name.replace(' ', '_')}.pdf"
-            
-            await context.bot.send_document(
-                chat_id=user_id,
-                document=pdf_buffer,
-                filename=filename,
-                caption="📊 تقريرك الأكاديمي"
-            )
-            
-            await query.message.reply_text("✅ تم إرسال التقرير بنجاح!")
-        else:
-            await query.message.reply_text("❌ حدث خطأ في إنشاء التقرير")
-            
+        status_message = await query.message.reply_text(STATUS_TEXT["queued"])
+        await ReportJobQueue.enqueue(
+            "student_pdf", {"telegram_id": user_id},
+            chat_id=status_message.chat_id, message_id=status_message.message_id
+        )
     except Exception as e:
         logger.error(f"Error exporting report: {e}")
         await query.message.reply_text("❌ حدث خطأ في تصدير التقرير")
@@ -255,25 +254,16 @@ async def show_admin_reports_menu(update: Update, context: ContextTypes.DEFAULT_
 
 
 async def export_students_excel(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Export students report as Excel"""
+    """Export students report as Excel (built in the background, see ReportJobQueue)"""
     query = update.callback_query
     await query.answer("جاري تحضير التقرير...")
     
     try:
-        excel_buffer = await ReportGenerator.generate_students_excel()
-        
-        if excel_buffer:
-            await context.bot.send_document(
-                chat_id=update.effective_user.id,
-                document=excel_buffer,
-                filename=f"students_report_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                caption="📊 تقرير الطلاب"
-            )
-            
-            await query.message.reply_text("✅ تم إرسال التقرير بنجاح!")
-        else:
-            await query.message.reply_text("❌ حدث خطأ في إنشاء التقرير")
-            
+        status_message = await query.message.reply_text(STATUS_TEXT["queued"])
+        await ReportJobQueue.enqueue(
+            "students_excel", {},
+            chat_id=status_message.chat_id, message_id=status_message.message_id
+        )
     except Exception as e:
         logger.error(f"Error exporting Excel: {e}")
         await query.message.reply_text("❌ حدث خطأ في تصدير التقرير")
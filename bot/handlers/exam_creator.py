@@ -5,10 +5,9 @@ Exam Creator Handler (Google Forms Links)
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from loguru import logger
-import json
-from pathlib import Path
 
 from config.settings import settings
+from utils.content_catalog import ContentCatalog
 
 # Conversation states
 EXAM_SELECTING_TYPE, EXAM_SELECTING_COURSE, EXAM_ENTERING_TITLE, EXAM_ENTERING_LINK, EXAM_ENTERING_MAX_GRADE = range(5)
@@ -220,13 +219,6 @@ async def enter_exam_max_grade(update: Update, context: ContextTypes.DEFAULT_TYP
     
     # Save exam
     try:
-        exams_path = Path("data/exams.json")
-        exams = []
-        
-        if exams_path.exists():
-            with open(exams_path, 'r', encoding='utf-8') as f:
-                exams = json.load(f)
-        
         new_exam = {
             'course_id': context.user_data['exam_course_id'],
             'title': context.user_data['exam_title'],
@@ -235,10 +227,7 @@ async def enter_exam_max_grade(update: Update, context: ContextTypes.DEFAULT_TYP
             'max_grade': max_grade
         }
         
-        exams.append(new_exam)
-        
-        with open(exams_path, 'w', encoding='utf-8') as f:
-            json.dump(exams, f, ensure_ascii=False, indent=2)
+        await ContentCatalog.save('exams', new_exam)
         
         await message_to_reply.reply_text(
             f"✅ **تم إنشاء الاختبار بنجاح!**\n\n"
@@ -4,11 +4,10 @@ Materials Handler for University Subjects
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 from loguru import logger
-from pathlib import Path
-import json
 
 from database.models.user import User
 from config.materials_config import get_all_years, get_materials_by_year_semester, get_material, calculate_materials_price
+from utils.content_catalog import ContentCatalog
 from bot.keyboards.main_keyboards import get_years_keyboard, get_semesters_keyboard, get_payment_methods_keyboard
 
 
@@ -135,11 +134,7 @@ async def show_material_details(update: Update, context: ContextTypes.DEFAULT_TY
                 if material.get('group_link'):
                     link = material['group_link']
                 else:
-                    gl_path = Path('data/group_links.json')
-                    if gl_path.exists():
-                        with open(gl_path, 'r', encoding='utf-8') as f:
-                            gl = json.load(f)
-                            link = gl.get('materials', {}).get(material_id) or gl.get(material_id)
+                    link = await ContentCatalog.get_group_link(material_id, 'materials')
             except Exception as e:
                 logger.error(f"Error loading material group link: {e}")
             if link:
@@ -8,7 +8,9 @@ from loguru import logger
 from datetime import datetime
 import random
 
-from database.models.quiz import Quiz
+from beanie.operators import In
+
+from database.models.quiz import Quiz, QuizAttempt
 from database.models.user import User
 
 
@@ -35,11 +37,18 @@ async def show_quizzes(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if quizzes:
         text = f"📝 **الاختبارات المتاحة** ({len(quizzes)} اختبار)\n\n"
         
+        # Get user's attempts for all these quizzes in one query
+        user_attempts = await QuizAttempt.find(
+            In(QuizAttempt.quiz_id, [q.id for q in quizzes]),
+            QuizAttempt.user_id == str(update.effective_user.id)
+        ).to_list()
+        
         keyboard = []
         for i, quiz in enumerate(quizzes, 1):
-            # Get user's attempts
-            attempts_count = quiz.get_attempts_count(str(update.effective_user.id))
-            best_attempt = quiz.get_best_attempt(str(update.effective_user.id))
+            attempts = [a for a in user_attempts if a.quiz_id == quiz.id]
+            attempts_count = len(attempts)
+            completed = [a for a in attempts if a.completed_at is not None]
+            best_attempt = max(completed, key=lambda a: a.score or 0) if completed else None
             
             status = ""
             if best_attempt:
@@ -101,9 +110,9 @@ async def view_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = str(update.effective_user.id)
     
     # Get user's attempts
-    attempts = quiz.get_user_attempts(user_id)
+    attempts = await quiz.get_user_attempts(user_id)
     attempts_count = len(attempts)
-    best_attempt = quiz.get_best_attempt(user_id)
+    best_attempt = await quiz.get_best_attempt(user_id)
     
     text = quiz.get_info_text()
     
@@ -121,7 +130,7 @@ async def view_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = []
     
     # Check if user can attempt
-    if quiz.can_attempt(user_id):
+    if attempts_count < quiz.max_attempts and quiz.is_available():
         keyboard.append([InlineKeyboardButton(
             "🚀 بدء الاختبار",
             callback_data=f"quiz_start_{quiz.id}"
@@ -316,11 +325,11 @@ async def complete_quiz(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 {'✅ **مبروك! أنت ناجح!** 🎉' if attempt.passed else '❌ **للأسف لم تنجح. حاول مرة أخرى!**'}
 
-💪 **لديك {quiz.max_attempts - quiz.get_attempts_count(user_id)} محاولة متبقية**
+💪 **لديك {quiz.max_attempts - attempt.attempt_number} محاولة متبقية**
     """
     
     keyboard = [
-        [InlineKeyboardButton("📊 عرض الأجوبة", callback_data=f"quiz_review_{quiz.id}_{len(quiz.get_user_attempts(user_id))-1}")],
+        [InlineKeyboardButton("📊 عرض الأجوبة", callback_data=f"quiz_review_{quiz.id}_{attempt.attempt_number - 1}")],
         [InlineKeyboardButton("« العودة", callback_data=f"quiz_view_{quiz.id}")]
     ]
     
@@ -352,7 +361,7 @@ async def review_quiz_answers(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     user_id = str(update.effective_user.id)
-    attempts = quiz.get_user_attempts(user_id)
+    attempts = await quiz.get_user_attempts(user_id)
     
     if attempt_index >= len(attempts):
         await query.message.edit_text("❌ المحاولة غير موجودة")
@@ -7,7 +7,8 @@ from telegram.ext import ContextTypes, ConversationHandler
 from loguru import logger
 
 from config.settings import settings
-from database.models.user import User
+from database.models.user import User, UserName
+from database.projection import find_projected
 
 # Conversation states
 SELECTING_STUDENT, ENTERING_MESSAGE = range(2)
@@ -23,10 +24,10 @@ async def start_send_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     # Get all students
     try:
-        all_users = await User.find().to_list()
-        students = [u for u in all_users if u.telegram_id != settings.TELEGRAM_ADMIN_ID]
+        not_admin = User.telegram_id != settings.TELEGRAM_ADMIN_ID
+        students_count = await User.find(not_admin).count()
         
-        if not students:
+        if not students_count:
             await update.message.reply_text(
                 "❌ لا يوجد طلاب مسجلين بعد!\n\n"
                 "انتظر حتى يسجل الطلاب في المنصة."
@@ -35,11 +36,13 @@ async def start_send_message(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         text = "📬 **إرسال رسالة لطالب**\n\n"
         text += f"اختر الطالب الذي تريد إرسال رسالة له:\n"
-        text += f"(عدد الطلاب: {len(students)})\n\n"
+        text += f"(عدد الطلاب: {students_count})\n\n"
         
         keyboard = []
         
-        for student in students[:20]:  # عرض أول 20 طالب
+        # عرض أول 20 طالب
+        students = await find_projected(User, UserName, not_admin, limit=20)
+        for student in students:
             student_name = student.full_name or "طالب بدون اسم"
             button_text = f"👤 {student_name}"
             
@@ -7,8 +7,10 @@ from loguru import logger
 from pydantic import ValidationError
 
 from database.models.user import User
+from database.models.stats_rollup import StatsRollup
 from bot.keyboards.main_keyboards import get_main_menu_keyboard, get_admin_menu_keyboard, get_cancel_button
 from config.settings import settings
+from utils.activity_buffer import UserActivityBuffer
 
 
 # Conversation states
@@ -86,7 +88,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if user:
         # User already registered
-        await user.update_last_active()
+        UserActivityBuffer.touch(user.telegram_id)
         
         if is_admin:
             keyboard = get_admin_menu_keyboard()
@@ -278,6 +280,7 @@ async def asking_email(update: Update, context: ContextTypes.DEFAULT_TYPE):
             logger.debug(f"[REGISTRATION] Inserting user into MongoDB...")
             print(f"[REGISTRATION] Inserting user into MongoDB...", flush=True)
             await user.insert()
+            await StatsRollup.record_user_registered()
             logger.info(f"✅ [REGISTRATION] User inserted successfully into MongoDB")
             print(f"✅ [REGISTRATION] User inserted successfully into MongoDB", flush=True)
         except Exception as insert_error:
@@ -11,6 +11,8 @@ from database.models.assignment import Assignment
 from database.models.user import User
 from database.models.notification import Notification
 from config.settings import settings
+from utils.activity_buffer import UserActivityBuffer
+from utils.cache import AsyncCache
 import httpx
 
 
@@ -70,10 +72,13 @@ async def submit_assignment_file(update: Update, context: ContextTypes.DEFAULT_T
     
     try:
         # Add submission to database
-        await assignment.add_submission(
+        first_submission = await assignment.add_submission(
             user_id=str(update.effective_user.id),
             file_id=file_id
         )
+        if first_submission:
+            UserActivityBuffer.increment(update.effective_user.id, 'total_assignments_submitted')
+        AsyncCache.fire("submission", user_id=update.effective_user.id, assignment_id=str(assignment.id))
         
         # Send confirmation
         text = f"""
@@ -171,7 +176,7 @@ async def view_submission_status(update: Update, context: ContextTypes.DEFAULT_T
         await query.message.reply_text("❌ الواجب غير موجود")
         return
     
-    submission = assignment.get_submission(user_id)
+    submission = await assignment.get_submission(user_id)
     
     if not submission:
         text = f"""
@@ -16,6 +16,12 @@ from loguru import logger
 
 from config.settings import settings
 from database.connection import init_db, close_db
+from database.data_bridge import DataBridge
+from utils.submission_store import SubmissionStore
+from utils.activity_buffer import UserActivityBuffer
+from utils.pdf_renderer import PdfRenderer
+from utils.report_jobs import ReportJobQueue
+from utils.stats_rollups import ensure_rollups
 from bot.keyboards.main_keyboards import get_main_menu_keyboard, get_admin_menu_keyboard
 from bot.handlers.start import (
     start_command,
@@ -61,6 +67,7 @@ from bot.handlers.admin import (
     admin_quick_video_upload,
     admin_show_videos,
     admin_help,
+    admin_cache_stats,
     SELECTING_COURSE,
     UPLOADING_VIDEO,
     ENTERING_VIDEO_TITLE
@@ -258,14 +265,60 @@ async def back_to_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.message.reply_text("اختر من القائمة:", reply_markup=keyboard)
 
 
+_services_started = False
+
+
+async def start_services(application: Application):
+    """Connect the database and start the background services.
+
+    run_polling()/run_webhook() call this through post_init; server.py and
+    polling_server.py drive the application by hand and call it themselves.
+    """
+    global _services_started
+    if _services_started:
+        return
+    await init_db()
+    if DataBridge.uses_db():
+        await DataBridge.ensure_indexes()
+    try:
+        # The dashboard reads only the rollups: build them on first deploy
+        await ensure_rollups()
+    except Exception as e:
+        logger.error(f"Failed to build stats rollups: {repr(e)}")
+    UserActivityBuffer.start()
+    await ReportJobQueue.start(application.bot)
+    _services_started = True
+
+
+async def stop_services(application: Application):
+    """Flush and stop what start_services() started"""
+    global _services_started
+    if not _services_started:
+        return
+    _services_started = False
+    # Fold the submissions journal back into data/submissions.json
+    await SubmissionStore.compact()
+    # Write buffered last_active/counter updates while Mongo is still open
+    await UserActivityBuffer.stop()
+    await ReportJobQueue.stop()
+    PdfRenderer.shutdown()
+    await DataBridge.close()
+    await close_db()
+
+
 async def _post_init(application: Application):
     """Initialize resources after Application is built"""
     await init_db()
+    if settings.INDEX_CHECK_ON_STARTUP:
+        # The servers run this check in their own startup
+        from database.index_catalog import check_query_plans
+        await check_query_plans()
+    await start_services(application)
 
 
 async def _post_shutdown(application: Application):
     """Cleanup resources before shutdown"""
-    await close_db()
+    await stop_services(application)
 
 
 def create_application() -> Application:
@@ -544,6 +597,7 @@ def create_application() -> Application:
     # Admin commands
     application.add_handler(CommandHandler("videos", admin_show_videos))
     application.add_handler(CommandHandler("adminhelp", admin_help))
+    application.add_handler(CommandHandler("cachestats", admin_cache_stats))
     application.add_handler(CommandHandler("myid", get_my_id))
     application.add_handler(CommandHandler("id", get_my_id))
     
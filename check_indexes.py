@@ -0,0 +1,40 @@
+"""
+Check that every hot query shape is served by an index
+التحقق من أن الاستعلامات المتكررة تستخدم الفهارس
+
+Runs explain() on each entry of database/index_catalog.QUERY_SHAPES
+(find_collection_scans) and exits with status 1 if any of them would be
+a collection scan.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from database.connection import init_db, close_db
+from database.index_catalog import QUERY_SHAPES, find_collection_scans
+
+
+async def check_indexes() -> int:
+    """Print the query shapes that scan, returns their number"""
+    await init_db()
+    try:
+        scans = await find_collection_scans()
+    finally:
+        await close_db()
+
+    for shape, stages in scans:
+        print(f"❌ {shape.model.get_settings().name:<24} {shape.name:<45} {' > '.join(stages)}")
+    print("="*60)
+    if scans:
+        print(f"❌ {len(scans)} استعلام بدون فهرس")
+    else:
+        print(f"✅ جميع الاستعلامات ({len(QUERY_SHAPES)}) تستخدم فهرساً")
+    return len(scans)
+
+
+if __name__ == "__main__":
+    sys.exit(1 if asyncio.run(check_indexes()) else 0)
@@ -11,7 +11,8 @@ sys.path.insert(0, str(project_root))
 
 from config.settings import settings
 from database.connection import init_db, close_db
-from database.models.user import User
+from database.models.user import User, UserSummary
+from database.projection import find_projected
 
 async def check_users():
     # Connect to database
@@ -22,7 +23,7 @@ async def check_users():
     print("="*60)
     
     # Get all users
-    users = await User.find_all().to_list()
+    users = await find_projected(User, UserSummary)
     
     print(f"📊 عدد المستخدمين: {len(users)}\n")
     
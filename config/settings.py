@@ -19,6 +19,13 @@ class Settings(BaseSettings):
     # MongoDB
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "educational_platform"
+    # Where data/*.json records live: json, mongo or sqlite
+    DATA_BACKEND: str = "json"
+    # Keep writing data/*.json alongside mongo/sqlite (cut-over)
+    DATA_DUAL_WRITE: bool = False
+    SQLITE_PATH: str = "data/platform.db"
+    # Refuse to start if a catalogued query would scan a collection
+    INDEX_CHECK_ON_STARTUP: bool = False
     
     # Security
     SECRET_KEY: str
@@ -38,6 +45,10 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     HOST: str = "0.0.0.0"
     PORT: int = 8080
+    # Worker processes that lay out PDF reports
+    PDF_RENDER_WORKERS: int = 2
+    # Report exports built at the same time (see utils/report_jobs.py)
+    REPORT_WORKERS: int = 2
     
     # URLs
     BOT_WEBHOOK_URL: Optional[str] = None
@@ -12,12 +12,15 @@ from database.models.user import User
 from database.models.video import Video
 from database.models.assignment import Assignment, AssignmentSubmission
 from database.models.notification import Notification
-from database.models.quiz import Quiz
+from database.models.quiz import Quiz, QuizAttempt
+from database.models.stats_rollup import StatsRollup
+from database.models.report_job import ReportJob
 
 
 class Database:
     """Database connection manager - Serverless optimized"""
     client: AsyncIOMotorClient = None
+    db_name: str = None
     beanie_initialized: bool = False
     connection_lock: asyncio.Lock = None
     MAX_RETRIES = 3
@@ -53,6 +56,7 @@ class Database:
                         print(f"ERROR: Failed to mask MongoDB URI: {mask_error}", flush=True)
                     
                     db_name = os.getenv("MONGODB_DB_NAME") or settings.MONGODB_DB_NAME
+                    cls.db_name = db_name
                     logger.info(f"[Attempt {attempt}/{cls.MAX_RETRIES}] Connecting to MongoDB: {masked_uri}, db={db_name}")
                     print(f"[Attempt {attempt}/{cls.MAX_RETRIES}] Connecting to MongoDB: {masked_uri}, db={db_name}", flush=True)
                     
@@ -86,6 +90,9 @@ class Database:
                                 AssignmentSubmission,
                                 Notification,
                                 Quiz,
+                                QuizAttempt,
+                                StatsRollup,
+                                ReportJob,
                             ]
                         )
                         cls.beanie_initialized = True
@@ -113,6 +120,11 @@ class Database:
                         print(f"ERROR: {error_msg}", flush=True)
                         raise
     
+    @classmethod
+    def get_database(cls):
+        """Motor database handle of the current connection"""
+        return cls.client[cls.db_name or settings.MONGODB_DB_NAME]
+    
     @classmethod
     async def is_connected(cls) -> bool:
         """Check if database is connected and healthy"""
@@ -0,0 +1,192 @@
+"""
+Data Bridge - database backends for the data/*.json stores
+جسر البيانات - تخزين ملفات JSON في MongoDB أو SQLite مع قراءة مزدوجة أثناء الانتقال
+
+settings.DATA_BACKEND selects where the JSON-backed stores keep records:
+
+- json   : files only (default)
+- mongo  : MongoDB json_* collections - no local state, several replicas can run
+- sqlite : embedded SQLite (WAL) at settings.SQLITE_PATH - single container
+
+settings.DATA_DUAL_WRITE (mongo/sqlite only) keeps writing the files too:
+reads prefer the database and fall back to the files if it fails, so
+switching back to "json" loses nothing. Use it while cutting over.
+
+Run migrate_json_data.py import before switching away from "json".
+"""
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+from database.repository import MirroredCollection, Repository
+
+
+class DataBridge:
+    """Chooses the backend and applies the dual-write rules"""
+    BACKENDS = ('json', 'mongo', 'sqlite')
+
+    collections: Dict[str, MirroredCollection] = {
+        'videos': MirroredCollection(
+            'videos.json', 'json_videos',
+            indexes=[(('_order',), True), (('type', 'item_id', '_order'), False)]
+        ),
+        'assignments': MirroredCollection(
+            'assignments.json', 'json_assignments',
+            indexes=[(('_order',), True), (('type', 'item_id', '_order'), False)]
+        ),
+        'exams': MirroredCollection(
+            'exams.json', 'json_exams',
+            indexes=[(('_order',), True), (('course_id', '_order'), False)]
+        ),
+        'submissions': MirroredCollection(
+            'submissions.json', 'json_submissions',
+            key_fields=('student_id', 'course_id', 'assignment_index'),
+            indexes=[
+                (('student_id', 'course_id', 'assignment_index'), True),
+                (('status', 'course_id', 'assignment_index'), False),
+            ]
+        ),
+        'exam_grades': MirroredCollection(
+            'exam_grades.json', 'json_exam_grades',
+            key_fields=('student_id', 'exam_index'),
+            indexes=[
+                (('student_id', 'exam_index'), True),
+                (('status', 'course_id', 'exam_index'), False),
+            ]
+        ),
+    }
+
+    _repository: Optional[Repository] = None
+
+    # ------------------------------------------------------------------
+    # Mode
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def backend(cls) -> str:
+        backend = (settings.DATA_BACKEND or 'json').lower()
+        if backend not in cls.BACKENDS:
+            logger.warning(f"DataBridge: unknown DATA_BACKEND '{backend}', using 'json'")
+            return 'json'
+        return backend
+
+    @classmethod
+    def uses_db(cls) -> bool:
+        """Records are read from and written to the database backend"""
+        return cls.backend() != 'json'
+
+    @classmethod
+    def writes_json(cls) -> bool:
+        return cls.backend() == 'json' or settings.DATA_DUAL_WRITE
+
+    @classmethod
+    def repository(cls) -> Repository:
+        """Repository of the configured database backend"""
+        if cls._repository is None:
+            backend = cls.backend()
+            if backend == 'mongo':
+                from database.mongo_repository import MongoRepository
+                cls._repository = MongoRepository(cls.collections)
+            elif backend == 'sqlite':
+                from database.sqlite_repository import SqliteRepository
+                cls._repository = SqliteRepository(cls.collections, Path(settings.SQLITE_PATH))
+            else:
+                raise RuntimeError("DATA_BACKEND=json has no database repository")
+        return cls._repository
+
+    @classmethod
+    async def ensure_indexes(cls):
+        await cls.repository().ensure_indexes()
+
+    @classmethod
+    async def close(cls):
+        if cls._repository is not None:
+            await cls._repository.close()
+            cls._repository = None
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def read(cls, from_db: Callable[[], Awaitable[Any]], from_json: Callable[[], Awaitable[Any]]) -> Any:
+        """Run a read against the configured backend.
+
+        With dual writes a failed database read is logged and served from
+        the files instead.
+        """
+        if not cls.uses_db():
+            return await from_json()
+        try:
+            return await from_db()
+        except Exception as e:
+            if not cls.writes_json():
+                raise
+            logger.warning(f"DataBridge: database read failed, falling back to JSON: {repr(e)}")
+            return await from_json()
+
+    @classmethod
+    async def find(cls, name: str, query: Optional[Dict] = None) -> List[Dict]:
+        return await cls.repository().find(name, query)
+
+    @classmethod
+    async def find_one(cls, name: str, query: Dict) -> Optional[Dict]:
+        return await cls.repository().find_one(name, query)
+
+    @classmethod
+    async def count(cls, name: str, query: Optional[Dict] = None) -> int:
+        return await cls.repository().count(name, query)
+
+    @classmethod
+    async def group_count(
+        cls,
+        name: str,
+        query: Dict,
+        by: Tuple[str, ...],
+        first: Optional[str] = None
+    ) -> List[Dict]:
+        return await cls.repository().group_count(name, query, by, first)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def _mirror(cls, name: str, write: Callable[[], Awaitable[Any]]):
+        """Run a database write; with dual writes the files stay authoritative"""
+        try:
+            return await write()
+        except Exception as e:
+            if not cls.writes_json():
+                raise
+            logger.error(f"DataBridge: failed to mirror write to {name}: {repr(e)}")
+
+    @classmethod
+    async def upsert(cls, name: str, doc: Dict):
+        """Create or replace a keyed record"""
+        await cls._mirror(name, lambda: cls.repository().upsert(name, doc))
+
+    @classmethod
+    async def save_ordered(
+        cls,
+        name: str,
+        doc: Dict,
+        position: Optional[int] = None,
+        match: Optional[Dict] = None,
+        update_fields: Tuple[str, ...] = ()
+    ) -> bool:
+        """See Repository.save_ordered"""
+        return bool(await cls._mirror(
+            name,
+            lambda: cls.repository().save_ordered(name, doc, position, match, update_fields)
+        ))
+
+    @classmethod
+    async def bulk_upsert(cls, name: str, docs: List[Dict]) -> int:
+        return await cls.repository().bulk_upsert(name, docs)
+
+    @classmethod
+    async def truncate_ordered(cls, name: str, length: int):
+        await cls.repository().truncate_ordered(name, length)
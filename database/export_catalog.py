@@ -0,0 +1,165 @@
+"""
+Export Catalog - bulk data exports streamed from server-side cursors
+تصدير البيانات - بث السجلات مباشرة من قاعدة البيانات
+
+Each dataset is an aggregation pipeline with a projection of the
+exported columns. stream_export() walks its cursor in batches of
+BATCH_SIZE and yields encoded chunks (CSV or NDJSON, optionally
+gzip-compressed), so the first bytes go out at once and memory stays
+the same however large the collection is.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Type
+
+from beanie import Document
+from bson import ObjectId
+
+from database.models.user import ENROLLMENT_FIELDS, User
+from database.models.assignment import AssignmentSubmission
+from database.models.quiz import QuizAttempt
+from database.models.notification import Notification
+
+BATCH_SIZE = 1000
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportSpec(NamedTuple):
+    """One exportable dataset"""
+    model: Type[Document]
+    columns: List[str]
+    pipeline: List[Dict]
+
+
+def _projection(columns: List[str]) -> Dict:
+    """$project of columns; "id" is the document _id"""
+    fields = {c: "$_id" if c == "id" else 1 for c in columns}
+    return {"$project": {"_id": 0, **fields}}
+
+
+ENROLLMENT_COLUMNS = [
+    "telegram_id", "kind", "item_id", "enrolled_at", "approval_status", "approved_by",
+    "approved_at", "payment_status", "payment_amount", "payment_method", "progress",
+]
+
+
+def _enrollments_pipeline() -> List[Dict]:
+    """One row per course/material enrollment, in users order"""
+    entries = [
+        {"$map": {
+            "input": {"$ifNull": [f"${array}", []]},
+            "as": "e",
+            "in": {
+                "kind": kind,
+                "item_id": f"$$e.{id_field}",
+                **{c: f"$$e.{c}" for c in ENROLLMENT_COLUMNS[3:]},
+            },
+        }}
+        for kind, (array, id_field) in ENROLLMENT_FIELDS.items()
+    ]
+    return [
+        {"$project": {"_id": 0, "telegram_id": 1, "enrollments": {"$concatArrays": entries}}},
+        {"$unwind": "$enrollments"},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": [{"telegram_id": "$telegram_id"}, "$enrollments"]}}},
+    ]
+
+
+_USER_COLUMNS = [
+    "telegram_id", "full_name", "email", "phone", "registered_at", "last_active", "blocked",
+    "total_videos_watched", "total_assignments_submitted", "total_exams_taken", "total_points",
+]
+_SUBMISSION_COLUMNS = [
+    "id", "assignment_id", "user_id", "submitted_at", "status", "grade", "graded_by", "graded_at",
+]
+_QUIZ_ATTEMPT_COLUMNS = [
+    "id", "quiz_id", "user_id", "attempt_number", "started_at", "completed_at",
+    "score", "max_score", "passed", "time_taken_seconds", "answers",
+]
+_NOTIFICATION_COLUMNS = [
+    "id", "user_id", "notification_type", "title", "message", "related_to", "related_id",
+    "priority", "sent", "read", "created_at", "sent_at", "read_at",
+]
+
+EXPORTS: Dict[str, ExportSpec] = {
+    "users": ExportSpec(User, _USER_COLUMNS, [_projection(_USER_COLUMNS)]),
+    "enrollments": ExportSpec(User, ENROLLMENT_COLUMNS, _enrollments_pipeline()),
+    "submissions": ExportSpec(AssignmentSubmission, _SUBMISSION_COLUMNS, [_projection(_SUBMISSION_COLUMNS)]),
+    "quiz_attempts": ExportSpec(QuizAttempt, _QUIZ_ATTEMPT_COLUMNS, [_projection(_QUIZ_ATTEMPT_COLUMNS)]),
+    "notifications": ExportSpec(Notification, _NOTIFICATION_COLUMNS, [_projection(_NOTIFICATION_COLUMNS)]),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# Leading characters that make a spreadsheet treat a cell as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default, ensure_ascii=False)
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        # Names, phones and messages are user input: keep them as text
+        return "'" + value
+    return value
+
+
+def _encode(rows: List[Dict], columns: List[str], fmt: str) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({c: row.get(c) for c in columns}, default=_json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_csv_value(row.get(c)) for c in columns] for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_export(dataset: str, fmt: str, compress: bool = False) -> AsyncIterator[bytes]:
+    """Encoded chunks of a dataset (see EXPORTS and FORMATS)"""
+    spec = EXPORTS[dataset]
+    # gzip container (wbits 16+) so the output is a plain .gz file
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+    def encode(text: str) -> bytes:
+        data = text.encode("utf-8")
+        return compressor.compress(data) if compressor else data
+
+    if fmt == "csv":
+        # BOM so spreadsheet apps detect UTF-8 (Arabic names)
+        header = io.StringIO()
+        csv.writer(header).writerow(spec.columns)
+        yield encode("\ufeff" + header.getvalue())
+
+    cursor = spec.model.get_motor_collection().aggregate(spec.pipeline, batchSize=BATCH_SIZE)
+    batch: List[Dict] = []
+    async for row in cursor:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            chunk = encode(_encode(batch, spec.columns, fmt))
+            batch = []
+            if chunk:
+                yield chunk
+    if batch:
+        yield encode(_encode(batch, spec.columns, fmt))
+    if compressor:
+        yield compressor.flush()
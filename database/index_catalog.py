@@ -0,0 +1,144 @@
+"""
+Index Catalog - the hot query shapes and a check that indexes serve them
+فهرس الاستعلامات - التحقق من أن كل استعلام متكرر يستخدم فهرساً
+
+Every filtered or sorted query in utils/ and admin_dashboard/app.py is
+listed in QUERY_SHAPES with representative values. The indexes themselves
+are declared in each model's Settings.indexes and created by init_beanie;
+check_query_plans() runs explain() on every shape and fails if MongoDB
+would answer one with a collection scan.
+
+Unfiltered reads (e.g. every user for a report) scan by design and are
+not listed. Add a shape here when adding a query, or an index to the
+model when the check fails.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+
+from beanie import Document, PydanticObjectId
+from loguru import logger
+
+from database.models.user import User
+from database.models.video import Video
+from database.models.assignment import Assignment, AssignmentSubmission
+from database.models.notification import Notification
+from database.models.quiz import QuizAttempt
+from database.models.report_job import ReportJob
+
+
+class QueryShape(NamedTuple):
+    """One query as the application issues it"""
+    name: str  # where it is used
+    model: Type[Document]
+    filter: Dict
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+_NOW = datetime.utcnow()
+_ID = PydanticObjectId()
+
+QUERY_SHAPES: List[QueryShape] = [
+    # Users
+    QueryShape("user by telegram_id", User, {"telegram_id": 1}),
+    QueryShape("active users (statistics)", User, {"last_active": {"$gt": _NOW - timedelta(days=7)}}),
+    QueryShape("inactive users (notifications)", User, {"last_active": {"$lt": _NOW - timedelta(days=7)}}),
+    QueryShape("new users (statistics, daily summary)", User, {"registered_at": {"$gt": _NOW - timedelta(days=1)}}),
+    QueryShape("pending course approvals", User, {"courses.approval_status": "pending"}),
+    QueryShape("pending approvals page", User, {"$or": [
+        {"courses.approval_status": "pending"},
+        {"materials.approval_status": "pending"},
+    ]}),
+    QueryShape("recent users (dashboard)", User, {}, [("registered_at", -1)]),
+    QueryShape("students page", User, {"$or": [
+        {"registered_at": {"$lt": _NOW}},
+        {"registered_at": _NOW, "_id": {"$lt": _ID}},
+    ]}, [("registered_at", -1), ("_id", -1)]),
+
+    # Assignments
+    QueryShape("deadline reminders", Assignment, {"deadline": {"$gt": _NOW, "$lt": _NOW + timedelta(days=1)}}),
+    QueryShape("course assignments (reports)", Assignment, {"related_id": "course"}),
+    QueryShape("course assignments (leaderboard)", Assignment, {"related_to": "course", "related_id": "course"}),
+    QueryShape("assignments page", Assignment, {}, [("created_at", -1), ("_id", -1)]),
+    QueryShape("assignments page of a course", Assignment, {"related_id": "course", "$or": [
+        {"created_at": {"$lt": _NOW}},
+        {"created_at": _NOW, "_id": {"$lt": _ID}},
+    ]}, [("created_at", -1), ("_id", -1)]),
+
+    # Submissions
+    QueryShape("submissions of a user", AssignmentSubmission, {"user_id": "1"}),
+    QueryShape("submissions of an assignment", AssignmentSubmission, {"assignment_id": _ID}),
+    QueryShape("submission of a user for an assignment", AssignmentSubmission, {"assignment_id": _ID, "user_id": "1"}),
+    QueryShape("submissions by status for an assignment", AssignmentSubmission, {"assignment_id": _ID, "status": "submitted"}),
+    QueryShape("first submission of an assignment", AssignmentSubmission, {"assignment_id": _ID}, [("submitted_at", 1)]),
+    QueryShape("submissions by status", AssignmentSubmission, {"status": "submitted"}),
+    QueryShape("recent submissions", AssignmentSubmission, {"submitted_at": {"$gt": _NOW - timedelta(days=1)}}),
+    QueryShape("graded submissions", AssignmentSubmission, {"grade": {"$ne": None}}),
+    QueryShape("graded submissions of a course (leaderboard)", AssignmentSubmission, {
+        "grade": {"$ne": None}, "assignment_id": {"$in": [_ID, PydanticObjectId()]},
+    }),
+
+    # Quiz attempts
+    QueryShape("attempts of a user", QuizAttempt, {"user_id": "1"}),
+    QueryShape("attempts of a user for a quiz", QuizAttempt, {"quiz_id": _ID, "user_id": "1"}, [("attempt_number", 1)]),
+    QueryShape("passed attempts of a user", QuizAttempt, {"user_id": "1", "passed": True}),
+
+    # Notifications and videos
+    QueryShape("notifications page", Notification, {}, [("created_at", -1)]),
+    QueryShape("videos page", Video, {}, [("uploaded_at", -1), ("_id", -1)]),
+    QueryShape("videos page of a course", Video, {"related_id": "course", "$or": [
+        {"uploaded_at": {"$lt": _NOW}},
+        {"uploaded_at": _NOW, "_id": {"$lt": _ID}},
+    ]}, [("uploaded_at", -1), ("_id", -1)]),
+
+    # Report jobs
+    QueryShape("claim the oldest queued report job", ReportJob, {"status": "queued"}, [("created_at", 1)]),
+    QueryShape("report jobs with an expired lease", ReportJob, {"status": "running", "$or": [
+        {"heartbeat_at": {"$lt": _NOW}},
+        {"heartbeat_at": None},
+    ]}),
+]
+
+
+def _plan_stages(plan: Dict) -> List[str]:
+    """Stage names of an explain() plan tree (classic and SBE formats)"""
+    stages = []
+    if 'stage' in plan:
+        stages.append(plan['stage'])
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get('inputStages', []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+async def explain_shape(shape: QueryShape) -> List[str]:
+    """Stages of the winning plan for a query shape"""
+    cursor = shape.model.get_motor_collection().find(shape.filter)
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+    result = await cursor.explain()
+    return _plan_stages(result['queryPlanner']['winningPlan'])
+
+
+async def find_collection_scans() -> List[Tuple[QueryShape, List[str]]]:
+    """Shapes whose winning plan contains a COLLSCAN"""
+    scans = []
+    for shape in QUERY_SHAPES:
+        stages = await explain_shape(shape)
+        if 'COLLSCAN' in stages:
+            scans.append((shape, stages))
+    return scans
+
+
+async def check_query_plans():
+    """Raise RuntimeError if any catalogued query would scan its collection"""
+    scans = await find_collection_scans()
+    for shape, stages in scans:
+        logger.error(
+            f"Index check: '{shape.name}' on {shape.model.get_settings().name} "
+            f"is a collection scan ({' > '.join(stages)}): filter={shape.filter} sort={shape.sort}"
+        )
+    if scans:
+        raise RuntimeError(f"{len(scans)} query shape(s) have no usable index, see log")
+    logger.info(f"Index check: all {len(QUERY_SHAPES)} query shapes use an index")
@@ -0,0 +1,49 @@
+"""
+Batch loaders - resolve many references with one query
+تحميل المستخدمين دفعة واحدة بدلاً من استعلام لكل صف
+
+Create one loader per request/report, feed it every id the view needs
+with load_many(), then look rows up with get(). Each id is fetched at
+most once per loader, with a single $in query per load_many() call.
+"""
+from typing import Any, Dict, Generic, Iterable, Optional, Type, TypeVar
+
+from beanie.operators import In
+from pydantic import BaseModel
+
+from database.models.user import User, UserName
+from database.projection import find_projected
+
+P = TypeVar('P', bound=BaseModel)
+
+
+class UserLoader(Generic[P]):
+    """Users by telegram_id, as projection_model instances (UserName by default)"""
+
+    def __init__(self, projection_model: Type[P] = UserName):
+        self.projection_model = projection_model
+        # telegram_id -> user, or None if there is no such user
+        self._users: Dict[int, Optional[P]] = {}
+
+    @staticmethod
+    def _key(telegram_id: Any) -> Optional[int]:
+        """Submissions store user ids as strings; skip anything non-numeric"""
+        try:
+            return int(telegram_id)
+        except (TypeError, ValueError):
+            return None
+
+    async def load_many(self, telegram_ids: Iterable[Any]) -> Dict[int, P]:
+        """Users of telegram_ids that exist, fetching the unknown ones in one query"""
+        keys = {key for key in map(self._key, telegram_ids) if key is not None}
+        missing = [key for key in keys if key not in self._users]
+        if missing:
+            for user in await find_projected(User, self.projection_model, In(User.telegram_id, missing)):
+                self._users[user.telegram_id] = user
+            for key in missing:
+                self._users.setdefault(key, None)
+        return {key: self._users[key] for key in keys if self._users[key] is not None}
+
+    def get(self, telegram_id: Any) -> Optional[P]:
+        """A user already loaded by load_many(), None if missing"""
+        return self._users.get(self._key(telegram_id))
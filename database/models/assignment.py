@@ -2,13 +2,17 @@
 Assignment Model
 """
 from datetime import datetime
-from typing import Optional, List
-from beanie import Document
+from typing import Dict, Optional, List
+from beanie import Document, PydanticObjectId
 from pydantic import Field
+from pymongo import ASCENDING, IndexModel, ReturnDocument
+
+from database.models.stats_rollup import StatsRollup
 
 
 class AssignmentSubmission(Document):
-    """Assignment submission sub-document"""
+    """Assignment submission - one document per (assignment, student)"""
+    assignment_id: PydanticObjectId
     user_id: str
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
     file_id: Optional[str] = None  # Telegram file ID
@@ -18,6 +22,68 @@ class AssignmentSubmission(Document):
     graded_by: Optional[str] = None  # admin telegram_id
     graded_at: Optional[datetime] = None
     status: str = "submitted"  # submitted, graded, returned
+    
+    class Settings:
+        name = "assignment_submissions"
+        indexes = [
+            IndexModel(
+                [("assignment_id", ASCENDING), ("user_id", ASCENDING)],
+                unique=True
+            ),
+            [("assignment_id", ASCENDING), ("status", ASCENDING)],
+            # Serves every per-user query and covers stats_for_user
+            [("user_id", ASCENDING), ("status", ASCENDING), ("grade", ASCENDING)],
+            "status",
+            "submitted_at",
+            "grade",
+        ]
+    
+    @classmethod
+    async def counts_by_assignment(cls, assignment_ids: List[PydanticObjectId]) -> Dict[PydanticObjectId, Dict[str, int]]:
+        """{assignment_id: {'total': n, 'graded': n}} in one aggregation"""
+        pipeline = [
+            {"$match": {"assignment_id": {"$in": list(assignment_ids)}}},
+            {"$group": {
+                "_id": "$assignment_id",
+                "total": {"$sum": 1},
+                "graded": {"$sum": {"$cond": [{"$eq": ["$status", "graded"]}, 1, 0]}}
+            }}
+        ]
+        rows = await cls.get_motor_collection().aggregate(pipeline).to_list(length=None)
+        return {row["_id"]: {"total": row["total"], "graded": row["graded"]} for row in rows}
+    
+    @classmethod
+    async def stats_for_user(cls, user_id: str, pass_grade: int = 60) -> Dict[str, float]:
+        """Submission counts and grade summary of one student in one aggregation"""
+        has_grade = {"$isNumber": "$grade"}
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {"$group": {
+                "_id": None,
+                "total": {"$sum": 1},
+                "graded": {"$sum": {"$cond": [{"$eq": ["$status", "graded"]}, 1, 0]}},
+                "average": {"$avg": "$grade"},
+                "highest": {"$max": "$grade"},
+                "lowest": {"$min": "$grade"},
+                "passed": {"$sum": {"$cond": [
+                    {"$and": [has_grade, {"$gte": ["$grade", pass_grade]}]}, 1, 0
+                ]}},
+                "failed": {"$sum": {"$cond": [
+                    {"$and": [has_grade, {"$lt": ["$grade", pass_grade]}]}, 1, 0
+                ]}},
+            }},
+        ]
+        rows = await cls.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        row = rows[0] if rows else {}
+        return {
+            "total": row.get("total", 0),
+            "graded": row.get("graded", 0),
+            "average": row.get("average") or 0,
+            "highest": row.get("highest") if row.get("highest") is not None else 0,
+            "lowest": row.get("lowest") if row.get("lowest") is not None else 0,
+            "passed": row.get("passed", 0),
+            "failed": row.get("failed", 0),
+        }
 
 
 class Assignment(Document):
@@ -42,9 +108,6 @@ class Assignment(Document):
     max_grade: int = 100
     pass_grade: int = 60
     
-    # Submissions
-    submissions: List[AssignmentSubmission] = Field(default_factory=list)
-    
     # Metadata
     created_by: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -58,20 +121,48 @@ class Assignment(Document):
         name = "assignments"
         indexes = [
             "related_to",
-            "related_id",
             ("related_to", "related_id"),
+            "deadline",
+            [("created_at", ASCENDING), ("_id", ASCENDING)],
+            # Course-filtered assignments page (also serves related_id alone)
+            [("related_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
         ]
     
-    def get_submission(self, user_id: str) -> Optional[AssignmentSubmission]:
+    @property
+    def rollup_scope(self) -> str:
+        """stats_rollups scope of the course/material this belongs to"""
+        return StatsRollup.item_scope(self.related_to, self.related_id)
+    
+    def _submission_filter(self, user_id: str) -> Dict:
+        return {"assignment_id": self.id, "user_id": user_id}
+    
+    async def get_submission(self, user_id: str) -> Optional[AssignmentSubmission]:
         """Get user's submission"""
-        for submission in self.submissions:
-            if submission.user_id == user_id:
-                return submission
-        return None
+        return await AssignmentSubmission.find_one(
+            AssignmentSubmission.assignment_id == self.id,
+            AssignmentSubmission.user_id == user_id
+        )
     
-    def has_submitted(self, user_id: str) -> bool:
+    async def has_submitted(self, user_id: str) -> bool:
         """Check if user has submitted"""
-        return self.get_submission(user_id) is not None
+        return await AssignmentSubmission.find(
+            AssignmentSubmission.assignment_id == self.id,
+            AssignmentSubmission.user_id == user_id
+        ).count() > 0
+    
+    async def list_submissions(self, status: Optional[str] = None) -> List[AssignmentSubmission]:
+        """Get submissions for this assignment (optionally by status)"""
+        query = AssignmentSubmission.find(AssignmentSubmission.assignment_id == self.id)
+        if status:
+            query = query.find(AssignmentSubmission.status == status)
+        return await query.sort(AssignmentSubmission.submitted_at).to_list()
+    
+    async def count_submissions(self, status: Optional[str] = None) -> int:
+        """Count submissions for this assignment (optionally by status)"""
+        query = AssignmentSubmission.find(AssignmentSubmission.assignment_id == self.id)
+        if status:
+            query = query.find(AssignmentSubmission.status == status)
+        return await query.count()
     
     async def add_submission(
         self,
@@ -79,18 +170,28 @@ class Assignment(Document):
         file_id: Optional[str] = None,
         text_answer: Optional[str] = None
     ):
-        """Add new submission"""
-        # Remove old submission if exists
-        self.submissions = [s for s in self.submissions if s.user_id != user_id]
-        
-        submission = AssignmentSubmission(
-            user_id=user_id,
-            file_id=file_id,
-            text_answer=text_answer
+        """Add new submission (replaces the previous one) - single upsert.
+
+        Returns True if this is the user's first submission.
+        """
+        previous = await AssignmentSubmission.get_motor_collection().find_one_and_update(
+            self._submission_filter(user_id),
+            {"$set": {
+                "submitted_at": datetime.utcnow(),
+                "file_id": file_id,
+                "text_answer": text_answer,
+                "grade": None,
+                "feedback": None,
+                "graded_by": None,
+                "graded_at": None,
+                "status": "submitted",
+            }},
+            projection={"grade": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
         )
-        self.submissions.append(submission)
-        self.updated_at = datetime.utcnow()
-        await self.save()
+        await StatsRollup.record_submission(self.rollup_scope, previous)
+        return previous is None
     
     async def grade_submission(
         self,
@@ -98,17 +199,24 @@ class Assignment(Document):
         grade: int,
         feedback: str,
         graded_by: str
-    ):
-        """Grade a submission"""
-        submission = self.get_submission(user_id)
-        if submission:
-            submission.grade = grade
-            submission.feedback = feedback
-            submission.graded_by = graded_by
-            submission.graded_at = datetime.utcnow()
-            submission.status = "graded"
-            self.updated_at = datetime.utcnow()
-            await self.save()
+    ) -> bool:
+        """Grade a submission, returns False if there is none"""
+        previous = await AssignmentSubmission.get_motor_collection().find_one_and_update(
+            self._submission_filter(user_id),
+            {"$set": {
+                "grade": grade,
+                "feedback": feedback,
+                "graded_by": graded_by,
+                "graded_at": datetime.utcnow(),
+                "status": "graded",
+            }},
+            projection={"grade": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            return False
+        await StatsRollup.record_grade(self.rollup_scope, previous.get("grade"), grade)
+        return True
     
     def is_past_deadline(self) -> bool:
         """Check if past deadline"""
@@ -41,6 +41,7 @@ class Notification(Document):
             "read",
             "sent",
             ("user_id", "read"),
+            "created_at",
         ]
     
     async def mark_as_sent(self):
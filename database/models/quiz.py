@@ -4,8 +4,10 @@ Quiz Model - Auto-graded quizzes
 """
 from datetime import datetime
 from typing import List, Optional
-from beanie import Document
+from beanie import Document, PydanticObjectId
 from pydantic import Field, BaseModel
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
 
 
 class QuizOption(BaseModel):
@@ -22,9 +24,11 @@ class QuizQuestion(BaseModel):
     explanation: Optional[str] = None  # Explanation shown after answering
 
 
-class QuizAttempt(BaseModel):
-    """Quiz attempt model"""
+class QuizAttempt(Document):
+    """Quiz attempt - one document per attempt"""
+    quiz_id: PydanticObjectId
     user_id: str
+    attempt_number: int = 1  # 1-based, per quiz and user
     started_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
     answers: List[int] = Field(default_factory=list)  # Index of selected option for each question
@@ -32,6 +36,17 @@ class QuizAttempt(BaseModel):
     max_score: Optional[int] = None
     passed: bool = False
     time_taken_seconds: Optional[int] = None
+    
+    class Settings:
+        name = "quiz_attempts"
+        indexes = [
+            # Also caps concurrent starts: two starts can't take the same number
+            IndexModel(
+                [("quiz_id", ASCENDING), ("user_id", ASCENDING), ("attempt_number", ASCENDING)],
+                unique=True
+            ),
+            [("user_id", ASCENDING), ("passed", ASCENDING)],
+        ]
 
 
 class Quiz(Document):
@@ -59,9 +74,6 @@ class Quiz(Document):
     available_from: Optional[datetime] = None
     available_until: Optional[datetime] = None
     
-    # Attempts
-    attempts: List[QuizAttempt] = Field(default_factory=list)
-    
     # Metadata
     created_by: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -76,16 +88,22 @@ class Quiz(Document):
             ("related_to", "related_id"),
         ]
     
-    def get_user_attempts(self, user_id: str) -> List[QuizAttempt]:
+    def _attempts_query(self, user_id: str):
+        return QuizAttempt.find(
+            QuizAttempt.quiz_id == self.id,
+            QuizAttempt.user_id == user_id
+        )
+    
+    async def get_user_attempts(self, user_id: str) -> List[QuizAttempt]:
         """Get all attempts by a user"""
-        return [a for a in self.attempts if a.user_id == user_id]
+        return await self._attempts_query(user_id).sort(QuizAttempt.attempt_number).to_list()
     
-    def get_attempts_count(self, user_id: str) -> int:
+    async def get_attempts_count(self, user_id: str) -> int:
         """Get number of attempts by user"""
-        return len(self.get_user_attempts(user_id))
+        return await self._attempts_query(user_id).count()
     
-    def can_attempt(self, user_id: str) -> bool:
-        """Check if user can attempt quiz"""
+    def is_available(self) -> bool:
+        """Check if quiz is active and open"""
         if not self.is_active:
             return False
         
@@ -96,22 +114,28 @@ class Quiz(Document):
         if self.available_until and now > self.available_until:
             return False
         
+        return True
+    
+    async def can_attempt(self, user_id: str) -> bool:
+        """Check if user can attempt quiz"""
+        if not self.is_available():
+            return False
+        
         # Check max attempts
-        attempts_count = self.get_attempts_count(user_id)
+        attempts_count = await self.get_attempts_count(user_id)
         if attempts_count >= self.max_attempts:
             return False
         
         return True
     
-    def get_best_attempt(self, user_id: str) -> Optional[QuizAttempt]:
+    async def get_best_attempt(self, user_id: str) -> Optional[QuizAttempt]:
         """Get best attempt by user"""
-        attempts = self.get_user_attempts(user_id)
-        completed = [a for a in attempts if a.completed_at is not None]
-        
-        if not completed:
-            return None
-        
-        return max(completed, key=lambda a: a.score or 0)
+        return await self._attempts_query(user_id).find(
+            QuizAttempt.completed_at != None
+        ).sort(
+            (QuizAttempt.score, DESCENDING),
+            (QuizAttempt.attempt_number, ASCENDING)
+        ).first_or_none()
     
     def calculate_score(self, answers: List[int]) -> tuple[int, int]:
         """Calculate score from answers"""
@@ -130,14 +154,28 @@ class Quiz(Document):
         return score, max_score
     
     async def start_attempt(self, user_id: str) -> Optional[QuizAttempt]:
-        """Start new quiz attempt"""
-        if not self.can_attempt(user_id):
+        """Start new quiz attempt - a single insert.
+
+        The attempt number is the count + 1; the unique
+        (quiz_id, user_id, attempt_number) index rejects a concurrent start
+        that counted the same attempts, so max_attempts can't be exceeded.
+        """
+        if not self.is_available():
+            return None
+        
+        attempts_count = await self.get_attempts_count(user_id)
+        if attempts_count >= self.max_attempts:
             return None
         
-        attempt = QuizAttempt(user_id=user_id)
-        self.attempts.append(attempt)
-        self.updated_at = datetime.utcnow()
-        await self.save()
+        attempt = QuizAttempt(
+            quiz_id=self.id,
+            user_id=user_id,
+            attempt_number=attempts_count + 1
+        )
+        try:
+            await attempt.insert()
+        except DuplicateKeyError:
+            return None
         
         return attempt
     
@@ -148,14 +186,13 @@ class Quiz(Document):
     ) -> Optional[QuizAttempt]:
         """Submit and grade quiz attempt"""
         # Find the latest incomplete attempt
-        user_attempts = [a for a in self.attempts if a.user_id == user_id]
-        incomplete = [a for a in user_attempts if a.completed_at is None]
+        attempt = await self._attempts_query(user_id).find(
+            QuizAttempt.completed_at == None
+        ).sort(-QuizAttempt.attempt_number).first_or_none()
         
-        if not incomplete:
+        if not attempt:
             return None
         
-        attempt = incomplete[-1]
-        
         # Calculate score
         score, max_score = self.calculate_score(answers)
         percentage = (score / max_score * 100) if max_score > 0 else 0
@@ -170,8 +207,20 @@ class Quiz(Document):
             (attempt.completed_at - attempt.started_at).total_seconds()
         )
         
-        self.updated_at = datetime.utcnow()
-        await self.save()
+        # Only the first submit of an attempt is recorded
+        result = await QuizAttempt.get_motor_collection().update_one(
+            {"_id": attempt.id, "completed_at": None},
+            {"$set": {
+                "completed_at": attempt.completed_at,
+                "answers": attempt.answers,
+                "score": attempt.score,
+                "max_score": attempt.max_score,
+                "passed": attempt.passed,
+                "time_taken_seconds": attempt.time_taken_seconds,
+            }}
+        )
+        if result.modified_count == 0:
+            return None
         
         return attempt
     
@@ -0,0 +1,41 @@
+"""
+Report Job Model - queued report exports
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from beanie import Document
+from pydantic import Field
+from pymongo import ASCENDING, IndexModel
+
+
+class ReportJob(Document):
+    """One report export, built by utils/report_jobs.py workers.
+
+    active_key (kind + params) is only set while the job is queued or
+    running; its unique index makes identical requests coalesce onto one
+    job. Each subscriber is {"chat_id", "message_id"}: the message shows
+    the progress and the chat receives the document. A running job whose
+    heartbeat_at is older than the lease is re-queued.
+    """
+    kind: str  # students_excel, student_pdf
+    params: Dict[str, Any] = Field(default_factory=dict)
+    active_key: Optional[str] = None
+    status: str = "queued"  # queued, running, done, failed
+    subscribers: List[Dict[str, int]] = Field(default_factory=list)
+    progress: int = 0  # percent
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    # Lease of the worker running the job: its claim token and last heartbeat
+    claim: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Settings:
+        name = "report_jobs"
+        indexes = [
+            IndexModel([("active_key", ASCENDING)], unique=True, sparse=True),
+            [("status", ASCENDING), ("created_at", ASCENDING)],
+            # Finished jobs are kept for a week
+            IndexModel([("finished_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+        ]
@@ -0,0 +1,166 @@
+"""
+Stats Rollup Model - counters kept up to date by the write paths
+"""
+from datetime import datetime, timedelta
+from typing import ClassVar, Dict, List, Optional, Tuple, Union
+from beanie import Document
+from loguru import logger
+from pymongo import UpdateOne
+
+Number = Union[int, float]
+
+
+class StatsRollup(Document):
+    """Pre-aggregated counters for one scope.
+
+    Scopes (the document _id):
+    - "global" and "course:<id>" / "material:<id>": current totals.
+      enrollments_* count enrollments by approval status, graded and
+      grade_sum cover submissions that currently have a grade.
+    - "day:YYYY-MM-DD": what happened that day (UTC): users registered,
+      enrollments created, submissions made (re-submissions included)
+      and gradings done (re-gradings included).
+
+    Every write path applies its change with one $inc upsert per scope.
+    utils/stats_rollups.rebuild_rollups() recomputes the totals from the
+    source collections if they ever drift; recorded days are kept.
+    """
+    id: str
+    users: int = 0
+    enrollments: int = 0
+    enrollments_pending: int = 0
+    enrollments_approved: int = 0
+    enrollments_rejected: int = 0
+    submissions: int = 0
+    graded: int = 0
+    grade_sum: float = 0
+    updated_at: Optional[datetime] = None
+    # Set by rebuild_rollups(); missing until the rollups were first built
+    rebuilt_at: Optional[datetime] = None
+
+    class Settings:
+        name = "stats_rollups"
+
+    GLOBAL: ClassVar[str] = "global"
+
+    @staticmethod
+    def day_scope(at: Optional[datetime] = None) -> str:
+        return "day:" + (at or datetime.utcnow()).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def item_scope(kind: str, item_id: str) -> str:
+        """Scope of a course or material ("course:<id>", "material:<id>")"""
+        return f"{kind}:{item_id}"
+
+    @property
+    def average_grade(self) -> float:
+        return self.grade_sum / self.graded if self.graded else 0
+
+    # ------------------------------------------------------------------
+    # Increments
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def increment(cls, changes: List[Tuple[str, Dict[str, Number]]]):
+        """Apply (scope, {field: delta}) changes in one bulk_write.
+
+        Rollups are derived data: a failure is logged, never raised into
+        the write path that triggered it (rebuild_rollups repairs it).
+        """
+        merged: Dict[str, Dict[str, Number]] = {}
+        for scope, deltas in changes:
+            target = merged.setdefault(scope, {})
+            for field, delta in deltas.items():
+                target[field] = target.get(field, 0) + delta
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": scope},
+                {"$inc": deltas, "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for scope, deltas in merged.items()
+            if any(deltas.values())
+        ]
+        if not operations:
+            return
+        try:
+            await cls.get_motor_collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"StatsRollup: failed to apply {merged}: {repr(e)}")
+
+    @classmethod
+    async def record_user_registered(cls):
+        await cls.increment([(cls.GLOBAL, {"users": 1}), (cls.day_scope(), {"users": 1})])
+
+    @classmethod
+    async def record_enrollment_created(cls, kind: str, item_id: str):
+        deltas = {"enrollments": 1, "enrollments_pending": 1}
+        await cls.increment([
+            (cls.GLOBAL, deltas),
+            (cls.item_scope(kind, item_id), deltas),
+            (cls.day_scope(), {"enrollments": 1}),
+        ])
+
+    @classmethod
+    async def record_enrollments_reviewed(cls, reviewed: List[Tuple[str, str]], status: str):
+        """Pending enrollments [(kind, item_id)] that became `status`"""
+        changes = []
+        for kind, item_id in reviewed:
+            deltas = {"enrollments_pending": -1, f"enrollments_{status}": 1}
+            changes += [(cls.GLOBAL, deltas), (cls.item_scope(kind, item_id), deltas)]
+        await cls.increment(changes)
+
+    @classmethod
+    async def record_submission(cls, scope: str, previous: Optional[Dict]):
+        """A submission was saved; previous is the replaced document (None if new).
+
+        Re-submitting clears the grade, so a previously graded submission
+        leaves the graded totals.
+        """
+        deltas: Dict[str, Number] = {}
+        if previous is None:
+            deltas["submissions"] = 1
+        elif previous.get("grade") is not None:
+            deltas["graded"] = -1
+            deltas["grade_sum"] = -previous["grade"]
+        await cls.increment([
+            (cls.GLOBAL, deltas),
+            (scope, deltas),
+            (cls.day_scope(), {"submissions": 1}),
+        ])
+
+    @classmethod
+    async def record_grade(cls, scope: str, previous_grade: Optional[Number], grade: Number):
+        """A submission was graded (or re-graded from previous_grade)"""
+        if previous_grade is None:
+            deltas = {"graded": 1, "grade_sum": grade}
+        else:
+            deltas = {"grade_sum": grade - previous_grade}
+        await cls.increment([
+            (cls.GLOBAL, deltas),
+            (scope, deltas),
+            (cls.day_scope(), {"graded": 1}),
+        ])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def get_scope(cls, scope: str) -> "StatsRollup":
+        """Counters of a scope (all zero if nothing was recorded)"""
+        return await cls.get(scope) or cls(id=scope)
+
+    @classmethod
+    async def get_days(cls, days: int, until: Optional[datetime] = None) -> List["StatsRollup"]:
+        """Day scopes of the last `days` days up to `until` (oldest first)"""
+        until = until or datetime.utcnow()
+        scopes = [cls.day_scope(until - timedelta(days=n)) for n in range(days - 1, -1, -1)]
+        found = {r.id: r for r in await cls.find({"_id": {"$in": scopes}}).to_list()}
+        return [found.get(scope) or cls(id=scope) for scope in scopes]
+
+    @classmethod
+    async def get_items(cls, kind: str) -> List["StatsRollup"]:
+        """Every course (or material) scope"""
+        return await cls.find({"_id": {"$regex": f"^{kind}:"}}).to_list()
@@ -1,10 +1,14 @@
 """
 User Model
 """
+import uuid
 from datetime import datetime
-from typing import List, Optional
-from beanie import Document
+from typing import Dict, List, Optional, Tuple, Union
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field, EmailStr
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+
+from database.models.stats_rollup import StatsRollup
 
 
 class CourseEnrollment(BaseModel):
@@ -18,6 +22,7 @@ class CourseEnrollment(BaseModel):
     approval_status: str = "pending"  # pending, approved, rejected
     approved_by: Optional[str] = None
     approved_at: Optional[datetime] = None
+    review_batch: Optional[str] = None  # bulk approval that approved it
     progress: int = 0  # 0-100
     videos_watched: List[str] = Field(default_factory=list)
     assignments_submitted: List[str] = Field(default_factory=list)
@@ -39,6 +44,7 @@ class MaterialEnrollment(BaseModel):
     approval_status: str = "pending"
     approved_by: Optional[str] = None
     approved_at: Optional[datetime] = None
+    review_batch: Optional[str] = None
     progress: int = 0
     videos_watched: List[str] = Field(default_factory=list)
     assignments_submitted: List[str] = Field(default_factory=list)
@@ -59,6 +65,41 @@ class ProjectEnrollment(BaseModel):
     feedback: Optional[str] = None
 
 
+class UserName(BaseModel):
+    """Projection: just enough to list or address a user"""
+    telegram_id: int
+    full_name: str
+
+
+class UserSummary(BaseModel):
+    """Projection for user lists - no enrollments or payment proofs"""
+    id: Optional[PydanticObjectId] = Field(default=None, alias="_id")
+    telegram_id: int
+    full_name: str
+    email: Optional[str] = None  # plain str: no EmailStr validation per row
+    phone: Optional[str] = None
+    registered_at: Optional[datetime] = None
+    courses_count: int = 0
+    
+    class Settings:
+        projection = {
+            "_id": 1,
+            "telegram_id": 1,
+            "full_name": 1,
+            "email": 1,
+            "phone": 1,
+            "registered_at": 1,
+            "courses_count": {"$size": {"$ifNull": ["$courses", []]}},
+        }
+
+
+# Enrollment kind -> (array field on User, id field in the sub-document)
+ENROLLMENT_FIELDS = {
+    "course": ("courses", "course_id"),
+    "material": ("materials", "material_id"),
+}
+
+
 class User(Document):
     """User model"""
     telegram_id: int = Field(unique=True)
@@ -85,6 +126,11 @@ class User(Document):
         indexes = [
             "telegram_id",
             "email",
+            # Also the keyset for paginated lists (registered_at, _id)
+            [("registered_at", ASCENDING), ("_id", ASCENDING)],
+            "last_active",
+            "courses.approval_status",
+            "materials.approval_status",
         ]
     
     def get_course_enrollment(self, course_id: str) -> Optional[CourseEnrollment]:
@@ -127,7 +173,8 @@ class User(Document):
             payment_status="paid"
         )
         self.courses.append(enrollment)
-        await self.save()
+        await self.update({"$push": {"courses": enrollment.model_dump()}})
+        await StatsRollup.record_enrollment_created("course", course_id)
     
     async def add_material_enrollment(
         self,
@@ -149,9 +196,115 @@ class User(Document):
             payment_status="paid"
         )
         self.materials.append(enrollment)
-        await self.save()
+        await self.update({"$push": {"materials": enrollment.model_dump()}})
+        await StatsRollup.record_enrollment_created("material", material_id)
+    
+    @staticmethod
+    def _pending_enrollment_filter(telegram_id: int, kind: str, item_id: str) -> Dict:
+        array, id_field = ENROLLMENT_FIELDS[kind]
+        return {
+            "telegram_id": telegram_id,
+            array: {"$elemMatch": {id_field: item_id, "approval_status": "pending"}},
+        }
+    
+    @staticmethod
+    def _review_update(
+        kind: str,
+        status: str,
+        reviewed_by: str,
+        reviewed_at: Optional[datetime],
+        review_batch: Optional[str] = None
+    ) -> Dict:
+        array, _ = ENROLLMENT_FIELDS[kind]
+        fields = {
+            f"{array}.$.approval_status": status,
+            f"{array}.$.approved_by": reviewed_by,
+        }
+        if reviewed_at is not None:
+            fields[f"{array}.$.approved_at"] = reviewed_at
+        if review_batch is not None:
+            fields[f"{array}.$.review_batch"] = review_batch
+        return {"$set": fields}
+    
+    @classmethod
+    async def review_enrollment(
+        cls,
+        telegram_id: int,
+        kind: str,
+        item_id: str,
+        status: str,
+        reviewed_by: str
+    ) -> Optional[Tuple[str, Union[CourseEnrollment, MaterialEnrollment]]]:
+        """Approve or reject a pending enrollment with one positional update.
+        
+        Only that enrollment's fields are written, so a concurrent save of
+        other parts of the user cannot undo it. Returns (full_name,
+        enrollment as it was) or None if there is no pending enrollment.
+        """
+        array, _ = ENROLLMENT_FIELDS[kind]
+        reviewed_at = datetime.utcnow() if status == "approved" else None
+        doc = await cls.get_motor_collection().find_one_and_update(
+            cls._pending_enrollment_filter(telegram_id, kind, item_id),
+            cls._review_update(kind, status, reviewed_by, reviewed_at),
+            projection={"full_name": 1, f"{array}.$": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not doc:
+            return None
+        await StatsRollup.record_enrollments_reviewed([(kind, item_id)], status)
+        model = CourseEnrollment if kind == "course" else MaterialEnrollment
+        return doc["full_name"], model(**doc[array][0])
+    
+    @classmethod
+    async def approve_enrollments(
+        cls,
+        enrollments: List[Tuple[int, str, str]],
+        approved_by: str
+    ) -> List[Tuple[int, str, str, str, Union[CourseEnrollment, MaterialEnrollment]]]:
+        """Approve many pending enrollments in one bulk_write.
+        
+        enrollments are (telegram_id, kind, item_id). Returns
+        (telegram_id, kind, item_id, full_name, enrollment) for each one
+        that was still pending and is now approved.
+        """
+        if not enrollments:
+            return []
+        # A token unique to this call marks exactly the enrollments it
+        # approved, even if another approval of the same rows runs at once
+        review_batch = uuid.uuid4().hex
+        approved_at = datetime.utcnow()
+        collection = cls.get_motor_collection()
+        await collection.bulk_write([
+            UpdateOne(
+                cls._pending_enrollment_filter(telegram_id, kind, item_id),
+                cls._review_update(kind, "approved", approved_by, approved_at, review_batch)
+            )
+            for telegram_id, kind, item_id in enrollments
+        ], ordered=False)
+        
+        requested = set((int(t), k, i) for t, k, i in enrollments)
+        approved = []
+        cursor = collection.find(
+            {
+                "telegram_id": {"$in": list({t for t, _, _ in requested})},
+                "$or": [{f"{array}.review_batch": review_batch} for array, _ in ENROLLMENT_FIELDS.values()],
+            },
+            {"telegram_id": 1, "full_name": 1, "courses": 1, "materials": 1}
+        )
+        async for doc in cursor:
+            for kind, (array, id_field) in ENROLLMENT_FIELDS.items():
+                model = CourseEnrollment if kind == "course" else MaterialEnrollment
+                for entry in doc.get(array, []):
+                    key = (doc["telegram_id"], kind, entry.get(id_field))
+                    if key in requested and entry.get("review_batch") == review_batch:
+                        approved.append((*key, doc["full_name"], model(**entry)))
+        await StatsRollup.record_enrollments_reviewed([(kind, item_id) for _, kind, item_id, _, _ in approved], "approved")
+        return approved
     
     async def update_last_active(self):
-        """Update last active timestamp"""
+        """Update last active timestamp (only that field is written).
+
+        Handlers on hot paths should use UserActivityBuffer.touch instead.
+        """
         self.last_active = datetime.utcnow()
-        await self.save()
+        await self.set({User.last_active: self.last_active})
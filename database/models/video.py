@@ -1,10 +1,39 @@
 """
 Video Model
 """
+import hashlib
+import math
 from datetime import datetime
-from typing import Optional, List
+from typing import ClassVar, Dict, Optional, List, Tuple
 from beanie import Document
 from pydantic import Field
+from pymongo import ASCENDING
+
+
+# HyperLogLog sketch for unique viewers: 2^10 registers, ~3% standard error
+SKETCH_PRECISION = 10
+SKETCH_REGISTERS = 1 << SKETCH_PRECISION
+
+
+def _sketch_register(user_id: str) -> Tuple[str, int]:
+    """Register index (as a field name) and rank of a user id"""
+    value = int.from_bytes(hashlib.sha1(user_id.encode()).digest()[:8], 'big')
+    bits = 64 - SKETCH_PRECISION
+    index = value >> bits
+    rest = value & ((1 << bits) - 1)
+    return str(index), bits - rest.bit_length() + 1
+
+
+def _sketch_estimate(registers: Dict[str, int]) -> int:
+    """Distinct count estimated from the registers (missing ones are 0)"""
+    m = SKETCH_REGISTERS
+    zeros = m - len(registers)
+    total = zeros + sum(2.0 ** -rank for rank in registers.values())
+    estimate = (0.7213 / (1 + 1.079 / m)) * m * m / total
+    if estimate <= 2.5 * m and zeros:
+        # Small range correction (linear counting)
+        estimate = m * math.log(m / zeros)
+    return round(estimate)
 
 
 class Video(Document):
@@ -39,6 +68,9 @@ class Video(Document):
     # Statistics
     views_count: int = 0
     unique_viewers: List[str] = Field(default_factory=list)  # user_ids who watched
+    # HyperLogLog registers {index: rank}, used instead of unique_viewers
+    # once a video has more than EXACT_VIEWERS_LIMIT viewers
+    viewer_sketch: Dict[str, int] = Field(default_factory=dict)
     
     # Status
     is_active: bool = True
@@ -48,17 +80,67 @@ class Video(Document):
         indexes = [
             "file_id",
             "related_to",
-            "related_id",
             ("related_to", "related_id"),
+            [("uploaded_at", ASCENDING), ("_id", ASCENDING)],
+            # Course-filtered videos page (also serves related_id alone)
+            [("related_id", ASCENDING), ("uploaded_at", ASCENDING), ("_id", ASCENDING)],
         ]
     
+    # Exact viewer list size before switching to the sketch (None: always exact)
+    EXACT_VIEWERS_LIMIT: ClassVar[Optional[int]] = 1000
+    
     async def increment_views(self, user_id: str):
-        """Increment views count"""
+        """Record a view with a single atomic update"""
+        collection = self.get_motor_collection()
+        now = datetime.utcnow()
+        
+        exact_filter = {"_id": self.id, "viewer_sketch": {"$in": [None, {}]}}
+        if self.EXACT_VIEWERS_LIMIT is not None:
+            exact_filter[f"unique_viewers.{self.EXACT_VIEWERS_LIMIT - 1}"] = {"$exists": False}
+        result = await collection.update_one(exact_filter, {
+            "$inc": {"views_count": 1},
+            "$addToSet": {"unique_viewers": user_id},
+            "$set": {"updated_at": now}
+        })
+        
+        if not result.matched_count:
+            index, rank = _sketch_register(user_id)
+            await collection.update_one({"_id": self.id}, {
+                "$inc": {"views_count": 1},
+                "$max": {f"viewer_sketch.{index}": rank},
+                "$set": {"updated_at": now}
+            })
+            await self._fold_viewers_into_sketch()
+        
         self.views_count += 1
-        if user_id not in self.unique_viewers:
-            self.unique_viewers.append(user_id)
-        self.updated_at = datetime.utcnow()
-        await self.save()
+        self.updated_at = now
+    
+    async def _fold_viewers_into_sketch(self):
+        """Move any exact viewer ids into the sketch (once, after switching)"""
+        collection = self.get_motor_collection()
+        doc = await collection.find_one(
+            {"_id": self.id, "unique_viewers.0": {"$exists": True}},
+            {"unique_viewers": 1}
+        )
+        if not doc:
+            return
+        registers: Dict[str, int] = {}
+        for viewer in doc["unique_viewers"]:
+            index, rank = _sketch_register(viewer)
+            registers[index] = max(rank, registers.get(index, 0))
+        # $pullAll (not $set []) so a repeated fold is harmless
+        await collection.update_one({"_id": self.id}, {
+            "$max": {f"viewer_sketch.{index}": rank for index, rank in registers.items()},
+            "$pullAll": {"unique_viewers": doc["unique_viewers"]}
+        })
+        self.unique_viewers = []
+    
+    @property
+    def unique_viewers_count(self) -> int:
+        """Number of distinct viewers (estimated once the sketch is in use)"""
+        if self.viewer_sketch:
+            return _sketch_estimate(self.viewer_sketch)
+        return len(self.unique_viewers)
     
     def get_info_text(self) -> str:
         """Get formatted video info"""
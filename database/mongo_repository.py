@@ -0,0 +1,131 @@
+"""
+MongoDB Repository - raw Motor collections for the JSON-backed stores
+"""
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from pymongo import ASCENDING, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
+from database.connection import Database
+from database.repository import Repository
+
+
+class MongoRepository(Repository):
+    """Repository over MongoDB (json_* collections, no Beanie models)"""
+
+    # Appends retried when another replica took the same _order
+    APPEND_ATTEMPTS = 5
+
+    async def collection(self, name: str):
+        """Motor collection (connects if needed)"""
+        if Database.client is None or not Database.beanie_initialized:
+            await Database.connect()
+        return Database.get_database()[self.collections[name].collection]
+
+    async def ensure_indexes(self):
+        for name, spec in self.collections.items():
+            coll = await self.collection(name)
+            for fields, unique in spec.indexes:
+                await coll.create_index([(f, ASCENDING) for f in fields], unique=unique)
+        logger.info("MongoRepository: indexes ensured")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def find(self, name: str, query: Optional[Dict] = None) -> List[Dict]:
+        coll = await self.collection(name)
+        cursor = coll.find(query or {}, {'_id': 0, '_order': 0})
+        if self.collections[name].ordered:
+            cursor = cursor.sort('_order', ASCENDING)
+        return await cursor.to_list(length=None)
+
+    async def find_one(self, name: str, query: Dict) -> Optional[Dict]:
+        coll = await self.collection(name)
+        return await coll.find_one(query, {'_id': 0, '_order': 0})
+
+    async def count(self, name: str, query: Optional[Dict] = None) -> int:
+        coll = await self.collection(name)
+        if not query:
+            return await coll.estimated_document_count()
+        return await coll.count_documents(query)
+
+    async def group_count(
+        self,
+        name: str,
+        query: Dict,
+        by: Tuple[str, ...],
+        first: Optional[str] = None
+    ) -> List[Dict]:
+        coll = await self.collection(name)
+        group = {'_id': {f: f'${f}' for f in by}, 'count': {'$sum': 1}}
+        if first:
+            group['first'] = {'$first': f'${first}'}
+        pipeline = [
+            {'$match': query},
+            {'$sort': {'_id': 1}},
+            {'$group': group},
+            {'$sort': {f'_id.{f}': 1 for f in by}},
+        ]
+        rows = await coll.aggregate(pipeline).to_list(length=None)
+        return [{**row['_id'], 'count': row['count'], 'first': row.get('first')} for row in rows]
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def upsert(self, name: str, doc: Dict):
+        spec = self.collections[name]
+        coll = await self.collection(name)
+        await coll.replace_one(spec.key_filter(doc), dict(doc), upsert=True)
+
+    async def bulk_upsert(self, name: str, docs: List[Dict]) -> int:
+        if not docs:
+            return 0
+        spec = self.collections[name]
+        coll = await self.collection(name)
+        await coll.bulk_write(
+            [ReplaceOne(spec.key_filter(d), d, upsert=True) for d in docs],
+            ordered=True
+        )
+        return len(docs)
+
+    async def save_ordered(
+        self,
+        name: str,
+        doc: Dict,
+        position: Optional[int] = None,
+        match: Optional[Dict] = None,
+        update_fields: Tuple[str, ...] = ()
+    ) -> bool:
+        coll = await self.collection(name)
+        if position is not None:
+            await coll.replace_one({'_order': position}, {**doc, '_order': position}, upsert=True)
+            return False
+        # Replicas append concurrently: the unique _order index rejects a
+        # position another writer took first, so read the new max and retry
+        for attempt in range(self.APPEND_ATTEMPTS):
+            last = await coll.find_one({}, {'_order': 1}, sort=[('_order', -1)])
+            order = (last['_order'] + 1) if last else 0
+            try:
+                if not match:
+                    await coll.insert_one({**doc, '_order': order})
+                    return False
+                updates = {f: doc.get(f) for f in update_fields}
+                # Upsert on the match fields: of two writers appending the same
+                # entry, the one that loses the _order race matches on retry
+                inserted = {k: v for k, v in doc.items() if k not in updates}
+                update = {'$setOnInsert': {**inserted, '_order': order}}
+                if updates:
+                    update['$set'] = updates
+                result = await coll.update_one(match, update, upsert=True)
+                return bool(result.matched_count)
+            except DuplicateKeyError:
+                if attempt == self.APPEND_ATTEMPTS - 1:
+                    raise
+                logger.debug(f"MongoRepository: _order {order} of {name} taken, retrying")
+
+    async def truncate_ordered(self, name: str, length: int):
+        coll = await self.collection(name)
+        await coll.delete_many({'_order': {'$gte': length}})
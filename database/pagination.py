@@ -0,0 +1,120 @@
+"""
+Keyset pagination - stable pages over an indexed sort key
+ترقيم الصفحات بالمؤشر - صفحات ثابتة الكلفة مهما كبر حجم المجموعة
+
+A page is found by filtering on the last row of the previous page
+(sort value, _id) instead of skipping rows, so page N costs the same as
+page 1 as long as the sort key is indexed together with _id, e.g.
+[("registered_at", ASCENDING), ("_id", ASCENDING)] (also serves the
+descending order).
+"""
+import base64
+from typing import Any, Dict, List, Optional, Type
+
+from beanie import Document
+from bson import json_util
+from pydantic import BaseModel
+from pymongo import ASCENDING, DESCENDING
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class Page:
+    """One page of results and the cursors of its neighbours"""
+
+    def __init__(self, items: List[Any], next_cursor: Optional[str], prev_cursor: Optional[str], limit: int):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.limit = limit
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque URL-safe cursor (keeps datetime/ObjectId types)"""
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Values of a cursor, raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(limit or PAGE_SIZE, MAX_PAGE_SIZE))
+
+
+def _keyset_filter(keys: List[str], values: List[Any], op: str) -> Dict:
+    """Rows after (op=$gt) or before (op=$lt) `values` in `keys` order"""
+    clauses = []
+    for i, key in enumerate(keys):
+        clause = {k: v for k, v in zip(keys[:i], values[:i])}
+        clause[key] = {op: values[i]}
+        clauses.append(clause)
+    return {"$or": clauses} if len(clauses) > 1 else clauses[0]
+
+
+def _value(item: Any, key: str) -> Any:
+    return getattr(item, 'id' if key == '_id' else key)
+
+
+async def paginate(
+    document: Type[Document],
+    *filters: Any,
+    sort_field: str = '_id',
+    descending: bool = True,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = None,
+    projection_model: Optional[Type[BaseModel]] = None
+) -> Page:
+    """Page of document.find(*filters) ordered by (sort_field, _id).
+
+    Pass the previous page's next_cursor as `after` or its prev_cursor
+    as `before`. A projection_model must include the sort field and id.
+    """
+    limit = clamp_limit(limit)
+    keys = [sort_field] if sort_field == '_id' else [sort_field, '_id']
+    backwards = before is not None
+    # Walking backwards reads in the opposite order, then flips the rows
+    reverse = descending != backwards
+    direction = DESCENDING if reverse else ASCENDING
+
+    query_filters = list(filters)
+    cursor = before if backwards else after
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise ValueError("Invalid cursor")
+        query_filters.append(_keyset_filter(keys, values, '$lt' if reverse else '$gt'))
+
+    kwargs = {'projection_model': projection_model} if projection_model else {}
+    items = await (
+        document.find(*query_filters, **kwargs)
+        .sort([(key, direction) for key in keys])
+        .limit(limit + 1)
+        .to_list()
+    )
+    has_more = len(items) > limit
+    items = items[:limit]
+    if backwards:
+        items.reverse()
+
+    def cursor_of(item):
+        return encode_cursor([_value(item, key) for key in keys])
+
+    has_next = (not backwards and has_more) or (backwards and bool(cursor))
+    has_prev = (backwards and has_more) or (not backwards and bool(cursor))
+    return Page(
+        items,
+        next_cursor=cursor_of(items[-1]) if items and has_next else None,
+        prev_cursor=cursor_of(items[0]) if items and has_prev else None,
+        limit=limit
+    )
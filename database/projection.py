@@ -0,0 +1,33 @@
+"""
+Projection queries - fetch only the fields a view renders
+استعلامات مختصرة - جلب الحقول المعروضة فقط
+"""
+from typing import Any, List, Optional, Type, TypeVar, Union
+
+from beanie import Document
+from pydantic import BaseModel
+
+P = TypeVar('P', bound=BaseModel)
+
+
+async def find_projected(
+    document: Type[Document],
+    projection_model: Type[P],
+    *filters: Any,
+    sort: Optional[Union[str, List]] = None,
+    skip: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[P]:
+    """document.find(*filters) returning projection_model instances.
+
+    MongoDB only sends the projected fields (the model's fields, or its
+    Settings.projection) and only those are validated.
+    """
+    query = document.find(*filters, projection_model=projection_model)
+    if sort is not None:
+        query = query.sort(sort)
+    if skip:
+        query = query.skip(skip)
+    if limit:
+        query = query.limit(limit)
+    return await query.to_list()
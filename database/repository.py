@@ -0,0 +1,117 @@
+"""
+Repository - storage interface for the JSON-backed stores
+واجهة التخزين - نفس العمليات فوق MongoDB أو SQLite
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+
+class MirroredCollection:
+    """A data/*.json file and the database collection/table that holds it.
+
+    key_fields identify a record (upsert filter). Content files have no
+    natural id and are addressed by position, so their documents carry an
+    '_order' field (position in the file) and are always read sorted by it.
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        collection: str,
+        key_fields: Tuple[str, ...] = ('_order',),
+        indexes: Optional[List[Tuple[Tuple[str, ...], bool]]] = None
+    ):
+        self.file_name = file_name
+        self.collection = collection
+        self.key_fields = key_fields
+        # ((fields...), unique)
+        self.indexes = indexes or []
+
+    @property
+    def ordered(self) -> bool:
+        return self.key_fields == ('_order',)
+
+    @property
+    def fields(self) -> List[str]:
+        """Every field used by the key or an index, in declaration order"""
+        fields = list(self.key_fields)
+        for index_fields, _ in self.indexes:
+            fields.extend(f for f in index_fields if f not in fields)
+        return fields
+
+    def key_filter(self, doc: Dict) -> Dict:
+        return {field: doc.get(field) for field in self.key_fields}
+
+
+class Repository(ABC):
+    """Operations the stores need from a database backend.
+
+    Queries are equality filters ({field: value}); documents come back
+    without backend-only fields (_id, _order).
+    """
+
+    def __init__(self, collections: Dict[str, MirroredCollection]):
+        self.collections = collections
+
+    @abstractmethod
+    async def ensure_indexes(self):
+        """Create tables/indexes for every collection"""
+
+    async def close(self):
+        """Release connections"""
+
+    # Reads
+
+    @abstractmethod
+    async def find(self, name: str, query: Optional[Dict] = None) -> List[Dict]:
+        """Records matching query (all if None), ordered ones by position"""
+
+    @abstractmethod
+    async def find_one(self, name: str, query: Dict) -> Optional[Dict]:
+        """First record matching query, None if there is none"""
+
+    @abstractmethod
+    async def count(self, name: str, query: Optional[Dict] = None) -> int:
+        """Number of records matching query"""
+
+    @abstractmethod
+    async def group_count(
+        self,
+        name: str,
+        query: Dict,
+        by: Tuple[str, ...],
+        first: Optional[str] = None
+    ) -> List[Dict]:
+        """One row per distinct `by` value: the by fields, 'count' and
+        'first' (value of the `first` field in the oldest record)"""
+
+    # Writes
+
+    @abstractmethod
+    async def upsert(self, name: str, doc: Dict):
+        """Create or replace a keyed record"""
+
+    @abstractmethod
+    async def bulk_upsert(self, name: str, docs: List[Dict]) -> int:
+        """Upsert a batch in order (later records win), returns batch size"""
+
+    @abstractmethod
+    async def save_ordered(
+        self,
+        name: str,
+        doc: Dict,
+        position: Optional[int] = None,
+        match: Optional[Dict] = None,
+        update_fields: Tuple[str, ...] = ()
+    ) -> bool:
+        """Write an entry of an ordered (content) collection.
+
+        position is the entry's index in the JSON file when it was written
+        there too. Otherwise the entry matching `match` gets update_fields
+        set, or the entry is appended at the next free position.
+        Returns True if an existing entry was updated.
+        """
+
+    @abstractmethod
+    async def truncate_ordered(self, name: str, length: int):
+        """Drop entries of an ordered collection at position >= length"""
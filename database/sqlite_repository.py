@@ -0,0 +1,272 @@
+"""
+SQLite Repository - embedded storage for the JSON-backed stores
+مستودع SQLite - تخزين مضمّن بفهارس ومعاملات لحاوية واحدة
+
+Each collection is a table with one column per key/index field (so the
+lookups are indexed) plus the full record as JSON text. The database runs
+in WAL mode: readers never block each other or the single writer.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.repository import MirroredCollection, Repository
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SqliteRepository(Repository):
+    """Repository over an SQLite file (one connection per worker thread)"""
+    MAX_WORKERS = 4
+    BUSY_TIMEOUT = 30  # seconds
+
+    def __init__(self, collections: Dict[str, MirroredCollection], path: Path):
+        super().__init__(collections)
+        self.path = Path(path)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    # ------------------------------------------------------------------
+    # Connections (executed in the worker threads)
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # isolation_level=None: transactions are opened explicitly below.
+        # check_same_thread=False only so close() can run on the loop thread
+        conn = sqlite3.connect(
+            str(self.path),
+            timeout=self.BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._connections.append(conn)
+        self._create_schema(conn)
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            for spec in self.collections.values():
+                table = _quote(spec.collection)
+                # Untyped columns keep the JSON value types (int stays int)
+                columns = ', '.join(_quote(f) for f in spec.fields)
+                conn.execute(f'CREATE TABLE IF NOT EXISTS {table} ({columns}, doc TEXT NOT NULL)')
+                conn.execute(
+                    f'CREATE UNIQUE INDEX IF NOT EXISTS {_quote(spec.collection + "_key")} '
+                    f'ON {table} ({", ".join(_quote(f) for f in spec.key_fields)})'
+                )
+                for fields, unique in spec.indexes:
+                    if tuple(fields) == tuple(spec.key_fields):
+                        continue
+                    index_name = _quote(spec.collection + '_' + '_'.join(fields))
+                    conn.execute(
+                        f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS {index_name} '
+                        f'ON {table} ({", ".join(_quote(f) for f in fields)})'
+                    )
+            self._schema_ready = True
+
+    async def _run(self, func: Callable, *args) -> Any:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.MAX_WORKERS,
+                thread_name_prefix='sqlite-repo'
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connect(), *args))
+
+    async def ensure_indexes(self):
+        await self._run(lambda conn: None)
+        logger.info(f"SqliteRepository: schema ready at {self.path}")
+
+    async def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+        self._local = threading.local()
+
+    # ------------------------------------------------------------------
+    # SQL helpers
+    # ------------------------------------------------------------------
+
+    def _where(self, spec: MirroredCollection, query: Optional[Dict]) -> Tuple[str, List]:
+        if not query:
+            return '', []
+        conditions, params = [], []
+        for field, value in query.items():
+            if field in spec.fields:
+                column = _quote(field)
+            else:
+                column = "json_extract(doc, '$.' || ?)"
+                params.append(field)
+            # IS also matches NULL/None
+            conditions.append(f'{column} IS ?')
+            params.append(value)
+        return ' WHERE ' + ' AND '.join(conditions), params
+
+    def _order_by(self, spec: MirroredCollection) -> str:
+        # Keyed tables keep first-insert order, like the in-memory view
+        return ' ORDER BY "_order"' if spec.ordered else ' ORDER BY rowid'
+
+    @staticmethod
+    def _row(spec: MirroredCollection, doc: Dict) -> List:
+        return [doc.get(f) for f in spec.fields] + [json.dumps(
+            {k: v for k, v in doc.items() if k != '_order'}, ensure_ascii=False
+        )]
+
+    def _upsert_sql(self, spec: MirroredCollection) -> str:
+        columns = spec.fields + ['doc']
+        updates = ', '.join(
+            f'{_quote(c)} = excluded.{_quote(c)}' for c in columns if c not in spec.key_fields
+        )
+        return (
+            f'INSERT INTO {_quote(spec.collection)} ({", ".join(_quote(c) for c in columns)}) '
+            f'VALUES ({", ".join("?" for _ in columns)}) '
+            f'ON CONFLICT ({", ".join(_quote(f) for f in spec.key_fields)}) DO UPDATE SET {updates}'
+        )
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, work: Callable[[], Any]) -> Any:
+        """Run work in one write transaction"""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = work()
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+        return result
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def find(self, name: str, query: Optional[Dict] = None) -> List[Dict]:
+        spec = self.collections[name]
+        where, params = self._where(spec, query)
+        sql = f'SELECT doc FROM {_quote(spec.collection)}{where}{self._order_by(spec)}'
+
+        def run(conn):
+            return [json.loads(doc) for (doc,) in conn.execute(sql, params)]
+
+        return await self._run(run)
+
+    async def find_one(self, name: str, query: Dict) -> Optional[Dict]:
+        spec = self.collections[name]
+        where, params = self._where(spec, query)
+        sql = f'SELECT doc FROM {_quote(spec.collection)}{where}{self._order_by(spec)} LIMIT 1'
+
+        def run(conn):
+            row = conn.execute(sql, params).fetchone()
+            return json.loads(row[0]) if row else None
+
+        return await self._run(run)
+
+    async def count(self, name: str, query: Optional[Dict] = None) -> int:
+        spec = self.collections[name]
+        where, params = self._where(spec, query)
+        sql = f'SELECT COUNT(*) FROM {_quote(spec.collection)}{where}'
+        return await self._run(lambda conn: conn.execute(sql, params).fetchone()[0])
+
+    async def group_count(
+        self,
+        name: str,
+        query: Dict,
+        by: Tuple[str, ...],
+        first: Optional[str] = None
+    ) -> List[Dict]:
+        spec = self.collections[name]
+        where, params = self._where(spec, query)
+        group = ', '.join(_quote(f) for f in by)
+        # With MIN(rowid), SQLite takes the bare doc column from that row
+        sql = (
+            f'SELECT {group}, COUNT(*), doc, MIN(rowid) FROM {_quote(spec.collection)}{where} '
+            f'GROUP BY {group} ORDER BY {group}'
+        )
+
+        def run(conn):
+            rows = []
+            for row in conn.execute(sql, params):
+                entry = dict(zip(by, row[:len(by)]))
+                entry['count'] = row[len(by)]
+                entry['first'] = json.loads(row[len(by) + 1]).get(first) if first else None
+                rows.append(entry)
+            return rows
+
+        return await self._run(run)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def upsert(self, name: str, doc: Dict):
+        spec = self.collections[name]
+        sql = self._upsert_sql(spec)
+        row = self._row(spec, doc)
+        await self._run(lambda conn: self._write(conn, lambda: conn.execute(sql, row)))
+
+    async def bulk_upsert(self, name: str, docs: List[Dict]) -> int:
+        if not docs:
+            return 0
+        spec = self.collections[name]
+        sql = self._upsert_sql(spec)
+        rows = [self._row(spec, d) for d in docs]
+        await self._run(lambda conn: self._write(conn, lambda: conn.executemany(sql, rows)))
+        return len(docs)
+
+    async def save_ordered(
+        self,
+        name: str,
+        doc: Dict,
+        position: Optional[int] = None,
+        match: Optional[Dict] = None,
+        update_fields: Tuple[str, ...] = ()
+    ) -> bool:
+        spec = self.collections[name]
+        table = _quote(spec.collection)
+        upsert_sql = self._upsert_sql(spec)
+
+        def work(conn):
+            if position is not None:
+                conn.execute(upsert_sql, self._row(spec, {**doc, '_order': position}))
+                return False
+            if match:
+                where, params = self._where(spec, match)
+                row = conn.execute(f'SELECT "_order", doc FROM {table}{where} ORDER BY "_order" LIMIT 1', params).fetchone()
+                if row:
+                    existing = json.loads(row[1])
+                    existing.update({f: doc.get(f) for f in update_fields})
+                    conn.execute(upsert_sql, self._row(spec, {**existing, '_order': row[0]}))
+                    return True
+            (last,) = conn.execute(f'SELECT MAX("_order") FROM {table}').fetchone()
+            order = 0 if last is None else last + 1
+            conn.execute(upsert_sql, self._row(spec, {**doc, '_order': order}))
+            return False
+
+        return await self._run(lambda conn: self._write(conn, lambda: work(conn)))
+
+    async def truncate_ordered(self, name: str, length: int):
+        table = _quote(self.collections[name].collection)
+        sql = f'DELETE FROM {table} WHERE "_order" >= ?'
+        await self._run(lambda conn: self._write(conn, lambda: conn.execute(sql, [length])))
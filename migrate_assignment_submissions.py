@@ -0,0 +1,64 @@
+"""
+Move embedded Assignment.submissions into the assignment_submissions collection
+نقل تسليمات الواجبات من داخل مستند الواجب إلى مجموعة مستقلة
+
+Run once after deploying the AssignmentSubmission collection. Submissions
+that already exist in the new collection (e.g. re-submitted since the
+deploy) are kept; the embedded array is removed from each assignment once
+its submissions are copied. Safe to re-run.
+"""
+import asyncio
+from loguru import logger
+from pymongo import UpdateOne
+
+from database.connection import init_db, close_db
+from database.models.assignment import Assignment, AssignmentSubmission
+
+
+async def migrate_submissions():
+    """Copy embedded submissions to their own collection"""
+    print("\n" + "="*60)
+    print("📦 نقل تسليمات الواجبات إلى مجموعة مستقلة")
+    print("="*60)
+
+    await init_db()
+
+    try:
+        assignments = Assignment.get_motor_collection()
+        submissions = AssignmentSubmission.get_motor_collection()
+
+        moved = 0
+        migrated_assignments = 0
+        cursor = assignments.find(
+            {"submissions.0": {"$exists": True}},
+            {"submissions": 1}
+        )
+        async for assignment in cursor:
+            operations = []
+            for submission in assignment["submissions"]:
+                submission.pop("_id", None)
+                submission.pop("revision_id", None)
+                submission["assignment_id"] = assignment["_id"]
+                operations.append(UpdateOne(
+                    {"assignment_id": assignment["_id"], "user_id": submission.get("user_id")},
+                    {"$setOnInsert": submission},
+                    upsert=True
+                ))
+
+            await submissions.bulk_write(operations, ordered=False)
+            await assignments.update_one({"_id": assignment["_id"]}, {"$unset": {"submissions": ""}})
+            moved += len(operations)
+            migrated_assignments += 1
+
+        print(f"✅ تم نقل {moved} تسليم من {migrated_assignments} واجب")
+
+    except Exception as e:
+        logger.error(f"Error migrating submissions: {e}")
+        print(f"❌ خطأ: {e}")
+
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_submissions())
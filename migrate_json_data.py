@@ -0,0 +1,223 @@
+"""
+Import/export data/*.json to the database backend
+نقل ملفات JSON إلى قاعدة البيانات (MongoDB أو SQLite) وتصديرها
+
+    python migrate_json_data.py import
+    python migrate_json_data.py export [directory]   (default: data/export)
+
+import streams videos.json, assignments.json, exams.json, submissions.json
+(plus its pending journal) and exam_grades.json into the DATA_BACKEND
+database (see database/data_bridge.py), creating its indexes first.
+Records are upserted, so it can be re-run safely. export writes the
+database contents back out in the same JSON format.
+
+Cut-over (with DATA_BACKEND=mongo or sqlite set for the script):
+    1. python migrate_json_data.py import
+    2. deploy with DATA_BACKEND + DATA_DUAL_WRITE=True   (writes go to both)
+    3. python migrate_json_data.py import                (catch up writes made between 1 and 2)
+    4. set DATA_DUAL_WRITE=False (mongo: scale out)
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+
+from loguru import logger
+
+from database.connection import close_db
+from database.data_bridge import DataBridge
+from utils.json_storage import JsonStorage
+from utils.submission_store import SubmissionStore
+
+BATCH_SIZE = 500
+CHUNK_SIZE = 1 << 16
+
+
+def iter_json_array(path: Path, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the items of a top-level JSON array without loading the whole file"""
+    if not path.exists():
+        return
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buf = ''
+        eof = False
+
+        def read_more() -> bool:
+            nonlocal buf, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf += chunk
+            return True
+
+        while not buf.strip() and read_more():
+            pass
+        buf = buf.lstrip()
+        if not buf:
+            return
+        if buf[0] != '[':
+            raise ValueError(f"{path.name}: expected a JSON array")
+        buf = buf[1:]
+
+        while True:
+            buf = buf.lstrip()
+            if not buf:
+                if not read_more():
+                    raise ValueError(f"{path.name}: unexpected end of file")
+                continue
+            if buf[0] == ']':
+                return
+            if buf[0] == ',':
+                buf = buf[1:]
+                continue
+            try:
+                item, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                if not read_more():
+                    raise
+                continue
+            if end == len(buf) and not eof:
+                # A number may continue in the next chunk
+                read_more()
+                continue
+            yield item
+            buf = buf[end:]
+
+
+def iter_journal(path: Path) -> Iterator[Dict]:
+    """Yield the records of an NDJSON journal, skipping torn lines"""
+    if not path.exists():
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping bad journal line {path.name}:{line_no}")
+
+
+def batches(items: Iterable[Dict], size: int = BATCH_SIZE) -> Iterator[List[Dict]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def migrate_content(name: str) -> int:
+    """videos / assignments / exams - keyed by position in the file"""
+    path = JsonStorage.path(DataBridge.collections[name].file_name)
+    ordered = (
+        {**entry, '_order': i}
+        for i, entry in enumerate(iter_json_array(path))
+    )
+    total = 0
+    for batch in batches(ordered):
+        total += await DataBridge.bulk_upsert(name, batch)
+
+    # Entries removed from the file since a previous run
+    await DataBridge.truncate_ordered(name, total)
+    return total
+
+
+async def migrate_keyed(name: str, records: Iterable[Dict]) -> int:
+    """submissions / exam_grades - keyed by student and item"""
+    normalized = (
+        {**r, 'student_id': str(r.get('student_id'))}
+        for r in records
+        if isinstance(r, dict)
+    )
+    total = 0
+    for batch in batches(normalized):
+        total += await DataBridge.bulk_upsert(name, batch)
+    return total
+
+
+def submission_records() -> Iterator[Dict]:
+    """Snapshot first, then the journals (same order the store replays them)"""
+    snapshot, journal, rotated = SubmissionStore._paths()
+    yield from iter_json_array(snapshot)
+    yield from iter_journal(rotated)
+    yield from iter_journal(journal)
+
+
+async def import_all():
+    """Copy every JSON store into the database"""
+    print("\n" + "="*60)
+    print(f"📦 نقل ملفات JSON إلى {DataBridge.backend()}")
+    print("="*60)
+
+    try:
+        await DataBridge.ensure_indexes()
+
+        for name in ('videos', 'assignments', 'exams'):
+            count = await migrate_content(name)
+            print(f"✅ {name}: {count}")
+
+        count = await migrate_keyed('submissions', submission_records())
+        print(f"✅ submissions: {count} سجل")
+
+        grades_path = JsonStorage.path(DataBridge.collections['exam_grades'].file_name)
+        count = await migrate_keyed('exam_grades', iter_json_array(grades_path))
+        print(f"✅ exam_grades: {count}")
+
+        print("\n" + "="*60)
+        print("✅ تم النقل بنجاح!")
+        print("="*60)
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        print(f"❌ خطأ: {e}")
+
+    finally:
+        await DataBridge.close()
+        await close_db()
+
+
+async def export_all(directory: Path):
+    """Write every store from the database back to JSON files"""
+    print("\n" + "="*60)
+    print(f"📤 تصدير {DataBridge.backend()} إلى {directory}")
+    print("="*60)
+
+    try:
+        for name, spec in DataBridge.collections.items():
+            records = await DataBridge.find(name)
+            await JsonStorage.run(JsonStorage._write_sync, directory / spec.file_name, records)
+            print(f"✅ {spec.file_name}: {len(records)}")
+
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        print(f"❌ خطأ: {e}")
+
+    finally:
+        await DataBridge.close()
+        await close_db()
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command not in ('import', 'export'):
+        print(__doc__)
+        sys.exit(1)
+    if DataBridge.backend() == 'json':
+        print("❌ DATA_BACKEND=json - set DATA_BACKEND=mongo or sqlite first")
+        sys.exit(1)
+
+    if command == 'import':
+        asyncio.run(import_all())
+    else:
+        directory = Path(sys.argv[2]) if len(sys.argv) > 2 else JsonStorage.path('export')
+        asyncio.run(export_all(directory))
+
+
+if __name__ == "__main__":
+    main()
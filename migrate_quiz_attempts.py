@@ -0,0 +1,69 @@
+"""
+Move embedded Quiz.attempts into the quiz_attempts collection
+نقل محاولات الاختبارات من داخل مستند الاختبار إلى مجموعة مستقلة
+
+Run once after deploying the QuizAttempt collection. Each user's embedded
+attempts are numbered 1, 2, ... in array order; attempts that already
+exist in the new collection under the same number are kept. The embedded
+array is removed from each quiz once its attempts are copied. Safe to
+re-run.
+"""
+import asyncio
+from loguru import logger
+from pymongo import UpdateOne
+
+from database.connection import init_db, close_db
+from database.models.quiz import Quiz, QuizAttempt
+
+
+async def migrate_attempts():
+    """Copy embedded attempts to their own collection"""
+    print("\n" + "="*60)
+    print("📦 نقل محاولات الاختبارات إلى مجموعة مستقلة")
+    print("="*60)
+
+    await init_db()
+
+    try:
+        quizzes = Quiz.get_motor_collection()
+        attempts = QuizAttempt.get_motor_collection()
+
+        moved = 0
+        migrated_quizzes = 0
+        cursor = quizzes.find(
+            {"attempts.0": {"$exists": True}},
+            {"attempts": 1}
+        )
+        async for quiz in cursor:
+            operations = []
+            numbers = {}
+            for attempt in quiz["attempts"]:
+                attempt.pop("_id", None)
+                attempt.pop("revision_id", None)
+                user_id = attempt.get("user_id")
+                numbers[user_id] = numbers.get(user_id, 0) + 1
+                attempt["quiz_id"] = quiz["_id"]
+                attempt["attempt_number"] = numbers[user_id]
+                operations.append(UpdateOne(
+                    {"quiz_id": quiz["_id"], "user_id": user_id, "attempt_number": numbers[user_id]},
+                    {"$setOnInsert": attempt},
+                    upsert=True
+                ))
+
+            await attempts.bulk_write(operations, ordered=False)
+            await quizzes.update_one({"_id": quiz["_id"]}, {"$unset": {"attempts": ""}})
+            moved += len(operations)
+            migrated_quizzes += 1
+
+        print(f"✅ تم نقل {moved} محاولة من {migrated_quizzes} اختبار")
+
+    except Exception as e:
+        logger.error(f"Error migrating quiz attempts: {e}")
+        print(f"❌ خطأ: {e}")
+
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_attempts())
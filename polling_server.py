@@ -12,7 +12,7 @@ from fastapi import FastAPI, Request
 from telegram import Update
 
 from config.settings import settings
-from bot.main import create_application
+from bot.main import create_application, start_services, stop_services
 from database.connection import Database
 
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN") or settings.TELEGRAM_BOT_TOKEN
@@ -105,6 +105,11 @@ async def startup():
     except Exception as e:
         logger.error(f"❌ Failed to initialize database: {repr(e)}", exc_info=True)
         print(f"❌ Failed to initialize database: {repr(e)}", flush=True)
+
+    # Refuse to start if a catalogued query would scan its collection
+    if settings.INDEX_CHECK_ON_STARTUP:
+        from database.index_catalog import check_query_plans
+        await check_query_plans()
     
     # Create and start bot
     try:
@@ -116,6 +121,8 @@ async def startup():
         # Initialize bot
         await telegram_app.initialize()
         await telegram_app.start()
+        # post_init only runs under run_polling()/run_webhook()
+        await start_services(telegram_app)
         logger.info("✅ Telegram bot initialized")
         print("✅ Telegram bot initialized", flush=True)
         
@@ -175,6 +182,10 @@ async def shutdown():
             pass
     
     if telegram_app:
+        try:
+            await stop_services(telegram_app)
+        except Exception as e:
+            logger.error(f"❌ Failed to stop bot services: {repr(e)}")
         try:
             await telegram_app.stop()
             await telegram_app.shutdown()
@@ -0,0 +1,38 @@
+"""
+Rebuild the stats_rollups counters from the source collections
+إعادة بناء عدادات الإحصائيات من البيانات الأصلية
+
+The bot and dashboard build them on startup if they were never built.
+Run this whenever they may have drifted (an increment failed, data was
+edited by hand). Safe to re-run; run it while the platform is quiet
+since it replaces every totals counter. Days already recorded are kept.
+"""
+import asyncio
+from loguru import logger
+
+from database.connection import init_db, close_db
+from utils.stats_rollups import rebuild_rollups
+
+
+async def rebuild():
+    """Recompute the rollup totals"""
+    print("\n" + "="*60)
+    print("📊 إعادة بناء عدادات الإحصائيات")
+    print("="*60)
+
+    await init_db()
+
+    try:
+        scopes = await rebuild_rollups()
+        print(f"✅ تم تحديث {scopes} عداد")
+
+    except Exception as e:
+        logger.error(f"Error rebuilding stats rollups: {e}")
+        print(f"❌ خطأ: {e}")
+
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
@@ -7,8 +7,11 @@ from loguru import logger
 from database.connection import init_db, close_db
 from database.models.user import User
 from database.models.video import Video
-from database.models.assignment import Assignment
+from database.models.assignment import Assignment, AssignmentSubmission
 from database.models.notification import Notification
+from database.models.quiz import QuizAttempt
+from database.models.stats_rollup import StatsRollup
+from database.models.report_job import ReportJob
 
 
 async def reset_database():
@@ -47,12 +50,32 @@ async def reset_database():
         logger.info(f"Deleted {assignments_count} assignments from MongoDB")
         print(f"✅ تم حذف {assignments_count} واجب/اختبار من MongoDB")
         
+        # Delete all assignment submissions (they reference the assignments above)
+        submissions_count = await AssignmentSubmission.find().count()
+        await AssignmentSubmission.find().delete()
+        logger.info(f"Deleted {submissions_count} assignment submissions")
+        print(f"✅ تم حذف {submissions_count} تسليم واجب")
+        
+        # Delete all quiz attempts
+        attempts_count = await QuizAttempt.find().count()
+        await QuizAttempt.find().delete()
+        logger.info(f"Deleted {attempts_count} quiz attempts")
+        print(f"✅ تم حذف {attempts_count} محاولة اختبار")
+        
         # Delete all notifications
         notifications_count = await Notification.find().count()
         await Notification.find().delete()
         logger.info(f"Deleted {notifications_count} notifications")
         print(f"✅ تم حذف {notifications_count} إشعار")
         
+        # Delete the statistics counters; the next startup rebuilds them
+        await StatsRollup.find().delete()
+        print("✅ تم حذف عدادات الإحصائيات")
+        
+        # Delete queued and finished report exports
+        await ReportJob.find().delete()
+        print("✅ تم حذف طلبات التقارير")
+        
         # Delete JSON files
         import json
         from pathlib import Path
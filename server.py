@@ -16,7 +16,7 @@ from loguru import logger
 from telegram import Update
 
 from config.settings import settings
-from bot.main import create_application
+from bot.main import create_application, start_services, stop_services
 from admin_dashboard.app import app as dashboard_app
 from utils.notifications import NotificationScheduler
 
@@ -62,6 +62,11 @@ async def on_startup() -> None:
         print(f"❌ Failed to initialize database: {repr(e)}", flush=True)
         # Don't raise - allow server to start even if DB fails initially
         print("⚠️ Server continuing without database connection", flush=True)
+
+    # Refuse to start if a catalogued query would scan its collection
+    if settings.INDEX_CHECK_ON_STARTUP:
+        from database.index_catalog import check_query_plans
+        await check_query_plans()
     
     # Start Telegram bot (webhook mode)
     try:
@@ -69,6 +74,8 @@ async def on_startup() -> None:
         print("🤖 Initializing Telegram bot...", flush=True)
         await telegram_app.initialize()
         await telegram_app.start()
+        # post_init only runs under run_polling()/run_webhook()
+        await start_services(telegram_app)
         logger.info("✅ Telegram bot initialized")
         print("✅ Telegram bot initialized", flush=True)
 
@@ -141,6 +148,7 @@ async def on_shutdown() -> None:
             pass
 
     # Stop Telegram bot
+    await stop_services(telegram_app)
     await telegram_app.stop()
     await telegram_app.shutdown()
 
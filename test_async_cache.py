@@ -0,0 +1,198 @@
+"""
+Async Cache Test - hits, stale-while-revalidate, single-flight, invalidation
+اختبار التخزين المؤقت
+
+Run with: python -m pytest test_async_cache.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.cache import AsyncCache, cached
+
+
+class Source:
+    """Counts computations; each call returns the next number"""
+
+    def __init__(self, delay: float = 0):
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        value = self.calls
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return value
+
+
+@pytest.fixture(autouse=True)
+def families():
+    saved = dict(AsyncCache._families)
+    yield
+    AsyncCache._families.clear()
+    AsyncCache._families.update(saved)
+
+
+def test_hit_within_ttl():
+    AsyncCache.register("t", ttl=60)
+    source = Source()
+
+    async def run():
+        return [await AsyncCache.get("t", "k", source) for _ in range(3)]
+
+    assert asyncio.run(run()) == [1, 1, 1]
+    assert source.calls == 1
+    stats = AsyncCache.stats()["t"]
+    assert (stats["misses"], stats["hits"], stats["entries"]) == (1, 2, 1)
+
+
+def test_concurrent_misses_share_one_computation():
+    AsyncCache.register("t", ttl=60)
+    source = Source(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(AsyncCache.get("t", "k", source) for _ in range(5)))
+
+    assert asyncio.run(run()) == [1] * 5
+    assert source.calls == 1
+
+
+def test_stale_value_is_served_while_refreshing():
+    AsyncCache.register("t", ttl=0.1, stale_ttl=60)
+    source = Source(delay=0.05)
+
+    async def run():
+        first = await AsyncCache.get("t", "k", source)
+        await asyncio.sleep(0.12)
+        # Expired but within stale_ttl: the old value, refreshed in the background
+        stale = await AsyncCache.get("t", "k", source)
+        again = await AsyncCache.get("t", "k", source)
+        await asyncio.sleep(0.07)
+        fresh = await AsyncCache.get("t", "k", source)
+        return first, stale, again, fresh
+
+    assert asyncio.run(run()) == (1, 1, 1, 2)
+    # Two stale hits started only one refresh
+    assert source.calls == 2
+    assert AsyncCache.stats()["t"]["stale_hits"] == 2
+
+
+def test_expired_past_stale_ttl_is_recomputed():
+    AsyncCache.register("t", ttl=0.02, stale_ttl=0.02)
+    source = Source()
+
+    async def run():
+        first = await AsyncCache.get("t", "k", source)
+        await asyncio.sleep(0.05)
+        return first, await AsyncCache.get("t", "k", source)
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_failed_refresh_keeps_stale_value():
+    AsyncCache.register("t", ttl=0.02, stale_ttl=60)
+    values = iter([1])
+
+    async def compute():
+        try:
+            return next(values)
+        except StopIteration:
+            raise RuntimeError("database down")
+
+    async def run():
+        await AsyncCache.get("t", "k", compute)
+        await asyncio.sleep(0.03)
+        stale = await AsyncCache.get("t", "k", compute)
+        await asyncio.sleep(0.01)
+        return stale, await AsyncCache.get("t", "k", compute)
+
+    assert asyncio.run(run()) == (1, 1)
+    assert AsyncCache.stats()["t"]["errors"] >= 1
+
+
+def test_empty_results_are_not_stored():
+    AsyncCache.register("t", ttl=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {}
+
+    async def run():
+        await AsyncCache.get("t", "k", compute)
+        await AsyncCache.get("t", "k", compute)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_invalidating_a_key_keeps_other_keys_computing():
+    AsyncCache.register("t", ttl=60)
+    a, b = Source(delay=0.05), Source(delay=0.05)
+
+    async def run():
+        task_a = asyncio.create_task(AsyncCache.get("t", "a", a))
+        task_b = asyncio.create_task(AsyncCache.get("t", "b", b))
+        await asyncio.sleep(0.01)
+        AsyncCache.invalidate("t", "a")
+        await asyncio.gather(task_a, task_b)
+        # b's computation was stored, a's (started before the invalidation) was not
+        return await AsyncCache.get("t", "a", a), await AsyncCache.get("t", "b", b)
+
+    assert asyncio.run(run()) == (2, 1)
+    assert (a.calls, b.calls) == (2, 1)
+
+
+def test_invalidating_the_family_drops_everything():
+    AsyncCache.register("t", ttl=60)
+    source = Source()
+
+    async def run():
+        await AsyncCache.get("t", "a", source)
+        await AsyncCache.get("t", "b", source)
+        AsyncCache.invalidate("t")
+        return await AsyncCache.get("t", "a", source)
+
+    assert asyncio.run(run()) == 3
+    assert AsyncCache.stats()["t"]["entries"] == 1
+
+
+def test_fire_invalidates_by_event_key():
+    AsyncCache.register("per_user", ttl=60, invalidate_on={"grade": "user_id"})
+    AsyncCache.register("global", ttl=60, invalidate_on={"grade": None})
+    AsyncCache.register("other", ttl=60, invalidate_on={"review": None})
+    source = Source()
+
+    async def run():
+        for family in ("per_user", "global", "other"):
+            await AsyncCache.get(family, 1, source)
+        await AsyncCache.get("per_user", 2, source)
+        AsyncCache.fire("grade", user_id=1)
+
+    asyncio.run(run())
+    stats = AsyncCache.stats()
+    assert stats["per_user"]["entries"] == 1
+    assert stats["global"]["entries"] == 0
+    assert stats["other"]["entries"] == 1
+
+
+def test_cached_decorator_keys_on_arguments():
+    calls = []
+
+    @cached("decorated", ttl=60, key=lambda user_id, verbose=False: user_id)
+    async def lookup(user_id, verbose=False):
+        calls.append(user_id)
+        return {"user": user_id}
+
+    async def run():
+        await lookup(1)
+        await lookup(1, verbose=True)
+        await lookup(2)
+
+    asyncio.run(run())
+    assert calls == [1, 2]
@@ -0,0 +1,159 @@
+"""
+Submission Store Test - journal replay, torn lines and compaction
+اختبار مخزن التسليمات
+
+Run with: python -m pytest test_submission_store.py
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+os.environ.setdefault("TELEGRAM_ADMIN_ID", "1")
+os.environ["DATA_BACKEND"] = "json"
+
+from utils.grading_queue import GradingIndex
+from utils.json_storage import JsonStorage
+from utils.submission_store import SubmissionStore, submission_key
+
+
+def submission(student_id, assignment_index=0, status="pending", **extra):
+    return {
+        "student_id": str(student_id),
+        "course_id": "python",
+        "assignment_index": assignment_index,
+        "assignment_title": f"Assignment {assignment_index}",
+        "status": status,
+        **extra,
+    }
+
+
+def reset_store():
+    """Forget the in-memory view, as a restarted bot would"""
+    SubmissionStore._view = {}
+    SubmissionStore._queue = GradingIndex("assignment_index")
+    SubmissionStore._loaded = False
+    SubmissionStore._lock = None
+    SubmissionStore._compact_lock = None
+    SubmissionStore._journal_records = 0
+    SubmissionStore._compaction_task = None
+    JsonStorage._locks = {}
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(JsonStorage, "data_dir", tmp_path)
+    reset_store()
+    yield tmp_path
+    reset_store()
+
+
+def test_journal_replay(data_dir):
+    async def write():
+        await SubmissionStore.put(submission(1))
+        await SubmissionStore.put(submission(2))
+        await SubmissionStore.put(submission(1, text="second try"))
+
+    asyncio.run(write())
+    assert not (data_dir / SubmissionStore.SNAPSHOT_FILE).exists()
+    assert len((data_dir / SubmissionStore.JOURNAL_FILE).read_text(encoding="utf-8").splitlines()) == 3
+
+    reset_store()
+
+    async def read():
+        return await SubmissionStore.count(), await SubmissionStore.get(1, "python", 0)
+
+    count, first = asyncio.run(read())
+    assert count == 2
+    assert first["text"] == "second try"
+    assert SubmissionStore._journal_records == 3
+
+
+def test_torn_line_is_skipped_and_terminated(data_dir):
+    journal = data_dir / SubmissionStore.JOURNAL_FILE
+    good = json.dumps(submission(1)) + "\n"
+    # A crash mid-append leaves half a record without its newline
+    journal.write_text(good + json.dumps(submission(2))[:20], encoding="utf-8")
+
+    async def load_and_append():
+        before = await SubmissionStore.count()
+        await SubmissionStore.put(submission(3))
+        return before
+
+    assert asyncio.run(load_and_append()) == 1
+    lines = journal.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[-1])["student_id"] == "3"
+
+    reset_store()
+
+    async def reload():
+        return sorted(s["student_id"] for s in await SubmissionStore.list_all())
+
+    assert asyncio.run(reload()) == ["1", "3"]
+
+
+def test_compaction_folds_journal_into_snapshot(data_dir):
+    async def write_and_compact():
+        for student_id in range(5):
+            await SubmissionStore.put(submission(student_id))
+        await SubmissionStore.grade(0, "python", 0, 90, "good", "2026-01-01")
+        await SubmissionStore.compact()
+
+    asyncio.run(write_and_compact())
+    journal = data_dir / SubmissionStore.JOURNAL_FILE
+    assert not journal.exists()
+    assert not journal.with_suffix(".compacting").exists()
+    snapshot = json.loads((data_dir / SubmissionStore.SNAPSHOT_FILE).read_text(encoding="utf-8"))
+    assert len(snapshot) == 5
+    assert SubmissionStore._journal_records == 0
+
+    reset_store()
+
+    async def reload():
+        graded = await SubmissionStore.list_by_status("graded", "python", 0)
+        pending = await SubmissionStore.count_by_status("pending", "python", 0)
+        return graded, pending
+
+    graded, pending = asyncio.run(reload())
+    assert [s["grade"] for s in graded] == [90]
+    assert pending == 4
+
+
+def test_interrupted_compaction_is_replayed(data_dir):
+    # The rotated journal of a compaction that died before the snapshot
+    rotated = (data_dir / SubmissionStore.JOURNAL_FILE).with_suffix(".compacting")
+    rotated.write_text(json.dumps(submission(1, status="graded")) + "\n", encoding="utf-8")
+    (data_dir / SubmissionStore.JOURNAL_FILE).write_text(json.dumps(submission(2)) + "\n", encoding="utf-8")
+
+    async def load():
+        return await SubmissionStore.count()
+
+    assert asyncio.run(load()) == 2
+    assert SubmissionStore._view[submission_key(1, "python", 0)]["status"] == "graded"
+
+
+def test_grade_and_resubmission_do_not_lose_writes(data_dir):
+    async def race():
+        await SubmissionStore.put(submission(1))
+        await asyncio.gather(
+            SubmissionStore.grade(1, "python", 0, 75, "ok", "2026-01-01"),
+            SubmissionStore.put(submission(1, text="resubmitted")),
+        )
+        return await SubmissionStore.get(1, "python", 0)
+
+    final = asyncio.run(race())
+    # Whichever order the lock picked, the last journal record is the view
+    last = json.loads((data_dir / SubmissionStore.JOURNAL_FILE).read_text(encoding="utf-8").splitlines()[-1])
+    assert final == last
+    if final["status"] == "graded":
+        assert final["text"] == "resubmitted"
+
+
+def test_grade_missing_submission(data_dir):
+    assert asyncio.run(SubmissionStore.grade(9, "python", 0, 50, "", "2026-01-01")) is None
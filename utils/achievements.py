@@ -5,11 +5,13 @@ Achievements and Badges System
 from datetime import datetime, timedelta
 from typing import List, Dict
 from loguru import logger
+from beanie.operators import In
 
 from database.models.user import User
-from database.models.assignment import Assignment
-from database.models.quiz import Quiz
+from database.models.assignment import Assignment, AssignmentSubmission
+from database.models.quiz import QuizAttempt
 from utils.notifications import SmartNotificationManager
+from utils.cache import AsyncCache, cached
 
 
 class Achievement:
@@ -147,34 +149,42 @@ class AchievementManager:
         """Check if user has enrolled in a course"""
         return len(user.courses) > 0
     
+    @staticmethod
+    async def _user_submissions(user: User) -> List[tuple]:
+        """(submission, assignment) pairs for the user's submissions"""
+        submissions = await AssignmentSubmission.find(
+            AssignmentSubmission.user_id == str(user.telegram_id)
+        ).to_list()
+        if not submissions:
+            return []
+        assignments = await Assignment.find(
+            In(Assignment.id, [s.assignment_id for s in submissions])
+        ).to_list()
+        by_id = {a.id: a for a in assignments}
+        return [(s, by_id[s.assignment_id]) for s in submissions if s.assignment_id in by_id]
+    
     @staticmethod
     async def check_first_submission(user: User) -> bool:
         """Check if user has submitted an assignment"""
-        assignments = await Assignment.find().to_list()
-        for assignment in assignments:
-            if assignment.has_submitted(str(user.telegram_id)):
-                return True
-        return False
+        return await AssignmentSubmission.find_one(
+            AssignmentSubmission.user_id == str(user.telegram_id)
+        ) is not None
     
     @staticmethod
     async def check_perfect_score(user: User) -> bool:
         """Check if user got 100/100"""
-        assignments = await Assignment.find().to_list()
-        for assignment in assignments:
-            submission = assignment.get_submission(str(user.telegram_id))
-            if submission and submission.grade == assignment.max_grade:
+        for submission, assignment in await AchievementManager._user_submissions(user):
+            if submission.grade == assignment.max_grade:
                 return True
         return False
     
     @staticmethod
     async def check_high_achiever(user: User) -> bool:
         """Check if average grade is above 90%"""
-        assignments = await Assignment.find().to_list()
         grades = []
         
-        for assignment in assignments:
-            submission = assignment.get_submission(str(user.telegram_id))
-            if submission and submission.grade is not None:
+        for submission, assignment in await AchievementManager._user_submissions(user):
+            if submission.grade is not None:
                 percentage = (submission.grade / assignment.max_grade) * 100
                 grades.append(percentage)
         
@@ -186,12 +196,10 @@ class AchievementManager:
     @staticmethod
     async def check_dedicated_student(user: User) -> bool:
         """Check if submitted 5 assignments on time"""
-        assignments = await Assignment.find().to_list()
         on_time_count = 0
         
-        for assignment in assignments:
-            submission = assignment.get_submission(str(user.telegram_id))
-            if submission and assignment.deadline:
+        for submission, assignment in await AchievementManager._user_submissions(user):
+            if assignment.deadline:
                 if submission.submitted_at <= assignment.deadline:
                     on_time_count += 1
         
@@ -208,25 +216,26 @@ class AchievementManager:
     @staticmethod
     async def check_quiz_master(user: User) -> bool:
         """Check if passed 5 quizzes"""
-        quizzes = await Quiz.find().to_list()
-        passed_count = 0
-        
-        for quiz in quizzes:
-            best = quiz.get_best_attempt(str(user.telegram_id))
-            if best and best.passed:
-                passed_count += 1
+        passed_attempts = await QuizAttempt.find(
+            QuizAttempt.user_id == str(user.telegram_id),
+            QuizAttempt.passed == True
+        ).to_list()
+        passed_count = len({a.quiz_id for a in passed_attempts})
         
         return passed_count >= 5
     
     @staticmethod
     async def check_early_bird(user: User) -> bool:
         """Check if first to submit"""
-        assignments = await Assignment.find().to_list()
-        for assignment in assignments:
-            if len(assignment.submissions) > 0:
-                first_submission = min(assignment.submissions, key=lambda s: s.submitted_at)
-                if first_submission.user_id == str(user.telegram_id):
-                    return True
+        user_submissions = await AssignmentSubmission.find(
+            AssignmentSubmission.user_id == str(user.telegram_id)
+        ).to_list()
+        for submission in user_submissions:
+            first_submission = await AssignmentSubmission.find(
+                AssignmentSubmission.assignment_id == submission.assignment_id
+            ).sort(AssignmentSubmission.submitted_at).first_or_none()
+            if first_submission and first_submission.user_id == submission.user_id:
+                return True
         return False
     
     @staticmethod
@@ -281,6 +290,7 @@ class AchievementManager:
                 user.achievement_points += achievement.points
                 
                 await user.save()
+                AsyncCache.fire("achievement", user_id=user.telegram_id)
                 
                 # Send notification
                 await SmartNotificationManager.send_achievement_notification(
@@ -305,6 +315,8 @@ class AchievementManager:
             await cls.award_achievement(user, achievement)
     
     @classmethod
+    @cached("achievements", ttl=300, stale_ttl=900, key=lambda cls, telegram_id: int(telegram_id),
+            invalidate_on={"achievement": "user_id"})
     async def get_user_achievements(cls, telegram_id: int) -> Dict:
         """Get user's achievement statistics"""
         if not cls.ACHIEVEMENTS:
@@ -0,0 +1,130 @@
+"""
+Activity Buffer - write-behind for User.last_active and activity counters
+تجميع نشاط المستخدمين في الذاكرة وكتابته دفعة واحدة
+
+Handlers call touch()/increment() instead of saving the user document.
+Changes are merged per user in memory and written every FLUSH_SECONDS as
+one bulk_write of partial updates ($max last_active, $inc counters).
+bot/main.py start_services() starts the flusher and stop_services()
+flushes what is left; the first touch() also starts it, so updates are
+never buffered without a flusher.
+A crash loses at most FLUSH_SECONDS of activity data.
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional
+
+from loguru import logger
+from pymongo import UpdateOne
+
+from database.models.user import User
+
+
+class UserActivityBuffer:
+    """Coalesces per-user activity updates between flushes"""
+    FLUSH_SECONDS = 30
+    COUNTERS = (
+        'total_videos_watched',
+        'total_assignments_submitted',
+        'total_exams_taken',
+        'total_points',
+    )
+
+    # telegram_id -> {'last_active': datetime, 'inc': {counter: amount}}
+    _pending: Dict[int, Dict] = {}
+    _task: Optional[asyncio.Task] = None
+    _flush_lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def _entry(cls, telegram_id: int) -> Dict:
+        return cls._pending.setdefault(int(telegram_id), {'last_active': None, 'inc': {}})
+
+    @classmethod
+    def touch(cls, telegram_id: int, at: Optional[datetime] = None):
+        """Record activity now (or at `at`)"""
+        if cls._task is None:
+            cls.start()
+        entry = cls._entry(telegram_id)
+        at = at or datetime.utcnow()
+        if entry['last_active'] is None or at > entry['last_active']:
+            entry['last_active'] = at
+
+    @classmethod
+    def increment(cls, telegram_id: int, counter: str, amount: int = 1):
+        """Add to one of COUNTERS; also counts as activity"""
+        if counter not in cls.COUNTERS:
+            raise ValueError(f"Unknown activity counter: {counter}")
+        cls.touch(telegram_id)
+        inc = cls._entry(telegram_id)['inc']
+        inc[counter] = inc.get(counter, 0) + amount
+
+    @classmethod
+    def pending_count(cls) -> int:
+        return len(cls._pending)
+
+    @classmethod
+    async def flush(cls) -> int:
+        """Write buffered changes, returns the number of users updated"""
+        if cls._flush_lock is None:
+            cls._flush_lock = asyncio.Lock()
+        async with cls._flush_lock:
+            if not cls._pending:
+                return 0
+            pending, cls._pending = cls._pending, {}
+
+            operations = []
+            for telegram_id, entry in pending.items():
+                update = {}
+                if entry['last_active'] is not None:
+                    # $max: a late flush never moves last_active backwards
+                    update['$max'] = {'last_active': entry['last_active']}
+                if entry['inc']:
+                    update['$inc'] = entry['inc']
+                if update:
+                    operations.append(UpdateOne({'telegram_id': telegram_id}, update))
+
+            try:
+                if operations:
+                    await User.get_motor_collection().bulk_write(operations, ordered=False)
+            except Exception as e:
+                logger.error(f"UserActivityBuffer: flush failed, keeping {len(pending)} users: {repr(e)}")
+                cls._restore(pending)
+                return 0
+            return len(operations)
+
+    @classmethod
+    def _restore(cls, pending: Dict[int, Dict]):
+        """Merge an unwritten batch back in front of newer changes"""
+        for telegram_id, entry in pending.items():
+            if entry['last_active'] is not None:
+                cls.touch(telegram_id, entry['last_active'])
+            current = cls._entry(telegram_id)['inc']
+            for counter, amount in entry['inc'].items():
+                current[counter] = current.get(counter, 0) + amount
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            await asyncio.sleep(cls.FLUSH_SECONDS)
+            try:
+                await cls.flush()
+            except Exception as e:
+                logger.error(f"UserActivityBuffer: flusher error: {repr(e)}")
+
+    @classmethod
+    def start(cls):
+        """Start the periodic flusher (idempotent)"""
+        if cls._task is None or cls._task.done():
+            cls._task = asyncio.create_task(cls._run())
+
+    @classmethod
+    async def stop(cls):
+        """Stop the flusher and write what is left"""
+        if cls._task is not None:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+        await cls.flush()
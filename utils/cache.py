@@ -0,0 +1,178 @@
+"""
+Async Cache - in-process TTL cache with stale-while-revalidate
+التخزين المؤقت للإحصائيات والتقارير
+
+Values are grouped in named families, each with its own TTL:
+- younger than ttl: returned as is (hit)
+- younger than ttl + stale_ttl: returned at once while one background
+  task recomputes it (stale hit)
+- older or missing: computed; concurrent callers share one computation
+  (miss)
+
+Families name the events that invalidate them (submission, grade,
+review, achievement). Write paths call AsyncCache.fire(); a family drops
+the matching key, or all its keys if it does not key on that event.
+Events only reach the process that fires them, so other processes (e.g.
+the admin dashboard grading) are bounded by the TTLs.
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from loguru import logger
+
+
+class _Family:
+    """Entries, in-flight computations and counters of one family"""
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, invalidate_on: Dict[str, Optional[str]]):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.invalidate_on = invalidate_on
+        # key -> (value, monotonic time stored)
+        self.entries: Dict[Hashable, tuple] = {}
+        # Invalidation drops a key's task from here: a computation only
+        # stores its result while it is still the key's in-flight task
+        self.inflight: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'errors': 0, 'invalidations': 0}
+
+
+class AsyncCache:
+    """Process-wide cache families (see module docstring)"""
+    _families: Dict[str, _Family] = {}
+
+    @classmethod
+    def register(
+        cls,
+        family: str,
+        ttl: float,
+        stale_ttl: float = 0,
+        invalidate_on: Optional[Dict[str, Optional[str]]] = None
+    ):
+        """Declare a family.
+
+        invalidate_on maps an event to the event argument holding the
+        key to drop, or to None to drop the whole family.
+        """
+        cls._families[family] = _Family(family, ttl, stale_ttl, invalidate_on or {})
+
+    @classmethod
+    async def get(cls, family: str, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value of key, computing it with compute() when needed.
+
+        Empty results ({}, [], None) are returned but not stored: the
+        statistics methods return them on errors.
+        """
+        fam = cls._families[family]
+        entry = fam.entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[1]
+            if age < fam.ttl:
+                fam.counters['hits'] += 1
+                return entry[0]
+            if age < fam.ttl + fam.stale_ttl:
+                fam.counters['stale_hits'] += 1
+                if key not in fam.inflight:
+                    cls._start(fam, key, compute).add_done_callback(
+                        functools.partial(cls._log_refresh_error, fam, key)
+                    )
+                return entry[0]
+        fam.counters['misses'] += 1
+        task = fam.inflight.get(key) or cls._start(fam, key, compute)
+        # shield: a cancelled caller must not cancel the shared computation
+        return await asyncio.shield(task)
+
+    @classmethod
+    def _start(cls, fam: _Family, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.create_task(cls._compute(fam, key, compute))
+        fam.inflight[key] = task
+        return task
+
+    @staticmethod
+    async def _compute(fam: _Family, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await compute()
+        except Exception:
+            fam.counters['errors'] += 1
+            raise
+        finally:
+            # False if the key was invalidated while computing
+            current = fam.inflight.get(key) is asyncio.current_task()
+            if current:
+                del fam.inflight[key]
+        if current and value:
+            fam.entries[key] = (value, time.monotonic())
+        return value
+
+    @staticmethod
+    def _log_refresh_error(fam: _Family, key: Hashable, task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            logger.error(f"AsyncCache: refreshing {fam.name}[{key!r}] failed, keeping stale value: {repr(task.exception())}")
+
+    @classmethod
+    def invalidate(cls, family: str, key: Any = ...):
+        """Drop one key of a family, or the whole family"""
+        fam = cls._families.get(family)
+        if fam is None:
+            return
+        fam.counters['invalidations'] += 1
+        if key is ...:
+            fam.entries.clear()
+            fam.inflight.clear()
+        else:
+            fam.entries.pop(key, None)
+            fam.inflight.pop(key, None)
+
+    @classmethod
+    def fire(cls, event: str, **keys: Any):
+        """Invalidate every family that declared `event`.
+
+        e.g. fire("grade", user_id=123, assignment_id="...")
+        """
+        for fam in cls._families.values():
+            if event not in fam.invalidate_on:
+                continue
+            field = fam.invalidate_on[event]
+            if field is None:
+                cls.invalidate(fam.name)
+            elif field in keys:
+                cls.invalidate(fam.name, keys[field])
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """Counters, size and TTLs per family"""
+        return {
+            name: {
+                **fam.counters,
+                'entries': len(fam.entries),
+                'ttl': fam.ttl,
+                'stale_ttl': fam.stale_ttl,
+            }
+            for name, fam in cls._families.items()
+        }
+
+
+def cached(
+    family: str,
+    ttl: float,
+    stale_ttl: float = 0,
+    key: Optional[Callable[..., Hashable]] = None,
+    invalidate_on: Optional[Dict[str, Optional[str]]] = None
+):
+    """Cache an async function in its own family.
+
+    key builds the cache key from the call arguments (default: all of
+    them); it must match the values passed to fire() for invalidate_on.
+    Put it under @staticmethod/@classmethod.
+    """
+    AsyncCache.register(family, ttl, stale_ttl, invalidate_on)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return await AsyncCache.get(family, cache_key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,228 @@
+"""
+Content Catalog - cached access to data/*.json
+كتالوج المحتوى - قراءة ملفات المحتوى مع التخزين المؤقت
+"""
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.data_bridge import DataBridge
+from utils.json_storage import JsonStorage
+
+
+def _index_by_item(entries: List[Dict]) -> Dict[Tuple[str, str], List[Dict]]:
+    """Index videos/assignments by (type, item_id), keeping file order"""
+    index: Dict[Tuple[str, str], List[Dict]] = {}
+    for entry in entries:
+        key = (entry.get('type'), entry.get('item_id'))
+        index.setdefault(key, []).append(entry)
+    return index
+
+
+def _index_exams(entries: List[Dict]) -> Dict[Tuple[str, str], List[Dict]]:
+    """Exams only carry course_id, they always belong to courses"""
+    index: Dict[Tuple[str, str], List[Dict]] = {}
+    for entry in entries:
+        key = ('courses', entry.get('course_id'))
+        index.setdefault(key, []).append(entry)
+    return index
+
+
+def _index_courses(entries: List[Dict]) -> Dict[str, Dict]:
+    """Index courses by id"""
+    return {c.get('id'): c for c in entries if isinstance(c, dict)}
+
+
+class _CatalogFile:
+    """One cached JSON file with its (mtime, size) signature"""
+
+    def __init__(self, file_name: str, default: Any, indexer: Optional[Callable] = None):
+        self.file_name = file_name
+        self.default = default
+        self.indexer = indexer
+        self.signature: Optional[Tuple[int, int]] = None
+        # monotonic time of the last database load (DATA_BACKEND mongo/sqlite)
+        self.loaded_at: float = 0.0
+        self.data: Any = default
+        self.index: Any = indexer(default) if indexer else None
+
+
+class ContentCatalog:
+    """Shared in-process catalog for the JSON content files.
+
+    Each file is parsed once and re-read (through JsonStorage, off the
+    event loop) only when its mtime or size changes. Files kept in a
+    database (see DataBridge) are re-read from there every
+    DB_REFRESH_SECONDS instead, since other processes may have changed
+    them. Returned entries are shared with the cache - treat them as
+    read-only.
+    """
+    DB_REFRESH_SECONDS = 30
+    _files: Dict[str, _CatalogFile] = {
+        'videos': _CatalogFile('videos.json', [], _index_by_item),
+        'assignments': _CatalogFile('assignments.json', [], _index_by_item),
+        'exams': _CatalogFile('exams.json', [], _index_exams),
+        'courses': _CatalogFile('courses.json', [], _index_courses),
+        'group_links': _CatalogFile('group_links.json', {}),
+        'links': _CatalogFile('links.json', {}),
+    }
+
+    @classmethod
+    async def _refresh(cls, name: str) -> _CatalogFile:
+        """Reload a file if it may have changed since the last read"""
+        if name in DataBridge.collections and DataBridge.uses_db():
+            return await cls._refresh_from_db(name)
+        return await cls._refresh_from_file(name)
+
+    @classmethod
+    async def _refresh_from_db(cls, name: str) -> _CatalogFile:
+        cached = cls._files[name]
+        now = time.monotonic()
+        if cached.loaded_at and now - cached.loaded_at < cls.DB_REFRESH_SECONDS:
+            return cached
+        # Also throttles retries while the database is unreachable
+        cached.loaded_at = now
+
+        try:
+            data = await DataBridge.find(name)
+        except Exception as e:
+            if DataBridge.writes_json():
+                logger.warning(f"ContentCatalog: database read of {name} failed, using {cached.file_name}: {repr(e)}")
+                return await cls._refresh_from_file(name)
+            logger.error(f"ContentCatalog: error loading {name} from the database: {repr(e)}")
+            return cached
+
+        cached.data = data
+        cached.index = cached.indexer(data) if cached.indexer else None
+        cached.signature = None
+        logger.debug(f"ContentCatalog: loaded {name} from the database")
+        return cached
+
+    @classmethod
+    async def _refresh_from_file(cls, name: str) -> _CatalogFile:
+        """Reload a file if it changed on disk since the last read"""
+        cached = cls._files[name]
+        path = JsonStorage.path(cached.file_name)
+
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if cached.signature is not None:
+                logger.debug(f"ContentCatalog: {cached.file_name} removed, resetting")
+            cached.signature = None
+            cached.data = cached.default
+            cached.index = cached.indexer(cached.default) if cached.indexer else None
+            return cached
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == cached.signature:
+            return cached
+
+        try:
+            data = await JsonStorage.read(cached.file_name, cached.default)
+        except Exception as e:
+            # Keep serving the last good snapshot
+            logger.error(f"ContentCatalog: error loading {cached.file_name}: {repr(e)}")
+            return cached
+
+        if not isinstance(data, type(cached.default)):
+            logger.error(f"ContentCatalog: unexpected structure in {cached.file_name}")
+            return cached
+
+        cached.data = data
+        cached.index = cached.indexer(data) if cached.indexer else None
+        cached.signature = signature
+        logger.debug(f"ContentCatalog: loaded {cached.file_name}")
+        return cached
+
+    @classmethod
+    def invalidate(cls, name: Optional[str] = None):
+        """Force a reload on next access (all files when name is None)"""
+        names = [name] if name else list(cls._files)
+        for n in names:
+            cls._files[n].signature = None
+            cls._files[n].loaded_at = 0.0
+
+    @classmethod
+    async def save(
+        cls,
+        name: str,
+        entry: Dict,
+        match: Tuple[str, ...] = (),
+        update_fields: Tuple[str, ...] = ()
+    ) -> bool:
+        """Add an entry to a list file (videos, assignments, exams).
+
+        If an entry with the same values for the `match` fields exists, its
+        update_fields are overwritten instead. Returns True in that case.
+        """
+        cached = cls._files[name]
+        match_values = {f: entry.get(f) for f in match}
+        updated = False
+        position = None
+
+        if DataBridge.writes_json():
+            async with JsonStorage.transaction(cached.file_name, []) as entries:
+                for i, existing in enumerate(entries):
+                    if match and all(existing.get(f) == v for f, v in match_values.items()):
+                        existing.update({f: entry.get(f) for f in update_fields})
+                        entry, position, updated = existing, i, True
+                        break
+                else:
+                    entries.append(entry)
+                    position = len(entries) - 1
+
+        if DataBridge.uses_db():
+            db_updated = await DataBridge.save_ordered(
+                name, entry, position, match_values or None, update_fields
+            )
+            if not DataBridge.writes_json():
+                updated = db_updated
+
+        cls.invalidate(name)
+        return updated
+
+    @classmethod
+    async def get_all(cls, name: str) -> List[Dict]:
+        """Get every entry of a list file (videos, assignments, exams, courses)"""
+        return list((await cls._refresh(name)).data)
+
+    @classmethod
+    async def get_videos(cls, item_id: str, item_type: str = 'courses') -> List[Dict]:
+        """Get videos for a course/material in upload order"""
+        return list((await cls._refresh('videos')).index.get((item_type, item_id), []))
+
+    @classmethod
+    async def get_assignments(cls, item_id: str, item_type: str = 'courses') -> List[Dict]:
+        """Get assignments for a course/material in creation order"""
+        return list((await cls._refresh('assignments')).index.get((item_type, item_id), []))
+
+    @classmethod
+    async def get_exams(cls, course_id: str) -> List[Dict]:
+        """Get exams for a course in creation order"""
+        return list((await cls._refresh('exams')).index.get(('courses', course_id), []))
+
+    @classmethod
+    async def get_course(cls, course_id: str) -> Optional[Dict]:
+        """Get a course from courses.json"""
+        return (await cls._refresh('courses')).index.get(course_id)
+
+    @classmethod
+    async def get_group_link(cls, item_id: str, section: str = 'courses') -> Optional[str]:
+        """Get a group link (nested or flat mapping)"""
+        gl = (await cls._refresh('group_links')).data
+        return gl.get(section, {}).get(item_id) or gl.get(item_id)
+
+    @classmethod
+    async def get_course_links(cls, course_id: str) -> List[Dict]:
+        """Get the extra links configured for a course in links.json"""
+        all_links = (await cls._refresh('links')).data
+        # Support both nested and flat structures
+        raw = all_links.get('courses', {}).get(course_id)
+        if not isinstance(raw, list):
+            raw = all_links.get(course_id)
+        if not isinstance(raw, list):
+            return []
+        return [l for l in raw if isinstance(l, dict) and l.get('url')]
+
@@ -0,0 +1,131 @@
+"""
+Exam Grade Store - indexed access to data/exam_grades.json
+مخزن درجات الاختبارات - فهرسة الدرجات حسب الطالب والاختبار
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.data_bridge import DataBridge
+from utils.grading_queue import GradingIndex
+from utils.json_storage import JsonStorage
+
+
+ExamGradeKey = Tuple[str, int]
+
+
+def exam_grade_key(student_id, exam_index: int) -> ExamGradeKey:
+    """Identity of an exam grade: one per student per exam"""
+    return (str(student_id), int(exam_index))
+
+
+class ExamGradeStore:
+    """In-memory view of exam_grades.json with a grading queue index.
+
+    The file is loaded once; every write goes through JsonStorage and
+    updates the view and index in place. With DATA_BACKEND=mongo/sqlite
+    records live in that database instead (see DataBridge).
+    """
+    FILE_NAME = 'exam_grades.json'
+
+    _by_key: Dict[ExamGradeKey, Dict] = {}
+    _queue: GradingIndex = GradingIndex('exam_index')
+    _loaded: bool = False
+    _lock: asyncio.Lock = None
+
+    @classmethod
+    async def _ensure_loaded(cls):
+        if cls._loaded:
+            return
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            if cls._loaded:
+                return
+            grades = await JsonStorage.read(cls.FILE_NAME, [])
+            by_key: Dict[ExamGradeKey, Dict] = {}
+            queue = GradingIndex('exam_index')
+            for g in grades:
+                try:
+                    by_key[exam_grade_key(g['student_id'], g['exam_index'])] = g
+                    queue.add(g)
+                except (KeyError, TypeError, ValueError):
+                    logger.warning(f"ExamGradeStore: skipping malformed grade {g}")
+            cls._by_key = by_key
+            cls._queue = queue
+            cls._loaded = True
+            logger.info(f"ExamGradeStore: loaded {len(by_key)} exam grades")
+
+    @staticmethod
+    def _query(status: str, course_id: str, exam_index: int) -> Dict:
+        return {'status': status, 'course_id': course_id, 'exam_index': int(exam_index)}
+
+    @classmethod
+    async def get(cls, student_id, exam_index: int) -> Optional[Dict]:
+        """Get a student's grade for an exam"""
+        key = exam_grade_key(student_id, exam_index)
+
+        async def from_json():
+            await cls._ensure_loaded()
+            return cls._by_key.get(key)
+
+        return await DataBridge.read(
+            lambda: DataBridge.find_one('exam_grades', {'student_id': key[0], 'exam_index': key[1]}),
+            from_json
+        )
+
+    @classmethod
+    async def list_by_status(cls, status: str, course_id: str, exam_index: int) -> List[Dict]:
+        """Grades of one exam in the given status"""
+        async def from_json():
+            await cls._ensure_loaded()
+            return cls._queue.records(status, course_id, exam_index)
+
+        return await DataBridge.read(
+            lambda: DataBridge.find('exam_grades', cls._query(status, course_id, exam_index)),
+            from_json
+        )
+
+    @classmethod
+    async def count_by_status(cls, status: str, course_id: str, exam_index: int) -> int:
+        """Number of grades of one exam in the given status"""
+        async def from_json():
+            await cls._ensure_loaded()
+            return cls._queue.count(status, course_id, exam_index)
+
+        return await DataBridge.read(
+            lambda: DataBridge.count('exam_grades', cls._query(status, course_id, exam_index)),
+            from_json
+        )
+
+    @classmethod
+    async def put(cls, grade_data: Dict) -> Dict:
+        """Create or replace a student's exam grade"""
+        if not DataBridge.writes_json():
+            await DataBridge.upsert('exam_grades', grade_data)
+            return grade_data
+
+        await cls._ensure_loaded()
+        key = exam_grade_key(grade_data['student_id'], grade_data['exam_index'])
+
+        async with JsonStorage.transaction(cls.FILE_NAME, []) as exam_grades:
+            existing = next(
+                (i for i, g in enumerate(exam_grades)
+                 if str(g.get('student_id')) == key[0] and g.get('exam_index') == key[1]),
+                None
+            )
+            if existing is not None:
+                exam_grades[existing] = grade_data
+            else:
+                exam_grades.append(grade_data)
+
+        previous = cls._by_key.get(key)
+        if previous is not None:
+            cls._queue.remove(previous)
+        cls._by_key[key] = grade_data
+        cls._queue.add(grade_data)
+
+        if DataBridge.uses_db():
+            await DataBridge.upsert('exam_grades', grade_data)
+        return grade_data
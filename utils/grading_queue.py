@@ -0,0 +1,67 @@
+"""
+Grading Queue - incremental index of submissions/grades by status
+قائمة التقييم - فهرس التسليمات حسب الحالة والدورة والواجب
+"""
+from typing import Dict, List, Tuple
+
+
+GroupKey = Tuple[str, int]
+
+
+class GradingIndex:
+    """status -> (course_id, item_index) -> student_id -> record
+
+    Kept up to date by the owning store on every write, so listing the
+    pending queue costs O(groups) and opening one assignment costs
+    O(records in that assignment), independent of the total history.
+    """
+
+    def __init__(self, item_field: str):
+        # Field holding the item position: 'assignment_index' or 'exam_index'
+        self.item_field = item_field
+        self._buckets: Dict[str, Dict[GroupKey, Dict[str, Dict]]] = {}
+        # (student_id, course_id, item_index) -> (status, group)
+        self._where: Dict[Tuple[str, str, int], Tuple[str, GroupKey]] = {}
+
+    def _keys(self, record: Dict) -> Tuple[Tuple[str, str, int], GroupKey]:
+        student_id = str(record.get('student_id'))
+        group = (record.get('course_id'), int(record.get(self.item_field)))
+        return (student_id, group[0], group[1]), group
+
+    def remove(self, record: Dict):
+        """Drop a record (no-op if it is not indexed)"""
+        key, _ = self._keys(record)
+        located = self._where.pop(key, None)
+        if not located:
+            return
+        status, group = located
+        groups = self._buckets.get(status, {})
+        bucket = groups.get(group)
+        if bucket is None:
+            return
+        bucket.pop(key[0], None)
+        if not bucket:
+            del groups[group]
+            if not groups:
+                self._buckets.pop(status, None)
+
+    def add(self, record: Dict):
+        """Insert or move a record into its current status bucket"""
+        self.remove(record)
+        key, group = self._keys(record)
+        status = record.get('status') or 'pending'
+        self._buckets.setdefault(status, {}).setdefault(group, {})[key[0]] = record
+        self._where[key] = (status, group)
+
+    def groups(self, status: str) -> Dict[GroupKey, Dict[str, Dict]]:
+        """All (course_id, item_index) groups that have records in status"""
+        return self._buckets.get(status, {})
+
+    def records(self, status: str, course_id: str, item_index: int) -> List[Dict]:
+        """Records for one course item in the given status, oldest first"""
+        bucket = self._buckets.get(status, {}).get((course_id, int(item_index)), {})
+        return list(bucket.values())
+
+    def count(self, status: str, course_id: str, item_index: int) -> int:
+        """Number of records for one course item in the given status"""
+        return len(self._buckets.get(status, {}).get((course_id, int(item_index)), {}))
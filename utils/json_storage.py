@@ -0,0 +1,133 @@
+"""
+JSON Storage - non-blocking persistence for data/*.json
+تخزين JSON - قراءة وكتابة الملفات دون تعطيل البوت
+"""
+import asyncio
+import copy
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from loguru import logger
+
+
+class JsonStorage:
+    """Async access to the JSON files under data/.
+
+    - File I/O runs in a small thread pool, never on the event loop.
+    - Writes go to a temp file in the same directory and are renamed over
+      the target, so readers only ever see a complete file.
+    - Read-modify-write cycles hold a per-file asyncio lock, so two
+      handlers updating the same file cannot overwrite each other.
+    """
+    data_dir: Path = Path('data')
+    MAX_WORKERS = 4
+
+    _executor: ThreadPoolExecutor = None
+    _locks: Dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def path(cls, file_name: str) -> Path:
+        """Absolute path of a data file"""
+        return cls.data_dir / file_name
+
+    @classmethod
+    def lock(cls, file_name: str) -> asyncio.Lock:
+        """Per-file lock shared by every writer of that file"""
+        key = str(cls.path(file_name).resolve())
+        if key not in cls._locks:
+            cls._locks[key] = asyncio.Lock()
+        return cls._locks[key]
+
+    @classmethod
+    async def run(cls, func: Callable, *args) -> Any:
+        """Run blocking file work in the storage thread pool"""
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=cls.MAX_WORKERS,
+                thread_name_prefix='json-storage'
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._executor, func, *args)
+
+    # ------------------------------------------------------------------
+    # Blocking helpers (executed in the thread pool)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read_sync(path: Path, default: Any) -> Any:
+        if not path.exists():
+            return copy.deepcopy(default)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_sync(path: Path, data: Any):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+    @staticmethod
+    def _append_sync(path: Path, text: str, fsync: bool):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def read(cls, file_name: str, default: Any = None) -> Any:
+        """Read a JSON file (default if it does not exist).
+
+        Writes are atomic renames, so reads don't need the lock.
+        """
+        return await cls.run(cls._read_sync, cls.path(file_name), default)
+
+    @classmethod
+    async def write(cls, file_name: str, data: Any):
+        """Atomically replace a JSON file"""
+        async with cls.lock(file_name):
+            await cls.run(cls._write_sync, cls.path(file_name), data)
+
+    @classmethod
+    async def append(cls, file_name: str, text: str, fsync: bool = True):
+        """Append raw text (e.g. an NDJSON record) to a file"""
+        async with cls.lock(file_name):
+            await cls.run(cls._append_sync, cls.path(file_name), text, fsync)
+
+    @classmethod
+    @asynccontextmanager
+    async def transaction(cls, file_name: str, default: Any = None):
+        """Locked read-modify-write of a JSON file.
+
+        Usage:
+            async with JsonStorage.transaction('videos.json', []) as videos:
+                videos.append(video_data)
+
+        The (mutated) data is written back when the block exits without
+        an exception.
+        """
+        path = cls.path(file_name)
+        async with cls.lock(file_name):
+            data = await cls.run(cls._read_sync, path, default)
+            yield data
+            await cls.run(cls._write_sync, path, data)
+            logger.debug(f"JsonStorage: saved {file_name}")
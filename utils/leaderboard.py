@@ -0,0 +1,132 @@
+"""
+Leaderboard - student rankings computed by one aggregation
+لوحة المتصدرين - ترتيب الطلاب حسب متوسط الدرجات
+
+A student's score is the average of their graded submissions, each
+normalized to a percentage of the assignment's max_grade. Scores are
+computed by one $group over the graded submissions, ranked, and kept in
+the "leaderboard" AsyncCache family per scope (all assignments, or one
+course), so top lists and "my rank" lookups never rescan the submissions.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.models.user import User
+from database.models.assignment import Assignment, AssignmentSubmission
+from utils.cache import AsyncCache
+
+
+class _Board:
+    """Ranked (user_id, average, count) rows of one scope"""
+
+    def __init__(self, rows: List[Dict]):
+        self.rows = rows
+        self.positions = {row['user_id']: i for i, row in enumerate(rows)}
+
+
+class Leaderboard:
+    """Cached per-scope leaderboards"""
+    CACHE_SECONDS = 60
+    STALE_SECONDS = 300
+
+    @staticmethod
+    def _pipeline(assignment_ids: Optional[List]) -> List[Dict]:
+        match: Dict = {"grade": {"$ne": None}}
+        if assignment_ids is not None:
+            match["assignment_id"] = {"$in": assignment_ids}
+        max_grade = {"$ifNull": [{"$arrayElemAt": ["$assignment.max_grade", 0]}, 100]}
+        return [
+            {"$match": match},
+            {"$lookup": {
+                "from": Assignment.get_settings().name,
+                "localField": "assignment_id",
+                "foreignField": "_id",
+                "as": "assignment",
+            }},
+            {"$group": {
+                "_id": "$user_id",
+                "average": {"$avg": {"$multiply": [
+                    100, {"$divide": ["$grade", {"$max": [max_grade, 1]}]}
+                ]}},
+                "count": {"$sum": 1},
+            }},
+            {"$sort": {"average": -1, "count": -1, "_id": 1}},
+        ]
+
+    @classmethod
+    async def _build(cls, course_id: Optional[str]) -> _Board:
+        assignment_ids = None
+        if course_id is not None:
+            assignment_ids = [
+                a["_id"] async for a in Assignment.get_motor_collection().find(
+                    {"related_to": "course", "related_id": course_id}, {"_id": 1}
+                )
+            ]
+        rows = []
+        rank, previous = 0, None
+        cursor = AssignmentSubmission.get_motor_collection().aggregate(cls._pipeline(assignment_ids))
+        async for row in cursor:
+            average = round(row["average"], 2)
+            # Equal averages share a rank (1, 2, 2, 4)
+            if average != previous:
+                rank, previous = len(rows) + 1, average
+            rows.append({
+                'user_id': row["_id"],
+                'rank': rank,
+                'average_grade': average,
+                'total_assignments': row["count"],
+            })
+        logger.debug(f"Leaderboard: built {course_id or 'global'} board with {len(rows)} students")
+        return _Board(rows)
+
+    @classmethod
+    async def _board(cls, course_id: Optional[str] = None) -> _Board:
+        # Keyed by course_id (None = every assignment)
+        return await AsyncCache.get("leaderboard", course_id, lambda: cls._build(course_id))
+
+    @staticmethod
+    async def _with_users(rows: List[Dict]) -> List[Dict]:
+        """Attach name/email, skipping students that no longer exist"""
+        ids = [int(row['user_id']) for row in rows if str(row['user_id']).isdigit()]
+        users = {
+            u["telegram_id"]: u async for u in User.get_motor_collection().find(
+                {"telegram_id": {"$in": ids}}, {"telegram_id": 1, "full_name": 1, "email": 1}
+            )
+        }
+        result = []
+        for row in rows:
+            user = users.get(int(row['user_id'])) if str(row['user_id']).isdigit() else None
+            if user:
+                result.append({
+                    'telegram_id': user["telegram_id"],
+                    'full_name': user.get("full_name"),
+                    'email': user.get("email"),
+                    'rank': row['rank'],
+                    'average_grade': row['average_grade'],
+                    'total_assignments': row['total_assignments'],
+                })
+        return result
+
+    @classmethod
+    async def top(cls, limit: int = 10, course_id: Optional[str] = None) -> List[Dict]:
+        """Best `limit` students (of a course if course_id is given)"""
+        board = await cls._board(course_id)
+        # A few spare rows in case some students were deleted
+        return (await cls._with_users(board.rows[:limit + 5]))[:limit]
+
+    @classmethod
+    async def rank_of(cls, telegram_id: int, course_id: Optional[str] = None) -> Optional[Tuple[int, int, Dict]]:
+        """(rank, ranked students, row) of a student, None if not ranked"""
+        board = await cls._board(course_id)
+        position = board.positions.get(str(telegram_id))
+        if position is None:
+            return None
+        row = board.rows[position]
+        return row['rank'], len(board.rows), row
+
+
+AsyncCache.register(
+    "leaderboard", Leaderboard.CACHE_SECONDS, Leaderboard.STALE_SECONDS,
+    invalidate_on={"grade": None}
+)
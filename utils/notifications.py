@@ -11,6 +11,7 @@ from loguru import logger
 from database.models.user import User
 from database.models.assignment import Assignment
 from database.models.notification import Notification
+from database.models.stats_rollup import StatsRollup
 from config.settings import settings
 
 
@@ -99,13 +100,12 @@ class SmartNotificationManager:
             for assignment in assignments:
                 # Get all students who haven't submitted
                 users = await User.find().to_list()
+                submitted = {s.user_id for s in await assignment.list_submissions()}
                 
                 for user in users:
                     # Check if user has access and hasn't submitted
                     if user.has_approved_course(assignment.related_id):
-                        submission = assignment.get_submission(str(user.telegram_id))
-                        
-                        if not submission:
+                        if str(user.telegram_id) not in submitted:
                             # Send reminder
                             hours_left = int((assignment.deadline - datetime.utcnow()).total_seconds() / 3600)
                             
@@ -176,31 +176,15 @@ class SmartNotificationManager:
     async def send_daily_admin_summary():
         """Send daily summary to admin"""
         try:
-            # Calculate today's stats
-            today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            # New registrations
-            new_users = await User.find(User.registered_at > today).count()
-            
-            # New submissions
-            all_assignments = await Assignment.find().to_list()
-            new_submissions = 0
-            for assignment in all_assignments:
-                for submission in assignment.submissions:
-                    if submission.submitted_at > today:
-                        new_submissions += 1
-            
-            # Pending grading
-            pending_grading = 0
-            for assignment in all_assignments:
-                for submission in assignment.submissions:
-                    if submission.status == "submitted":
-                        pending_grading += 1
-            
-            # Pending approvals
-            pending_approvals = await User.find(
-                User.courses.approval_status == "pending"
-            ).count()
+            # Today's and current counters (see StatsRollup)
+            today, totals = await asyncio.gather(
+                StatsRollup.get_scope(StatsRollup.day_scope()),
+                StatsRollup.get_scope(StatsRollup.GLOBAL),
+            )
+            new_users = today.users
+            new_submissions = today.submissions
+            pending_grading = totals.submissions - totals.graded
+            pending_approvals = totals.enrollments_pending
             
             message = f"""
 📊 **ملخص يومي - {datetime.utcnow().strftime('%Y-%m-%d')}**
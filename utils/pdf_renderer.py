@@ -0,0 +1,153 @@
+"""
+PDF Renderer - reportlab layout in a process pool
+إنشاء ملفات PDF في عمليات منفصلة
+
+reportlab layout is CPU-bound; run on the event loop it stalls every
+other update. Renderers here are top-level functions that take plain
+data (str/int/float/list/dict, no models or connections) and return the
+PDF bytes, so they can run in a ProcessPoolExecutor of
+settings.PDF_RENDER_WORKERS processes.
+
+Results are cached by a hash of (renderer, data): exporting an
+unchanged report again returns the stored bytes without rendering.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+    logger.warning("reportlab not installed - PDF export unavailable")
+
+
+def render_student_report(data: Dict[str, Any]) -> bytes:
+    """Student report PDF.
+
+    data: full_name, email, phone, registered, last_active (str) and
+    grades: [[title, score, percentage, status], ...]
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Title
+    title = Paragraph(f"<b>Student Report: {data['full_name']}</b>", styles['Title'])
+    elements.append(title)
+    elements.append(Spacer(1, 20))
+
+    # Student info table
+    info_data = [
+        ['Email:', data['email']],
+        ['Phone:', data['phone']],
+        ['Registered:', data['registered']],
+        ['Last Active:', data['last_active']]
+    ]
+
+    info_table = Table(info_data, colWidths=[150, 350])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 20))
+
+    # Grades section
+    elements.append(Paragraph("<b>Grades Summary</b>", styles['Heading2']))
+    elements.append(Spacer(1, 10))
+
+    if data['grades']:
+        grades_table = Table([['Assignment', 'Score', 'Percentage', 'Status']] + data['grades'],
+                             colWidths=[200, 80, 100, 80])
+        grades_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]))
+        elements.append(grades_table)
+    else:
+        elements.append(Paragraph("No graded assignments yet.", styles['Normal']))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+class PdfRenderer:
+    """Process pool and result cache for the renderers above"""
+    CACHE_SIZE = 64
+
+    _pool: Optional[ProcessPoolExecutor] = None
+    # data hash -> PDF bytes, least recently used first
+    _cache: "OrderedDict[str, bytes]" = OrderedDict()
+    _inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def data_version(renderer: Callable, data: Dict[str, Any]) -> str:
+        payload = json.dumps([renderer.__name__, data], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @classmethod
+    def _executor(cls) -> ProcessPoolExecutor:
+        if cls._pool is None:
+            # spawn, not fork: forking a process that runs Motor and worker
+            # threads can copy a held lock into the child and deadlock it
+            cls._pool = ProcessPoolExecutor(
+                max_workers=max(1, settings.PDF_RENDER_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return cls._pool
+
+    @classmethod
+    async def render(cls, renderer: Callable[[Dict[str, Any]], bytes], data: Dict[str, Any]) -> bytes:
+        """PDF bytes of renderer(data), from the cache when data is unchanged"""
+        version = cls.data_version(renderer, data)
+        if version in cls._cache:
+            cls._cache.move_to_end(version)
+            logger.debug(f"PdfRenderer: cache hit for {renderer.__name__}")
+            return cls._cache[version]
+        # Identical concurrent exports share one render
+        if version not in cls._inflight:
+            loop = asyncio.get_running_loop()
+            cls._inflight[version] = loop.run_in_executor(cls._executor(), renderer, data)
+        future = cls._inflight[version]
+        try:
+            pdf = await asyncio.shield(future)
+        finally:
+            if future.done():
+                cls._inflight.pop(version, None)
+        cls._cache[version] = pdf
+        while len(cls._cache) > cls.CACHE_SIZE:
+            cls._cache.popitem(last=False)
+        return pdf
+
+    @classmethod
+    def shutdown(cls):
+        """Stop the worker processes (bot shutdown)"""
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=False, cancel_futures=True)
+            cls._pool = None
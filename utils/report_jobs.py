@@ -0,0 +1,310 @@
+"""
+Report Jobs - background report exports delivered over Telegram
+طابور التقارير - إنشاء التقارير في الخلفية وإرسالها عند الانتهاء
+
+Handlers enqueue() a job and return at once. REPORT_WORKERS worker tasks
+claim queued jobs from the report_jobs collection, so a job survives a
+restart. A running job holds a lease renewed every HEARTBEAT_SECONDS;
+once it is older than LEASE_SECONDS (the process died) the job is
+re-queued, and the old claim can no longer finish it. While a job runs,
+every subscriber message is edited with its progress; when it is done
+each subscriber chat gets the file with send_document.
+
+An identical request (same kind and params) while a job is queued or
+running joins that job as another subscriber instead of building the
+report again. Only the bot process runs workers.
+"""
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config.settings import settings
+from database.models.report_job import ReportJob
+from database.models.user import User
+from utils.reports import ReportGenerator
+
+# progress(done, total) reported by a runner
+Progress = Callable[[int, int], Awaitable[None]]
+# runner(params, progress) -> (file, filename, caption), or None on failure
+Runner = Callable[[Dict[str, Any], Progress], Awaitable[Optional[Tuple[Any, str, str]]]]
+
+STATUS_TEXT = {
+    "queued": "⏳ التقرير في قائمة الانتظار...",
+    "running": "⚙️ جاري إعداد التقرير... {progress}%",
+    "done": "✅ تم إرسال التقرير بنجاح!",
+    "failed": "❌ حدث خطأ في إنشاء التقرير",
+}
+
+
+async def _students_excel(params: Dict[str, Any], progress: Progress):
+    report = await ReportGenerator.generate_students_excel(params.get("course_id"), progress=progress)
+    if not report:
+        return None
+    return report, f"students_report_{datetime.now().strftime('%Y%m%d')}.xlsx", "📊 تقرير الطلاب"
+
+
+async def _student_pdf(params: Dict[str, Any], progress: Progress):
+    telegram_id = params["telegram_id"]
+    report = await ReportGenerator.generate_student_report_pdf(telegram_id)
+    if not report:
+        return None
+    user = await User.find_one(User.telegram_id == telegram_id)
+    name = user.full_name.replace(' ', '_') if user else str(telegram_id)
+    return report, f"report_{name}.pdf", "📊 تقريرك الأكاديمي"
+
+
+class ReportJobQueue:
+    """Enqueue report jobs and run them in a bounded pool of workers"""
+    RUNNERS: Dict[str, Runner] = {
+        "students_excel": _students_excel,
+        "student_pdf": _student_pdf,
+    }
+    POLL_SECONDS = 10
+    HEARTBEAT_SECONDS = 30
+    # A running job without a heartbeat for this long is re-queued
+    LEASE_SECONDS = 180
+    # Minimum time between two progress edits of a job's messages
+    PROGRESS_SECONDS = 3
+
+    _bot = None
+    _workers: list = []
+    _wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def job_key(kind: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps([kind, params], sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    @classmethod
+    async def enqueue(cls, kind: str, params: Dict[str, Any], chat_id: int, message_id: int) -> Dict:
+        """Queue a job, or join the identical queued/running one.
+
+        The message (chat_id, message_id) is edited with the job status.
+        Returns the job document.
+        """
+        if kind not in cls.RUNNERS:
+            raise ValueError(f"Unknown report kind: {kind}")
+        key = cls.job_key(kind, params)
+        collection = ReportJob.get_motor_collection()
+        for attempt in range(2):
+            try:
+                job = await collection.find_one_and_update(
+                    {"active_key": key},
+                    {
+                        "$addToSet": {"subscribers": {"chat_id": chat_id, "message_id": message_id}},
+                        "$setOnInsert": {
+                            "kind": kind,
+                            "params": params,
+                            "status": "queued",
+                            "progress": 0,
+                            "created_at": datetime.utcnow(),
+                        },
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                break
+            except DuplicateKeyError:
+                # Two identical requests raced on the upsert; the retry joins the winner
+                if attempt:
+                    raise
+        logger.info(f"ReportJobQueue: {kind} job {job['_id']} has {len(job['subscribers'])} subscriber(s)")
+        if cls._wakeup is not None:
+            cls._wakeup.set()
+        await cls._edit(job, STATUS_TEXT[job["status"]].format(progress=job.get("progress", 0)), [
+            {"chat_id": chat_id, "message_id": message_id}
+        ])
+        return job
+
+    @classmethod
+    async def _claim(cls) -> Optional[Dict]:
+        """Oldest queued job, marked running (atomic across processes)"""
+        now = datetime.utcnow()
+        return await ReportJob.get_motor_collection().find_one_and_update(
+            {"status": "queued"},
+            {"$set": {"status": "running", "started_at": now,
+                      "claim": uuid.uuid4().hex, "heartbeat_at": now}},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    async def _requeue_expired(cls) -> int:
+        """Re-queue running jobs whose lease expired, returns their number"""
+        cutoff = datetime.utcnow() - timedelta(seconds=cls.LEASE_SECONDS)
+        result = await ReportJob.get_motor_collection().update_many(
+            {"status": "running", "$or": [
+                {"heartbeat_at": {"$lt": cutoff}},
+                {"heartbeat_at": None},
+            ]},
+            {"$set": {"status": "queued", "progress": 0}, "$unset": {"claim": ""}}
+        )
+        if result.modified_count:
+            logger.info(f"ReportJobQueue: re-queued {result.modified_count} job(s) with an expired lease")
+        return result.modified_count
+
+    @classmethod
+    async def _heartbeat(cls, job: Dict):
+        collection = ReportJob.get_motor_collection()
+        while True:
+            await asyncio.sleep(cls.HEARTBEAT_SECONDS)
+            try:
+                await collection.update_one(
+                    {"_id": job["_id"], "claim": job["claim"]},
+                    {"$set": {"heartbeat_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"ReportJobQueue: heartbeat of job {job['_id']} failed: {repr(e)}")
+
+    @classmethod
+    async def _edit(cls, job: Dict, text: str, subscribers=None):
+        if cls._bot is None:
+            return
+        for subscriber in subscribers or job.get("subscribers", []):
+            try:
+                await cls._bot.edit_message_text(
+                    text, chat_id=subscriber["chat_id"], message_id=subscriber["message_id"]
+                )
+            except Exception as e:
+                # Unchanged text, deleted message, ...
+                logger.debug(f"ReportJobQueue: could not edit status message: {repr(e)}")
+
+    @classmethod
+    async def _finish(cls, job: Dict, status: str, error: Optional[str] = None) -> Optional[Dict]:
+        """Record the outcome; returns the final document (with late
+        subscribers), or None if the lease was lost and the job re-queued"""
+        return await ReportJob.get_motor_collection().find_one_and_update(
+            {"_id": job["_id"], "claim": job["claim"]},
+            {
+                "$set": {"status": status, "error": error, "finished_at": datetime.utcnow(),
+                         "progress": 100 if status == "done" else job.get("progress", 0)},
+                # Later identical requests start a new job
+                "$unset": {"active_key": "", "claim": ""},
+            },
+            return_document=ReturnDocument.AFTER
+        )
+
+    @classmethod
+    async def _run_job(cls, job: Dict):
+        heartbeat = asyncio.create_task(cls._heartbeat(job))
+        try:
+            await cls._build_and_deliver(job)
+        except asyncio.CancelledError:
+            # Shutdown: hand the job back rather than wait for the lease
+            await ReportJob.get_motor_collection().update_one(
+                {"_id": job["_id"], "claim": job["claim"]},
+                {"$set": {"status": "queued", "progress": 0}, "$unset": {"claim": ""}}
+            )
+            raise
+        finally:
+            heartbeat.cancel()
+
+    @classmethod
+    async def _build_and_deliver(cls, job: Dict):
+        collection = ReportJob.get_motor_collection()
+        last_edit = 0.0
+
+        async def progress(done: int, total: int):
+            nonlocal last_edit
+            percent = min(99, int(done * 100 / total)) if total else 0
+            if time.monotonic() - last_edit < cls.PROGRESS_SECONDS:
+                return
+            last_edit = time.monotonic()
+            # Re-read the subscribers: identical requests may have joined
+            current = await collection.find_one_and_update(
+                {"_id": job["_id"], "claim": job["claim"]}, {"$set": {"progress": percent}},
+                projection={"subscribers": 1}, return_document=ReturnDocument.AFTER
+            )
+            if current:
+                await cls._edit(current, STATUS_TEXT["running"].format(progress=percent))
+
+        await cls._edit(job, STATUS_TEXT["running"].format(progress=0))
+        try:
+            result = await cls.RUNNERS[job["kind"]](job.get("params", {}), progress)
+        except Exception as e:
+            logger.error(f"ReportJobQueue: {job['kind']} job {job['_id']} failed: {repr(e)}")
+            result, error = None, repr(e)
+        else:
+            error = None if result else "report generation failed"
+
+        finished = await cls._finish(job, "done" if result else "failed", error)
+        if finished is None:
+            # Re-queued after our lease expired: the new run delivers it
+            logger.warning(f"ReportJobQueue: lost the lease of job {job['_id']}, dropping its result")
+            if result:
+                result[0].close()
+            return
+        if not result:
+            await cls._edit(finished, STATUS_TEXT["failed"])
+            return
+
+        report, filename, caption = result
+        try:
+            for subscriber in finished.get("subscribers", []):
+                report.seek(0)
+                try:
+                    await cls._bot.send_document(
+                        chat_id=subscriber["chat_id"],
+                        document=report,
+                        filename=filename,
+                        caption=caption
+                    )
+                except Exception as e:
+                    logger.error(f"ReportJobQueue: delivery to {subscriber['chat_id']} failed: {repr(e)}")
+        finally:
+            report.close()
+        await cls._edit(finished, STATUS_TEXT["done"])
+
+    @classmethod
+    async def _worker(cls, number: int):
+        while True:
+            try:
+                job = await cls._claim()
+                if job is None:
+                    if number == 0:
+                        # Jobs of a process that died while running them
+                        await cls._requeue_expired()
+                    cls._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(cls._wakeup.wait(), cls.POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                logger.info(f"ReportJobQueue: worker {number} running {job['kind']} job {job['_id']}")
+                await cls._run_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"ReportJobQueue: worker {number} error: {repr(e)}")
+                await asyncio.sleep(cls.POLL_SECONDS)
+
+    @classmethod
+    async def start(cls, bot):
+        """Re-queue jobs whose lease expired and start the workers.
+
+        Jobs still running in another live process keep their lease.
+        """
+        if cls._workers:
+            return
+        cls._bot = bot
+        cls._wakeup = asyncio.Event()
+        await cls._requeue_expired()
+        cls._workers = [
+            asyncio.create_task(cls._worker(n)) for n in range(max(1, settings.REPORT_WORKERS))
+        ]
+
+    @classmethod
+    async def stop(cls):
+        """Cancel the workers; the jobs they were running are re-queued"""
+        for task in cls._workers:
+            task.cancel()
+        await asyncio.gather(*cls._workers, return_exceptions=True)
+        cls._workers = []
@@ -2,14 +2,17 @@
 Reports Export System - Excel and PDF
 نظام تصدير التقارير
 """
+import asyncio
 import io
+import tempfile
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple
 from loguru import logger
 
 # Excel export
 try:
     import openpyxl
+    from openpyxl.cell import WriteOnlyCell
     from openpyxl.styles import Font, Alignment, PatternFill
     from openpyxl.utils import get_column_letter
     EXCEL_AVAILABLE = True
@@ -17,138 +20,199 @@ except ImportError:
     EXCEL_AVAILABLE = False
     logger.warning("openpyxl not installed - Excel export unavailable")
 
-# PDF export
-try:
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-    logger.warning("reportlab not installed - PDF export unavailable")
+# PDF export (rendered in worker processes)
+from utils.pdf_renderer import PDF_AVAILABLE, PdfRenderer, render_student_report
 
+from beanie.operators import In
 from database.models.user import User
-from database.models.assignment import Assignment
+from database.models.assignment import Assignment, AssignmentSubmission
+from database.loaders import UserLoader
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class _StreamingSheet:
+    """Write-only workbook with one sheet, saved to a temporary file.
+
+    openpyxl's write-only mode streams rows to disk as they are appended,
+    so memory stays flat whatever the row count. Every method does
+    blocking work and is meant to run through asyncio.to_thread; they are
+    called one at a time, never concurrently.
+    """
+
+    def __init__(self, title: str, headers: List[str], header_color: str):
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title)
+        self.rows = 0
+        self._alignment = Alignment(horizontal='center', vertical='center')
+        for col in range(1, len(headers) + 1):
+            self.sheet.column_dimensions[get_column_letter(col)].width = 15
+
+        fill = PatternFill(start_color=header_color, end_color=header_color, fill_type="solid")
+        font = Font(bold=True, color="FFFFFF", size=12)
+        header_cells = []
+        for header in headers:
+            cell = WriteOnlyCell(self.sheet, value=header)
+            cell.fill = fill
+            cell.font = font
+            cell.alignment = self._alignment
+            header_cells.append(cell)
+        self.sheet.append(header_cells)
+
+    def append(self, rows: List[List]):
+        for values in rows:
+            cells = []
+            for value in values:
+                cell = WriteOnlyCell(self.sheet, value=value)
+                cell.alignment = self._alignment
+                cells.append(cell)
+            self.sheet.append(cells)
+        self.rows += len(rows)
+
+    def save(self) -> BinaryIO:
+        target = tempfile.TemporaryFile(suffix=".xlsx")
+        try:
+            self.workbook.save(target)
+        except Exception:
+            target.close()
+            raise
+        target.seek(0)
+        return target
+
+
+async def _stream_excel(
+    title: str,
+    headers: List[str],
+    header_color: str,
+    batches: AsyncIterator[List[List]]
+) -> Tuple[BinaryIO, int]:
+    """Write row batches off the event loop, returns (file, row count)"""
+    sheet = await asyncio.to_thread(_StreamingSheet, title, headers, header_color)
+    async for batch in batches:
+        await asyncio.to_thread(sheet.append, batch)
+    return await asyncio.to_thread(sheet.save), sheet.rows
+
+
+async def _student_grade_summaries() -> Dict[str, Tuple[int, float]]:
+    """{user_id: (submitted, average %)} over submissions of existing assignments"""
+    pipeline = [
+        {"$lookup": {
+            "from": Assignment.get_settings().name,
+            "localField": "assignment_id",
+            "foreignField": "_id",
+            "as": "assignment",
+        }},
+        {"$match": {"assignment.0": {"$exists": True}}},
+        {"$group": {
+            "_id": "$user_id",
+            "submitted": {"$sum": 1},
+            # $avg skips the null percentage of ungraded submissions
+            "average": {"$avg": {"$cond": [
+                {"$isNumber": "$grade"},
+                {"$multiply": [100, {"$divide": [
+                    "$grade", {"$max": [{"$arrayElemAt": ["$assignment.max_grade", 0]}, 1]}
+                ]}]},
+                None,
+            ]}},
+        }},
+    ]
+    return {
+        row["_id"]: (row["submitted"], row["average"] or 0)
+        async for row in AssignmentSubmission.get_motor_collection().aggregate(pipeline)
+    }
 
 
 class ReportGenerator:
     """Generate various reports"""
     
     @staticmethod
-    async def generate_students_excel(course_id: Optional[str] = None) -> Optional[io.BytesIO]:
-        """Generate Excel report of students"""
+    async def generate_students_excel(
+        course_id: Optional[str] = None,
+        progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> Optional[BinaryIO]:
+        """Generate Excel report of students.
+        
+        progress(rows written, total rows) is awaited after each batch.
+        Returns a temporary file (closed by the caller) or None on error.
+        """
         if not EXCEL_AVAILABLE:
             logger.error("Excel export not available")
             return None
         
         try:
-            # Create workbook
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Students Report"
-            
-            # Headers
             headers = ['#', 'الاسم', 'البريد الإلكتروني', 'الهاتف', 'تاريخ التسجيل', 
                       'آخر نشاط', 'الدورات المسجلة', 'الواجبات المسلمة', 'المعدل']
             
-            # Style headers
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center', vertical='center')
+            # Per-student submission counts and averages, one aggregation
+            summaries = await _student_grade_summaries()
             
-            # Get students
+            query = {}
             if course_id:
-                users = await User.find().to_list()
-                students = [u for u in users if u.has_approved_course(course_id)]
-            else:
-                students = await User.find().to_list()
+                query = {"courses": {"$elemMatch": {"course_id": course_id, "approval_status": "approved"}}}
+            cursor = User.get_motor_collection().find(
+                query,
+                {"telegram_id": 1, "full_name": 1, "email": 1, "phone": 1,
+                 "registered_at": 1, "last_active": 1, "courses.approval_status": 1},
+                batch_size=EXPORT_BATCH_SIZE
+            )
             
-            # Get all assignments
-            assignments = await Assignment.find().to_list()
+            total = await User.get_motor_collection().count_documents(query) if progress else 0
             
-            # Fill data
-            for idx, student in enumerate(students, 2):
-                # Calculate stats
-                enrolled_count = len([c for c in student.courses if c.approval_status == 'approved'])
-                
-                submitted_count = 0
-                grades = []
-                
-                for assignment in assignments:
-                    submission = assignment.get_submission(str(student.telegram_id))
-                    if submission:
-                        submitted_count += 1
-                        if submission.grade is not None:
-                            grades.append(submission.grade / assignment.max_grade * 100)
-                
-                avg_grade = sum(grades) / len(grades) if grades else 0
-                
-                # Write row
-                row_data = [
-                    idx - 1,
-                    student.full_name,
-                    student.email,
-                    student.phone,
-                    student.registered_at.strftime('%Y-%m-%d'),
-                    student.last_active.strftime('%Y-%m-%d'),
-                    enrolled_count,
-                    submitted_count,
-                    f"{avg_grade:.1f}%"
-                ]
-                
-                for col, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=idx, column=col, value=value)
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
+            def day(value) -> str:
+                return value.strftime('%Y-%m-%d') if isinstance(value, datetime) else ''
             
-            # Auto-adjust column widths
-            for col in range(1, len(headers) + 1):
-                ws.column_dimensions[get_column_letter(col)].width = 15
+            async def rows():
+                batch = []
+                number = 0
+                async for student in cursor:
+                    number += 1
+                    enrolled_count = sum(
+                        1 for c in student.get('courses', []) if c.get('approval_status') == 'approved'
+                    )
+                    submitted_count, avg_grade = summaries.get(str(student.get('telegram_id')), (0, 0))
+                    batch.append([
+                        number,
+                        student.get('full_name'),
+                        student.get('email'),
+                        student.get('phone'),
+                        day(student.get('registered_at')),
+                        day(student.get('last_active')),
+                        enrolled_count,
+                        submitted_count,
+                        f"{avg_grade:.1f}%"
+                    ])
+                    if len(batch) >= EXPORT_BATCH_SIZE:
+                        yield batch
+                        batch = []
+                        if progress:
+                            await progress(number, total)
+                if batch:
+                    yield batch
             
-            # Save to BytesIO
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
+            report, count = await _stream_excel("Students Report", headers, "4472C4", rows())
             
-            logger.info(f"Excel report generated for {len(students)} students")
-            return buffer
+            logger.info(f"Excel report generated for {count} students")
+            return report
             
         except Exception as e:
             logger.error(f"Error generating Excel report: {e}")
             return None
     
     @staticmethod
-    async def generate_grades_excel(course_id: str, assignment_id: Optional[str] = None) -> Optional[io.BytesIO]:
-        """Generate Excel report of grades"""
+    async def generate_grades_excel(course_id: str, assignment_id: Optional[str] = None) -> Optional[BinaryIO]:
+        """Generate Excel report of grades.
+        
+        Returns a temporary file (closed by the caller) or None on error.
+        """
         if not EXCEL_AVAILABLE:
             return None
         
         try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Grades Report"
-            
             # Headers
             headers = ['#', 'الاسم', 'الواجب', 'الدرجة', 'النسبة', 'الحالة', 
                       'تاريخ التسليم', 'في الوقت المحدد']
             
-            # Style headers
-            header_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal='center')
-            
             # Get data
             if assignment_id:
                 assignments = [await Assignment.find_one(Assignment.id == assignment_id)]
@@ -157,45 +221,43 @@ class ReportGenerator:
                     Assignment.related_id == course_id
                 ).to_list()
             
-            row = 2
-            for assignment in assignments:
-                if not assignment:
-                    continue
-                
-                for submission in assignment.submissions:
-                    user = await User.find_one(User.telegram_id == int(submission.user_id))
-                    if not user:
+            users = UserLoader()
+            
+            async def rows():
+                number = 0
+                for assignment in assignments:
+                    if not assignment:
                         continue
                     
-                    on_time = "نعم" if (assignment.deadline and submission.submitted_at <= assignment.deadline) else "لا"
-                    status = "مصحح" if submission.status == "graded" else "قيد المراجعة"
-                    percentage = f"{submission.grade / assignment.max_grade * 100:.1f}%" if submission.grade else "N/A"
-                    
-                    row_data = [
-                        row - 1,
-                        user.full_name,
-                        assignment.title,
-                        f"{submission.grade}/{assignment.max_grade}" if submission.grade else "N/A",
-                        percentage,
-                        status,
-                        submission.submitted_at.strftime('%Y-%m-%d %H:%M'),
-                        on_time
-                    ]
-                    
-                    for col, value in enumerate(row_data, 1):
-                        ws.cell(row=row, column=col, value=value)
-                    
-                    row += 1
-            
-            # Auto-adjust columns
-            for col in range(1, len(headers) + 1):
-                ws.column_dimensions[get_column_letter(col)].width = 15
+                    submissions = await assignment.list_submissions()
+                    # One $in query for this assignment's students
+                    await users.load_many(s.user_id for s in submissions)
+                    batch = []
+                    for submission in submissions:
+                        user = users.get(submission.user_id)
+                        if not user:
+                            continue
+                        
+                        number += 1
+                        on_time = "نعم" if (assignment.deadline and submission.submitted_at <= assignment.deadline) else "لا"
+                        status = "مصحح" if submission.status == "graded" else "قيد المراجعة"
+                        percentage = f"{submission.grade / assignment.max_grade * 100:.1f}%" if submission.grade else "N/A"
+                        
+                        batch.append([
+                            number,
+                            user.full_name,
+                            assignment.title,
+                            f"{submission.grade}/{assignment.max_grade}" if submission.grade else "N/A",
+                            percentage,
+                            status,
+                            submission.submitted_at.strftime('%Y-%m-%d %H:%M'),
+                            on_time
+                        ])
+                    if batch:
+                        yield batch
             
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-            
-            return buffer
+            report, _ = await _stream_excel("Grades Report", headers, "70AD47", rows())
+            return report
             
         except Exception as e:
             logger.error(f"Error generating grades Excel: {e}")
@@ -203,90 +265,54 @@ class ReportGenerator:
     
     @staticmethod
     async def generate_student_report_pdf(telegram_id: int) -> Optional[io.BytesIO]:
-        """Generate PDF report for individual student"""
+        """Generate PDF report for individual student.
+        
+        The data is gathered here; layout runs in the PdfRenderer process
+        pool and is cached while the data stays the same.
+        """
         if not PDF_AVAILABLE:
             logger.error("PDF export not available")
             return None
         
         try:
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            elements = []
-            styles = getSampleStyleSheet()
-            
             # Get student data
             user = await User.find_one(User.telegram_id == telegram_id)
             if not user:
                 return None
             
-            # Title
-            title = Paragraph(f"<b>Student Report: {user.full_name}</b>", styles['Title'])
-            elements.append(title)
-            elements.append(Spacer(1, 20))
-            
-            # Student info table
-            info_data = [
-                ['Email:', user.email],
-                ['Phone:', user.phone],
-                ['Registered:', user.registered_at.strftime('%Y-%m-%d')],
-                ['Last Active:', user.last_active.strftime('%Y-%m-%d')]
-            ]
-            
-            info_table = Table(info_data, colWidths=[150, 350])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            elements.append(info_table)
-            elements.append(Spacer(1, 20))
-            
-            # Grades section
-            elements.append(Paragraph("<b>Grades Summary</b>", styles['Heading2']))
-            elements.append(Spacer(1, 10))
-            
             # Get grades
-            assignments = await Assignment.find().to_list()
-            grades_data = [['Assignment', 'Score', 'Percentage', 'Status']]
+            submissions = {
+                s.assignment_id: s
+                for s in await AssignmentSubmission.find(
+                    AssignmentSubmission.user_id == str(telegram_id)
+                ).to_list()
+            }
+            assignments = await Assignment.find(In(Assignment.id, list(submissions))).to_list()
+            grades = []
             
             for assignment in assignments:
-                submission = assignment.get_submission(str(telegram_id))
+                submission = submissions.get(assignment.id)
                 if submission and submission.grade is not None:
                     percentage = f"{submission.grade / assignment.max_grade * 100:.1f}%"
                     status = "Passed" if submission.grade >= assignment.pass_grade else "Failed"
-                    grades_data.append([
+                    grades.append([
                         assignment.title,
                         f"{submission.grade}/{assignment.max_grade}",
                         percentage,
                         status
                     ])
             
-            if len(grades_data) > 1:
-                grades_table = Table(grades_data, colWidths=[200, 80, 100, 80])
-                grades_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                ]))
-                elements.append(grades_table)
-            else:
-                elements.append(Paragraph("No graded assignments yet.", styles['Normal']))
-            
-            # Build PDF
-            doc.build(elements)
-            buffer.seek(0)
+            pdf = await PdfRenderer.render(render_student_report, {
+                'full_name': user.full_name,
+                'email': user.email,
+                'phone': user.phone,
+                'registered': user.registered_at.strftime('%Y-%m-%d'),
+                'last_active': user.last_active.strftime('%Y-%m-%d'),
+                'grades': grades,
+            })
             
             logger.info(f"PDF report generated for user {telegram_id}")
-            return buffer
+            return io.BytesIO(pdf)
             
         except Exception as e:
             logger.error(f"Error generating PDF report: {e}")
@@ -2,11 +2,15 @@
 Advanced Statistics System
 نظام الإحصائيات المتقدم
 """
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from database.models.user import User
-from database.models.assignment import Assignment
+from database.models.assignment import Assignment, AssignmentSubmission
 from database.models.notification import Notification
+from database.models.stats_rollup import StatsRollup
+from utils.leaderboard import Leaderboard
+from utils.cache import cached
 from loguru import logger
 
 
@@ -14,55 +18,31 @@ class StatisticsManager:
     """Advanced statistics manager"""
     
     @staticmethod
+    @cached("dashboard_stats", ttl=60, stale_ttl=240,
+            invalidate_on={"submission": None, "grade": None, "review": None})
     async def get_dashboard_stats() -> Dict:
-        """Get comprehensive dashboard statistics"""
+        """Get comprehensive dashboard statistics.
+        
+        Totals come from stats_rollups (kept current by the write paths);
+        only the rolling 7-day user windows are counted, on indexes.
+        """
         try:
-            # User statistics
-            logger.debug("get_dashboard_stats: counting total users")
-            total_users = await User.find().count()
-            logger.debug(f"get_dashboard_stats: total_users={total_users}")
-            active_users = await User.find(
-                User.last_active > datetime.utcnow() - timedelta(days=7)
-            ).count()
-            logger.debug(f"get_dashboard_stats: active_users_last_7_days={active_users}")
-            new_users_this_week = await User.find(
-                User.registered_at > datetime.utcnow() - timedelta(days=7)
-            ).count()
-            logger.debug(f"get_dashboard_stats: new_users_this_week={new_users_this_week}")
-            
-            # Course enrollment stats
-            logger.debug("get_dashboard_stats: loading all users for enrollment stats")
-            users = await User.find().to_list()
-            logger.debug(f"get_dashboard_stats: loaded {len(users)} users for enrollment stats")
-            total_enrollments = sum(len(user.courses) for user in users)
-            approved_enrollments = sum(
-                len([c for c in user.courses if c.approval_status == "approved"])
-                for user in users
-            )
-            pending_enrollments = sum(
-                len([c for c in user.courses if c.approval_status == "pending"])
-                for user in users
-            )
-            
-            # Assignment stats
-            logger.debug("get_dashboard_stats: loading all assignments")
-            all_assignments = await Assignment.find().to_list()
-            logger.debug(f"get_dashboard_stats: loaded {len(all_assignments)} assignments")
-            total_assignments = len(all_assignments)
-            total_submissions = sum(len(a.submissions) for a in all_assignments)
-            graded_submissions = sum(
-                len([s for s in a.submissions if s.status == "graded"])
-                for a in all_assignments
+            week_ago = datetime.utcnow() - timedelta(days=7)
+            
+            logger.debug("get_dashboard_stats: reading rollups")
+            totals, courses, active_users, new_users_this_week, total_assignments = await asyncio.gather(
+                StatsRollup.get_scope(StatsRollup.GLOBAL),
+                StatsRollup.get_items("course"),
+                User.find(User.last_active > week_ago).count(),
+                User.find(User.registered_at > week_ago).count(),
+                Assignment.get_motor_collection().estimated_document_count(),
             )
             
-            # Calculate average grade
-            all_grades = []
-            for assignment in all_assignments:
-                for submission in assignment.submissions:
-                    if submission.grade is not None:
-                        all_grades.append(submission.grade)
-            
-            average_grade = sum(all_grades) / len(all_grades) if all_grades else 0
+            total_users = totals.users
+            total_submissions = totals.submissions
+            graded_submissions = totals.graded
+            average_grade = totals.average_grade
+            logger.debug(f"get_dashboard_stats: total_users={total_users}, total_submissions={total_submissions}")
             
             # Engagement rate
             engagement_rate = (active_users / total_users * 100) if total_users > 0 else 0
@@ -76,9 +56,10 @@ class StatisticsManager:
                 'total_users': total_users,
                 'active_users': active_users,
                 'new_users_this_week': new_users_this_week,
-                'total_enrollments': total_enrollments,
-                'approved_enrollments': approved_enrollments,
-                'pending_enrollments': pending_enrollments,
+                # Course enrollments only (materials have their own scopes)
+                'total_enrollments': sum(c.enrollments for c in courses),
+                'approved_enrollments': sum(c.enrollments_approved for c in courses),
+                'pending_enrollments': sum(c.enrollments_pending for c in courses),
                 'total_assignments': total_assignments,
                 'total_submissions': total_submissions,
                 'graded_submissions': graded_submissions,
@@ -92,67 +73,45 @@ class StatisticsManager:
             return {}
     
     @staticmethod
+    @cached("student_stats", ttl=60, stale_ttl=300, key=lambda telegram_id: int(telegram_id),
+            invalidate_on={"submission": "user_id", "grade": "user_id", "review": "user_id"})
     async def get_student_stats(telegram_id: int) -> Dict:
         """Get individual student statistics"""
         try:
-            logger.debug(f"get_student_stats: loading user by telegram_id={telegram_id}")
-            user = await User.find_one(User.telegram_id == telegram_id)
+            logger.debug(f"get_student_stats: loading user and submission stats for telegram_id={telegram_id}")
+            user, submissions = await asyncio.gather(
+                User.get_motor_collection().find_one(
+                    {"telegram_id": telegram_id},
+                    {"full_name": 1, "courses.approval_status": 1, "registered_at": 1, "last_active": 1}
+                ),
+                AssignmentSubmission.stats_for_user(str(telegram_id)),
+            )
             if not user:
                 return {}
             
-            # Get all assignments with this student's submissions
-            logger.debug("get_student_stats: loading all assignments")
-            all_assignments = await Assignment.find().to_list()
-            logger.debug(f"get_student_stats: loaded {len(all_assignments)} assignments")
-            student_assignments = []
-            
-            for assignment in all_assignments:
-                submission = assignment.get_submission(str(telegram_id))
-                if submission:
-                    student_assignments.append({
-                        'assignment': assignment,
-                        'submission': submission
-                    })
-            
-            # Calculate stats
-            total_assignments = len(student_assignments)
-            submitted = len([a for a in student_assignments if a['submission'].submitted_at])
-            graded = len([a for a in student_assignments if a['submission'].status == 'graded'])
-            
-            grades = [
-                a['submission'].grade
-                for a in student_assignments
-                if a['submission'].grade is not None
-            ]
-            
-            average_grade = sum(grades) / len(grades) if grades else 0
-            highest_grade = max(grades) if grades else 0
-            lowest_grade = min(grades) if grades else 0
-            
-            passed = len([g for g in grades if g >= 60])
-            failed = len([g for g in grades if g < 60])
-            
             # Enrollment stats
-            enrolled_courses = len([c for c in user.courses if c.approval_status == 'approved'])
-            pending_courses = len([c for c in user.courses if c.approval_status == 'pending'])
+            statuses = [c.get('approval_status') for c in user.get('courses', [])]
+            enrolled_courses = statuses.count('approved')
+            pending_courses = statuses.count('pending')
             
             # Activity
-            days_since_registration = (datetime.utcnow() - user.registered_at).days
-            days_since_last_active = (datetime.utcnow() - user.last_active).days
+            now = datetime.utcnow()
+            days_since_registration = (now - user.get('registered_at', now)).days
+            days_since_last_active = (now - user.get('last_active', now)).days
             
             return {
-                'full_name': user.full_name,
+                'full_name': user.get('full_name'),
                 'enrolled_courses': enrolled_courses,
                 'pending_courses': pending_courses,
-                'total_assignments': total_assignments,
-                'submitted': submitted,
-                'graded': graded,
-                'pending': submitted - graded,
-                'average_grade': round(average_grade, 2),
-                'highest_grade': highest_grade,
-                'lowest_grade': lowest_grade,
-                'passed': passed,
-                'failed': failed,
+                'total_assignments': submissions['total'],
+                'submitted': submissions['total'],
+                'graded': submissions['graded'],
+                'pending': submissions['total'] - submissions['graded'],
+                'average_grade': round(submissions['average'], 2),
+                'highest_grade': submissions['highest'],
+                'lowest_grade': submissions['lowest'],
+                'passed': submissions['passed'],
+                'failed': submissions['failed'],
                 'days_since_registration': days_since_registration,
                 'days_since_last_active': days_since_last_active,
                 'is_active': days_since_last_active < 7
@@ -162,6 +121,8 @@ class StatisticsManager:
             return {}
     
     @staticmethod
+    @cached("assignment_stats", ttl=60, stale_ttl=300, key=lambda assignment_id: str(assignment_id),
+            invalidate_on={"submission": "assignment_id", "grade": "assignment_id"})
     async def get_assignment_stats(assignment_id: str) -> Dict:
         """Get assignment-specific statistics"""
         try:
@@ -170,11 +131,12 @@ class StatisticsManager:
             if not assignment:
                 return {}
             
-            total_submissions = len(assignment.submissions)
-            graded = len([s for s in assignment.submissions if s.status == 'graded'])
+            submissions = await assignment.list_submissions()
+            total_submissions = len(submissions)
+            graded = len([s for s in submissions if s.status == 'graded'])
             pending = total_submissions - graded
             
-            grades = [s.grade for s in assignment.submissions if s.grade is not None]
+            grades = [s.grade for s in submissions if s.grade is not None]
             
             if grades:
                 average_grade = sum(grades) / len(grades)
@@ -193,7 +155,7 @@ class StatisticsManager:
             on_time = 0
             late = 0
             
-            for submission in assignment.submissions:
+            for submission in submissions:
                 if assignment.deadline:
                     if submission.submitted_at <= assignment.deadline:
                         on_time += 1
@@ -219,86 +181,26 @@ class StatisticsManager:
             return {}
     
     @staticmethod
-    async def get_top_students(limit: int = 10) -> List[Dict]:
-        """Get top performing students"""
+    async def get_top_students(limit: int = 10, course_id: Optional[str] = None) -> List[Dict]:
+        """Get top performing students (see utils.leaderboard)"""
         try:
-            logger.debug("get_top_students: loading all users")
-            users = await User.find().to_list()
-            logger.debug(f"get_top_students: loaded {len(users)} users")
-            logger.debug("get_top_students: loading all assignments")
-            all_assignments = await Assignment.find().to_list()
-            logger.debug(f"get_top_students: loaded {len(all_assignments)} assignments")
-            
-            student_performances = []
-            
-            for user in users:
-                grades = []
-                for assignment in all_assignments:
-                    submission = assignment.get_submission(str(user.telegram_id))
-                    if submission and submission.grade is not None:
-                        grades.append(submission.grade)
-                
-                if grades:
-                    avg_grade = sum(grades) / len(grades)
-                    student_performances.append({
-                        'telegram_id': user.telegram_id,
-                        'full_name': user.full_name,
-                        'email': user.email,
-                        'average_grade': round(avg_grade, 2),
-                        'total_assignments': len(grades)
-                    })
-            
-            # Sort by average grade
-            student_performances.sort(key=lambda x: x['average_grade'], reverse=True)
-            
-            return student_performances[:limit]
+            return await Leaderboard.top(limit, course_id)
         except Exception as e:
             logger.error(f"Error getting top students: {e}")
             return []
     
     @staticmethod
+    @cached("activity_chart", ttl=60, stale_ttl=600)
     async def get_activity_chart_data(days: int = 30) -> Dict:
-        """Get activity data for charts"""
+        """Get activity data for charts (last `days` days, today included)"""
         try:
-            start_date = datetime.utcnow() - timedelta(days=days)
-            
-            # Get daily registrations
-            logger.debug(f"get_activity_chart_data: loading users registered after {start_date}")
-            users = await User.find(User.registered_at > start_date).to_list()
-            logger.debug(f"get_activity_chart_data: loaded {len(users)} users for registrations chart")
-            
-            daily_registrations = {}
-            for i in range(days):
-                date = start_date + timedelta(days=i)
-                date_key = date.strftime('%Y-%m-%d')
-                daily_registrations[date_key] = 0
-            
-            for user in users:
-                date_key = user.registered_at.strftime('%Y-%m-%d')
-                if date_key in daily_registrations:
-                    daily_registrations[date_key] += 1
-            
-            # Get daily submissions
-            logger.debug("get_activity_chart_data: loading all assignments for submissions chart")
-            all_assignments = await Assignment.find().to_list()
-            logger.debug(f"get_activity_chart_data: loaded {len(all_assignments)} assignments for submissions chart")
-            daily_submissions = {}
-            
-            for i in range(days):
-                date = start_date + timedelta(days=i)
-                date_key = date.strftime('%Y-%m-%d')
-                daily_submissions[date_key] = 0
-            
-            for assignment in all_assignments:
-                for submission in assignment.submissions:
-                    date_key = submission.submitted_at.strftime('%Y-%m-%d')
-                    if date_key in daily_submissions:
-                        daily_submissions[date_key] += 1
+            logger.debug(f"get_activity_chart_data: loading {days} day rollups")
+            activity = await StatsRollup.get_days(days)
             
             return {
-                'labels': list(daily_registrations.keys()),
-                'registrations': list(daily_registrations.values()),
-                'submissions': list(daily_submissions.values())
+                'labels': [day.id.split(':', 1)[1] for day in activity],
+                'registrations': [day.users for day in activity],
+                'submissions': [day.submissions for day in activity]
             }
         except Exception as e:
             logger.error(f"Error getting activity chart data: {e}")
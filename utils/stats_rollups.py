@@ -0,0 +1,141 @@
+"""
+Stats Rollups repair - rebuild stats_rollups from the source collections
+إعادة بناء عدادات الإحصائيات من البيانات الأصلية
+
+The write paths keep stats_rollups current with $inc (see
+database/models/stats_rollup.py). ensure_rollups() runs at startup and
+builds them when they were never built (first deploy, database reset).
+Run rebuild_rollups() by hand whenever the counters may have drifted
+(e.g. a failed increment, data edited by hand). Increments that land
+while it runs can be overwritten, so run it when the platform is quiet.
+Day scopes already recorded are history and are never rewritten.
+"""
+from datetime import datetime
+from typing import Dict
+
+from loguru import logger
+from pymongo import ReplaceOne
+
+from database.models.user import ENROLLMENT_FIELDS, User
+from database.models.assignment import Assignment, AssignmentSubmission
+from database.models.stats_rollup import StatsRollup
+
+COUNTERS = (
+    "users", "enrollments", "enrollments_pending", "enrollments_approved",
+    "enrollments_rejected", "submissions", "graded", "grade_sum",
+)
+
+DAY_FORMAT = "%Y-%m-%d"
+DAY_SCOPES = "^day:"
+
+
+def _day(field: str) -> Dict:
+    return {"$dateToString": {"format": DAY_FORMAT, "date": field}}
+
+
+async def rebuild_rollups() -> int:
+    """Recompute the totals scopes and fill missing day scopes.
+
+    Returns the number of scopes written.
+    """
+    scopes: Dict[str, Dict[str, float]] = {}
+
+    def add(scope: str, field: str, value):
+        counters = scopes.setdefault(scope, {})
+        counters[field] = counters.get(field, 0) + value
+
+    users = User.get_motor_collection()
+    add(StatsRollup.GLOBAL, "users", await users.count_documents({}))
+    async for row in users.aggregate([
+        {"$match": {"registered_at": {"$type": "date"}}},
+        {"$group": {"_id": _day("$registered_at"), "count": {"$sum": 1}}},
+    ]):
+        add(f"day:{row['_id']}", "users", row["count"])
+
+    for kind, (array, id_field) in ENROLLMENT_FIELDS.items():
+        async for row in users.aggregate([
+            {"$unwind": f"${array}"},
+            {"$group": {
+                "_id": {"item": f"${array}.{id_field}", "status": f"${array}.approval_status"},
+                "count": {"$sum": 1},
+            }},
+        ]):
+            item_scope = StatsRollup.item_scope(kind, row["_id"]["item"])
+            status = row["_id"].get("status")
+            for scope in (StatsRollup.GLOBAL, item_scope):
+                add(scope, "enrollments", row["count"])
+                if status in ("pending", "approved", "rejected"):
+                    add(scope, f"enrollments_{status}", row["count"])
+        async for row in users.aggregate([
+            {"$unwind": f"${array}"},
+            {"$match": {f"{array}.enrolled_at": {"$type": "date"}}},
+            {"$group": {"_id": _day(f"${array}.enrolled_at"), "count": {"$sum": 1}}},
+        ]):
+            add(f"day:{row['_id']}", "enrollments", row["count"])
+
+    # Submissions are rolled up to the course/material of their assignment
+    assignment_scopes = {
+        a["_id"]: StatsRollup.item_scope(a.get("related_to", "course"), a.get("related_id"))
+        async for a in Assignment.get_motor_collection().find({}, {"related_to": 1, "related_id": 1})
+    }
+    submissions = AssignmentSubmission.get_motor_collection()
+    async for row in submissions.aggregate([
+        {"$group": {
+            "_id": "$assignment_id",
+            "submissions": {"$sum": 1},
+            "graded": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$grade", None]}, None]}, 1, 0]}},
+            "grade_sum": {"$sum": "$grade"},
+        }},
+    ]):
+        targets = [StatsRollup.GLOBAL]
+        if row["_id"] in assignment_scopes:
+            targets.append(assignment_scopes[row["_id"]])
+        for scope in targets:
+            for field in ("submissions", "graded", "grade_sum"):
+                add(scope, field, row[field])
+    for field, date_field in (("submissions", "$submitted_at"), ("graded", "$graded_at")):
+        async for row in submissions.aggregate([
+            {"$match": {date_field[1:]: {"$type": "date"}}},
+            {"$group": {"_id": _day(date_field), "count": {"$sum": 1}}},
+        ]):
+            add(f"day:{row['_id']}", field, row["count"])
+
+    now = datetime.utcnow()
+    collection = StatsRollup.get_motor_collection()
+    # Day scopes count events (a resubmission or regrade counts again on
+    # its day); the documents only keep their latest dates, so recorded
+    # days are left as they are and only days never recorded are filled
+    recorded_days = set(await collection.distinct("_id", {"_id": {"$regex": DAY_SCOPES}}))
+    operations = [
+        ReplaceOne(
+            {"_id": scope},
+            {**{field: counters.get(field, 0) for field in COUNTERS}, "updated_at": now, "rebuilt_at": now},
+            upsert=True
+        )
+        for scope, counters in scopes.items()
+        if scope not in recorded_days
+    ]
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+    # Totals scopes that no longer have any source data
+    await collection.delete_many({"_id": {"$nin": list(scopes), "$not": {"$regex": DAY_SCOPES}}})
+
+    logger.info(f"Stats rollups rebuilt: {len(operations)} scopes")
+    return len(operations)
+
+
+async def ensure_rollups() -> bool:
+    """Build the rollups if they were never built, returns True if it did.
+
+    Increments made before the first build upsert a "global" scope that
+    holds only their deltas, so the marker is rebuilt_at, which only
+    rebuild_rollups() sets.
+    """
+    built = await StatsRollup.get_motor_collection().count_documents(
+        {"_id": StatsRollup.GLOBAL, "rebuilt_at": {"$exists": True}}, limit=1
+    )
+    if built:
+        return False
+    logger.info("Stats rollups were never built, rebuilding them")
+    await rebuild_rollups()
+    return True
@@ -0,0 +1,348 @@
+"""
+Submission Store - journaled storage for data/submissions.json
+مخزن التسليمات - سجل إلحاقي مع دمج دوري في الخلفية
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from database.data_bridge import DataBridge
+from utils.grading_queue import GradingIndex
+from utils.json_storage import JsonStorage
+
+
+SubmissionKey = Tuple[str, str, int]
+
+
+def submission_key(student_id, course_id: str, assignment_index: int) -> SubmissionKey:
+    """Identity of a submission: one per student per assignment"""
+    return (str(student_id), course_id, int(assignment_index))
+
+
+class SubmissionStore:
+    """Append-only journal in front of data/submissions.json.
+
+    - Every write appends one NDJSON record to the journal and fsyncs it,
+      so the cost of a write does not depend on how many submissions exist.
+    - Reads are served from an in-memory view (snapshot + replayed journal)
+      plus a grading queue index by status/course/assignment.
+    - Once the journal grows past COMPACT_EVERY records a background task
+      rewrites submissions.json from the view and starts a fresh journal.
+
+    Records are full submissions (last write wins), so replaying a journal
+    over a snapshot that already contains it is harmless.
+
+    With DATA_BACKEND=mongo/sqlite records live in that database (see
+    DataBridge) and nothing above is kept locally, unless DATA_DUAL_WRITE
+    keeps the journal going as well.
+    """
+    SNAPSHOT_FILE = 'submissions.json'
+    JOURNAL_FILE = 'submissions.journal.ndjson'
+    COMPACT_EVERY = 500
+
+    _view: Dict[SubmissionKey, Dict] = {}
+    _queue: GradingIndex = GradingIndex('assignment_index')
+    _loaded: bool = False
+    _lock: asyncio.Lock = None
+    _compact_lock: asyncio.Lock = None
+    _journal_records: int = 0
+    _compaction_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def _paths(cls) -> Tuple[Path, Path, Path]:
+        snapshot = JsonStorage.path(cls.SNAPSHOT_FILE)
+        journal = JsonStorage.path(cls.JOURNAL_FILE)
+        rotated = journal.with_suffix('.compacting')
+        return snapshot, journal, rotated
+
+    @classmethod
+    def _get_lock(cls) -> asyncio.Lock:
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        return cls._lock
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _replay(cls, view: Dict[SubmissionKey, Dict], journal: Path) -> int:
+        """Apply journal records to the view, returns number of records"""
+        if not journal.exists():
+            return 0
+        count = 0
+        with open(journal, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    submission = json.loads(line)
+                    key = submission_key(
+                        submission['student_id'],
+                        submission['course_id'],
+                        submission['assignment_index']
+                    )
+                except Exception as e:
+                    # A crash mid-append can leave a torn last line
+                    logger.warning(f"SubmissionStore: skipping bad journal line {journal.name}:{line_no}: {repr(e)}")
+                    continue
+                view[key] = submission
+                count += 1
+        return count
+
+    @classmethod
+    def _load_sync(cls) -> Tuple[Dict[SubmissionKey, Dict], int]:
+        snapshot, journal, rotated = cls._paths()
+        view: Dict[SubmissionKey, Dict] = {}
+
+        if snapshot.exists():
+            with open(snapshot, 'r', encoding='utf-8') as f:
+                for s in json.load(f) or []:
+                    try:
+                        view[submission_key(s['student_id'], s['course_id'], s['assignment_index'])] = s
+                    except KeyError:
+                        logger.warning(f"SubmissionStore: skipping malformed submission {s}")
+
+        # An interrupted compaction leaves its journal behind - replay it first
+        cls._replay(view, rotated)
+        records = cls._replay(view, journal)
+
+        # Terminate a torn last line so the next append starts a new record
+        if journal.exists() and journal.stat().st_size:
+            with open(journal, 'rb+') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        return view, records
+
+    @classmethod
+    async def _ensure_loaded(cls):
+        if cls._loaded:
+            return
+        async with cls._get_lock():
+            if cls._loaded:
+                return
+            view, records = await JsonStorage.run(cls._load_sync)
+            cls._view = view
+            cls._queue = GradingIndex('assignment_index')
+            for submission in view.values():
+                cls._queue.add(submission)
+            cls._journal_records = records
+            cls._loaded = True
+            logger.info(f"SubmissionStore: loaded {len(view)} submissions ({records} journal records)")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _query(status: str, course_id: str, assignment_index: int) -> Dict:
+        return {'status': status, 'course_id': course_id, 'assignment_index': int(assignment_index)}
+
+    @classmethod
+    async def get(cls, student_id, course_id: str, assignment_index: int) -> Optional[Dict]:
+        """Get one submission"""
+        key = submission_key(student_id, course_id, assignment_index)
+
+        async def from_json():
+            await cls._ensure_loaded()
+            return cls._view.get(key)
+
+        return await DataBridge.read(
+            lambda: DataBridge.find_one('submissions', {'student_id': key[0], 'course_id': key[1], 'assignment_index': key[2]}),
+            from_json
+        )
+
+    @classmethod
+    async def list_all(cls) -> List[Dict]:
+        """Get all submissions (read-only dicts)"""
+        async def from_json():
+            await cls._ensure_loaded()
+            return list(cls._view.values())
+
+        return await DataBridge.read(lambda: DataBridge.find('submissions'), from_json)
+
+    @classmethod
+    async def count(cls) -> int:
+        """Total number of submissions"""
+        async def from_json():
+            await cls._ensure_loaded()
+            return len(cls._view)
+
+        return await DataBridge.read(lambda: DataBridge.count('submissions'), from_json)
+
+    @classmethod
+    async def queue_summary(cls, status: str = 'pending') -> List[Dict]:
+        """One entry per assignment that has submissions in the given status"""
+        return await DataBridge.read(
+            lambda: cls._db_queue_summary(status),
+            lambda: cls._json_queue_summary(status)
+        )
+
+    @classmethod
+    async def _db_queue_summary(cls, status: str) -> List[Dict]:
+        groups = await DataBridge.group_count(
+            'submissions',
+            {'status': status},
+            by=('course_id', 'assignment_index'),
+            first='assignment_title'
+        )
+        return [
+            {
+                'course_id': g['course_id'],
+                'assignment_index': g['assignment_index'],
+                'title': g['first'],
+                'count': g['count']
+            }
+            for g in groups
+        ]
+
+    @classmethod
+    async def _json_queue_summary(cls, status: str) -> List[Dict]:
+        await cls._ensure_loaded()
+        summary = []
+        for (course_id, assignment_index), bucket in cls._queue.groups(status).items():
+            first = next(iter(bucket.values()))
+            summary.append({
+                'course_id': course_id,
+                'assignment_index': assignment_index,
+                'title': first.get('assignment_title'),
+                'count': len(bucket)
+            })
+        return summary
+
+    @classmethod
+    async def list_by_status(cls, status: str, course_id: str, assignment_index: int) -> List[Dict]:
+        """Submissions of one assignment in the given status"""
+        async def from_json():
+            await cls._ensure_loaded()
+            return cls._queue.records(status, course_id, assignment_index)
+
+        return await DataBridge.read(
+            lambda: DataBridge.find('submissions', cls._query(status, course_id, assignment_index)),
+            from_json
+        )
+
+    @classmethod
+    async def count_by_status(cls, status: str, course_id: str, assignment_index: int) -> int:
+        """Number of submissions of one assignment in the given status"""
+        async def from_json():
+            await cls._ensure_loaded()
+            return cls._queue.count(status, course_id, assignment_index)
+
+        return await DataBridge.read(
+            lambda: DataBridge.count('submissions', cls._query(status, course_id, assignment_index)),
+            from_json
+        )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    @classmethod
+    async def put(cls, submission: Dict) -> Dict:
+        """Create or replace a submission (durable once this returns)"""
+        if DataBridge.writes_json():
+            await cls._ensure_loaded()
+        async with cls._get_lock():
+            submission = await cls._put_locked(submission)
+        cls._maybe_schedule_compaction()
+        return submission
+
+    @classmethod
+    async def _put_locked(cls, submission: Dict) -> Dict:
+        """Body of put(); the caller holds _get_lock() and has loaded the view"""
+        if not DataBridge.writes_json():
+            submission = {**submission, 'student_id': str(submission['student_id'])}
+            await DataBridge.upsert('submissions', submission)
+            return submission
+
+        key = submission_key(
+            submission['student_id'],
+            submission['course_id'],
+            submission['assignment_index']
+        )
+        line = json.dumps(submission, ensure_ascii=False) + '\n'
+        await JsonStorage.append(cls.JOURNAL_FILE, line, fsync=True)
+        cls._view[key] = submission
+        cls._queue.add(submission)
+        cls._journal_records += 1
+
+        if DataBridge.uses_db():
+            await DataBridge.upsert('submissions', submission)
+        return submission
+
+    @classmethod
+    async def grade(
+        cls,
+        student_id,
+        course_id: str,
+        assignment_index: int,
+        grade: float,
+        feedback: str,
+        graded_at: str
+    ) -> Optional[Dict]:
+        """Mark a submission as graded, returns None if it does not exist"""
+        if DataBridge.writes_json():
+            await cls._ensure_loaded()
+        # Read and write under one lock, so a resubmission racing the
+        # grade is not overwritten with the copy read here
+        async with cls._get_lock():
+            current = await cls.get(student_id, course_id, assignment_index)
+            if not current:
+                return None
+
+            updated = dict(current)
+            updated['status'] = 'graded'
+            updated['grade'] = grade
+            updated['feedback'] = feedback
+            updated['graded_at'] = graded_at
+            updated = await cls._put_locked(updated)
+        cls._maybe_schedule_compaction()
+        return updated
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _maybe_schedule_compaction(cls):
+        if cls._journal_records < cls.COMPACT_EVERY:
+            return
+        if cls._compaction_task and not cls._compaction_task.done():
+            return
+        cls._compaction_task = asyncio.create_task(cls.compact())
+
+    @classmethod
+    async def compact(cls):
+        """Fold the journal into submissions.json"""
+        if not DataBridge.writes_json():
+            return
+        await cls._ensure_loaded()
+        _, journal, rotated = cls._paths()
+        if cls._compact_lock is None:
+            cls._compact_lock = asyncio.Lock()
+
+        async with cls._compact_lock:
+            try:
+                async with cls._get_lock():
+                    if cls._journal_records == 0 and not rotated.exists():
+                        return
+                    # Start a fresh journal; new writes go there while we write the snapshot
+                    if journal.exists() and not rotated.exists():
+                        os.replace(journal, rotated)
+                    submissions = list(cls._view.values())
+                    cls._journal_records = 0
+
+                await JsonStorage.write(cls.SNAPSHOT_FILE, submissions)
+                # Snapshot now contains everything in the rotated journal
+                if rotated.exists():
+                    rotated.unlink()
+                logger.info(f"SubmissionStore: compacted {len(submissions)} submissions")
+            except Exception as e:
+                logger.error(f"SubmissionStore: compaction failed: {repr(e)}", exc_info=True)